@@ -3,6 +3,7 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 from products.models import Product
+from instastore.spreadsheets import table_format
 from shops.models import Shop
 
 # --- فرم ایجاد و ویرایش محصول ---
@@ -13,10 +14,11 @@ class ProductForm(forms.ModelForm):
 
     class Meta:
         model = Product
-        fields = ['name', 'category', 'base_price', 'brand', 'material', 'description', 'is_active']
+        fields = ['name', 'sku', 'category', 'base_price', 'brand', 'material', 'description', 'is_active']
         widgets = {
             'description': forms.Textarea(attrs={'rows': 4, 'class': 'form-control'}),
             'name': forms.TextInput(attrs={'class': 'form-control'}),
+            'sku': forms.TextInput(attrs={'class': 'form-control', 'dir': 'ltr'}),
             'category': forms.Select(attrs={'class': 'form-select'}),
             'base_price': forms.NumberInput(attrs={'class': 'form-control'}),
             'brand': forms.TextInput(attrs={'class': 'form-control'}),
@@ -32,6 +34,38 @@ class ProductForm(forms.ModelForm):
         self.shop = kwargs.pop('shop', None)
         super().__init__(*args, **kwargs)
 
+    def clean_sku(self):
+        # فروشگاه در فیلدهای فرم نیست؛ پس یکتایی (shop, sku) باید اینجا بررسی شود
+        sku = self.cleaned_data['sku'].strip()
+        if sku and self.shop:
+            duplicates = Product.objects.filter(shop=self.shop, sku=sku).exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise forms.ValidationError("محصول دیگری با این کد کالا ثبت شده است.")
+        return sku
+
+# --- فرم ورود گروهی محصولات ---
+class CatalogImportForm(forms.Form):
+    file = forms.FileField(
+        label='فایل محصولات (CSV یا Excel)',
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'})
+    )
+    images = forms.FileField(
+        label='تصاویر (فایل zip)', required=False,
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.zip'})
+    )
+
+    def clean_file(self):
+        data_file = self.cleaned_data['file']
+        if table_format(data_file.name) is None:
+            raise forms.ValidationError("فقط فایل CSV یا XLSX پذیرفته می‌شود.")
+        return data_file
+
+    def clean_images(self):
+        images = self.cleaned_data.get('images')
+        if images and not images.name.lower().endswith('.zip'):
+            raise forms.ValidationError("تصاویر باید در یک فایل zip باشند.")
+        return images
+
 # --- فرم ثبت‌نام فروشنده ---
 class SellerRegisterForm(UserCreationForm):
     email = forms.EmailField(required=True, label='ایمیل', widget=forms.EmailInput(attrs={'class': 'form-control', 'dir': 'ltr'}))
@@ -0,0 +1,59 @@
+# frontend/templatetags/catalog_cache.py
+"""
+کش قطعه‌ای قالب‌های ویترین بر اساس نسخه کاتالوگ فروشگاه
+
+{% load catalog_cache %}
+{% catalogcache "store-grid" shop.id catalog_vary %}
+    ...
+{% endcatalogcache %}
+
+کلید شامل نام قطعه، فروشگاه، نسخه کاتالوگ و مقادیر بعدی است.
+محتوای وابسته به کاربر/سبد خرید/CSRF نباید داخل این بلاک باشد.
+"""
+from django import template
+
+from products.cache import catalog_cache_key, catalog_version, cache_get, cache_set
+
+register = template.Library()
+
+
+class CatalogCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, shop_id, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.shop_id = shop_id
+        self.vary_on = vary_on
+
+    def render(self, context):
+        fragment_name = self.fragment_name.resolve(context)
+        shop_id = self.shop_id.resolve(context)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+
+        # نسخه یک بار در ویو خوانده می‌شود تا هر قطعه سراغ کش نرود
+        version = context.get('catalog_version') or catalog_version(shop_id)
+        key = catalog_cache_key(f'fragment:{fragment_name}', shop_id, *vary_on, version=version)
+
+        content = cache_get(key, 'fragment')
+        if content is None:
+            content = self.nodelist.render(context)
+            cache_set(key, content)
+        return content
+
+
+@register.tag('catalogcache')
+def do_catalogcache(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' حداقل به نام قطعه و شناسه فروشگاه نیاز دارد"
+        )
+
+    nodelist = parser.parse(('endcatalogcache',))
+    parser.delete_first_token()
+
+    return CatalogCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
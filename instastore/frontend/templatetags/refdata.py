@@ -0,0 +1,23 @@
+# frontend/templatetags/refdata.py
+"""
+پلن و دسته‌بندی از روی شناسه کلید خارجی در قالب‌ها (instastore/refdata.py - بدون کوئری)
+
+{% load refdata %}
+{% with category=product.category_id|category %}{{ category.name|default:"عمومی" }}{% endwith %}
+{% with plan=shop.current_plan_id|plan %}{{ plan.max_products }}{% endwith %}
+"""
+from django import template
+
+from instastore.refdata import get_category, get_plan
+
+register = template.Library()
+
+
+@register.filter(name='category')
+def category_filter(category_id):
+    return get_category(category_id) if category_id not in (None, '') else None
+
+
+@register.filter(name='plan')
+def plan_filter(plan_id):
+    return get_plan(plan_id) if plan_id not in (None, '') else None
@@ -17,12 +17,17 @@ urlpatterns = [
     path('seller/dashboard/', views.SellerDashboardView.as_view(), name='seller-dashboard'),
     path('seller/products/', views.SellerProductsView.as_view(), name='seller-products'),
     path('seller/products/add/', views.SellerProductCreateView.as_view(), name='seller-product-add'),
+    path('seller/products/import/', views.SellerProductImportView.as_view(), name='seller-product-import'),
     path('seller/products/<int:pk>/edit/', views.SellerProductUpdateView.as_view(), name='seller-product-edit'),
     path('seller/products/<int:pk>/delete/', views.delete_product, name='seller-product-delete'),
     path('seller/orders/', views.SellerOrdersView.as_view(), name='seller-orders'),
     path('seller/orders/<int:pk>/', views.SellerOrderDetailView.as_view(), name='seller-order-detail'),
+    path('seller/orders/bulk-status/', views.seller_orders_bulk_status, name='seller-orders-bulk-status'),
+    path('seller/orders/import-tracking/', views.seller_orders_import_tracking, name='seller-orders-import-tracking'),
     path('seller/settings/', views.ShopSettingsView.as_view(), name='seller-settings'),
     path('seller/orders/<int:pk>/delete/', views.delete_order, name='seller-order-delete'),
+    path('seller/export/download/<str:name>/', views.seller_export_download, name='seller-export-download'),
+    path('seller/export/<str:dataset>/', views.seller_export, name='seller-export'),
     
     # مسیر صفحه موفقیت سفارش
     path('order/success/<str:order_id>/', views.order_success_view, name='order-success'),
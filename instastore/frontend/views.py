@@ -1,9 +1,11 @@
 import logging
+import os
 from django.conf import settings
+from django.db import transaction
 from django.db.models.functions import Coalesce
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.generic import TemplateView, CreateView, UpdateView, DetailView, View
-from django.http import JsonResponse, Http404
+from django.views.generic import TemplateView, CreateView, UpdateView, DetailView, FormView, View
+from django.http import JsonResponse, Http404, FileResponse
 from django.views.decorators.http import require_http_methods, require_POST
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
@@ -13,13 +15,30 @@ from django.urls import reverse_lazy
 from django.db.models import Sum
 from django.contrib.auth import login, logout, authenticate
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.core.paginator import Paginator
 
 from shops.models import Shop
 from shops.decorators import shop_required, shop_optional  # وارد کردن decoratorهای جدید
-from products.models import Product, Category, ProductVariant, ProductImage
+from products.models import Product, ProductVariant, ProductImage
+from products.facets import parse_facet_params, has_active_filters, search_facets
+from products.cache import catalog_version, storefront_vary
+from products.conditional import catalog_condition
+from products.payload import get_product_payload
+from products.importer import import_catalog
+from products.variants import apply_variant_matrix, normalize_matrix, VariantMatrixError
 from orders.models import Order, OrderItem
+from orders.services import shop_dashboard_stats
+from orders.bulk import transition_orders, import_tracking_codes, MAX_BULK_ORDERS
+from instastore.exports import (
+    SELLER_DATASETS, seller_queryset, export_response, export_path,
+    should_run_in_background, schedule_export
+)
+from instastore.refdata import categories_for_ids, get_category_by_slug
+from instastore.spreadsheets import table_format
 from customers.models import Customer  # وارد کردن مدل اصلاح شده
-from .forms import ProductForm, SellerRegisterForm, ShopSettingsForm
+from .forms import ProductForm, SellerRegisterForm, ShopSettingsForm, CatalogImportForm
 from .cart import Cart
 
 logger = logging.getLogger('instastore')
@@ -216,6 +235,7 @@ def get_cart_sidebar(request):
 # ==========================================================
 
 @method_decorator(shop_required, name='dispatch')
+@method_decorator(catalog_condition(private=True), name='get')
 class ShopStoreView(TemplateView):
     template_name = 'frontend/shop_store.html'
 
@@ -230,53 +250,58 @@ class ShopStoreView(TemplateView):
         
         category_slug = self.request.GET.get('category')
         if category_slug:
-            products = products.filter(category__slug=category_slug)
+            # دسته‌بندی از داده‌های مرجع در حافظه (بدون join روی جدول دسته‌بندی)
+            category = get_category_by_slug(category_slug)
+            products = products.filter(category_id=category.pk) if category else products.none()
 
         search_query = self.request.GET.get('q')
         if search_query:
             products = products.filter(name__icontains=search_query)
 
-        context['products'] = products[:24]
-        context['categories'] = Category.objects.filter(products__shop=shop).distinct()
+        # فیلتر رنگ/سایز/قیمت از روی ایندکس فیلترها
+        # به صورت lazy تا وقتی قطعه‌های قالب از کش می‌آیند کوئری اجرا نشود
+        facet_filters = parse_facet_params(self.request.GET)
+        facets = SimpleLazyObject(lambda: search_facets(shop, **facet_filters))
+
+        def filtered_products():
+            if has_active_filters(facet_filters):
+                return products.filter(id__in=facets['product_ids'])[:24]
+            return products[:24]
+
+        context['facets'] = facets
+        context['facet_filters'] = facet_filters
+        context['products'] = SimpleLazyObject(filtered_products)
+        # شناسه دسته‌بندی‌ها از جدول محصول و ردیف‌ها از داده‌های مرجع در حافظه (instastore/refdata.py)
+        context['categories'] = SimpleLazyObject(lambda: categories_for_ids(
+            Product.objects.filter(shop=shop, category__isnull=False)
+            .values_list('category_id', flat=True).order_by().distinct()
+        ))
+
+        # کلید کش قطعه‌ها: نسخه کاتالوگ + پارامترهای مؤثر بر محتوا
+        context['catalog_version'] = catalog_version(shop.id)
+        context['catalog_vary'] = storefront_vary(self.request.GET)
         return context
 
 @method_decorator(shop_required, name='dispatch')
+@method_decorator(catalog_condition(private=True), name='get')
 class ProductDetailView(TemplateView):
     template_name = 'frontend/product_detail.html'
 
     def get_context_data(self, **kwargs):
         shop = self.request.shop  # از decorator می‌آید
-        product_id = kwargs.get('product_id')
         
-        # فقط محصولات این فروشگاه
-        product = get_object_or_404(
-            Product, 
-            id=product_id, 
-            shop=shop,  # 🔥 فیلتر مهم
-            is_active=True
-        )
+        # داده آماده محصول (واریانت‌ها، رنگ/سایز، تصاویر) از کش - فقط محصولات فعال این فروشگاه
+        product = get_product_payload(shop.id, kwargs.get('product_id'))
+        if product is None:
+            raise Http404("محصول یافت نشد")
 
         context = super().get_context_data(**kwargs)
         context['shop'] = shop
         context['product'] = product
-        
-        variants = product.variants.filter(stock__gt=0)
-        context['variants'] = variants
-        
-        unique_colors = set(v.color for v in variants if v.color)
-        unique_sizes = set(v.size for v in variants if v.size)
-        context['unique_colors'] = sorted(list(unique_colors))
-        context['unique_sizes'] = sorted(list(unique_sizes))
-        
-        variants_data = [{
-            'id': v.id, 
-            'color': v.color, 
-            'size': v.size, 
-            'stock': v.stock, 
-            'price_adj': float(v.price_adjustment)
-        } for v in variants]
-        
-        context['variants_json'] = variants_data
+        context['unique_colors'] = product['colors']
+        context['unique_sizes'] = product['sizes']
+        context['variants_json'] = product['variants']
+        context['catalog_version'] = catalog_version(shop.id)
         return context
 
 @method_decorator(shop_required, name='dispatch')
@@ -456,11 +481,13 @@ class SellerDashboardView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         shop = self.request.user.shop
+        order_stats = shop_dashboard_stats(shop)
         context.update({
             'shop': shop,
             'total_products': Product.objects.filter(shop=shop).count(),
-            'total_orders': Order.objects.filter(shop=shop).count(),
-            'pending_orders': Order.objects.filter(shop=shop, status='pending').count()
+            'total_orders': order_stats['total'],
+            'pending_orders': order_stats['pending'],
+            'order_stats': order_stats,
         })
         return context
 
@@ -483,74 +510,111 @@ class SellerProductsView(TemplateView):
         })
         return context
 
-class SellerProductCreateView(LoginRequiredMixin, CreateView):
+def _variant_rows(post):
+    """ردیف‌های ماتریس تنوع از فرم محصول (ردیف بدون موجودی نادیده گرفته می‌شود)"""
+    rows = zip(
+        post.getlist('vars_color[]'),
+        post.getlist('vars_size[]'),
+        post.getlist('vars_stock[]'),
+        post.getlist('vars_price[]'),
+    )
+    return [
+        {'color': color, 'size': size, 'stock': stock, 'price_adjustment': price or 0}
+        for color, size, stock, price in rows if stock
+    ]
+
+class SellerProductFormMixin:
+    """ذخیره محصول و ماتریس تنوع‌ها در یک تراکنش (مشترک بین ایجاد و ویرایش)"""
     model = Product
     form_class = ProductForm
     template_name = 'frontend/seller_product_form.html'
     success_url = reverse_lazy('frontend:seller-products')
+    # محصول بدون تنوع ارسالی یک واریانت پیش‌فرض می‌گیرد (فقط هنگام ایجاد)
+    default_variant_rows = None
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs['shop'] = self.request.user.shop
         return kwargs
 
+    def get_variant_rows(self):
+        return _variant_rows(self.request.POST) or self.default_variant_rows or []
+
     def form_valid(self, form):
-        product = form.save(commit=False)
-        product.shop = self.request.user.shop
-        product.save()
-        
-        for field_name in ['image1', 'image2', 'image3']:
-            image_file = self.request.FILES.get(field_name)
-            if image_file:
-                ProductImage.objects.create(
-                    product=product,
-                    image=image_file,
-                    alt_text=product.name
-                )
-        
-        colors = self.request.POST.getlist('vars_color[]')
-        sizes = self.request.POST.getlist('vars_size[]')
-        stocks = self.request.POST.getlist('vars_stock[]')
-        prices = self.request.POST.getlist('vars_price[]')
-        
-        has_variant = False
-        if colors:
-            for c, s, st, p in zip(colors, sizes, stocks, prices):
-                if st:
-                    ProductVariant.objects.create(
-                        product=product, 
-                        color=c, 
-                        size=s, 
-                        stock=int(st), 
-                        price_adjustment=int(p) if p else 0
+        rows = self.get_variant_rows()
+        try:
+            normalize_matrix(rows)
+        except VariantMatrixError as e:
+            for error in e.errors:
+                form.add_error(None, error)
+            return self.form_invalid(form)
+
+        with transaction.atomic():
+            product = form.save(commit=False)
+            product.shop = self.request.user.shop
+            product.save()
+
+            for field_name in ['image1', 'image2', 'image3']:
+                image_file = self.request.FILES.get(field_name)
+                if image_file:
+                    ProductImage.objects.create(
+                        product=product,
+                        image=image_file,
+                        alt_text=product.name
                     )
-                    has_variant = True
-        
-        if not has_variant:
-            ProductVariant.objects.create(product=product, stock=10, price_adjustment=0)
-        
-        messages.success(self.request, "محصول با موفقیت ایجاد شد.")
+
+            apply_variant_matrix(product, rows)
+
+        self.object = product
+        messages.success(self.request, self.success_message)
         return redirect(self.success_url)
 
-class SellerProductUpdateView(LoginRequiredMixin, UpdateView):
-    model = Product
-    form_class = ProductForm
-    template_name = 'frontend/seller_product_form.html'
-    success_url = reverse_lazy('frontend:seller-products')
+class SellerProductCreateView(LoginRequiredMixin, SellerProductFormMixin, CreateView):
+    success_message = "محصول با موفقیت ایجاد شد."
+    default_variant_rows = [{'color': '', 'size': '', 'stock': 10, 'price_adjustment': 0}]
+
+class SellerProductUpdateView(LoginRequiredMixin, SellerProductFormMixin, UpdateView):
+    success_message = "محصول ویرایش شد."
 
     def get_queryset(self):
         # فقط محصولات متعلق به فروشگاه کاربر
         return Product.objects.filter(shop=self.request.user.shop)
-    
-    def get_form_kwargs(self):
-        kwargs = super().get_form_kwargs()
-        kwargs['shop'] = self.request.user.shop
-        return kwargs
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['variants'] = self.object.variants.order_by('color', 'size')
+        return context
+
+class SellerProductImportView(LoginRequiredMixin, FormView):
+    """ورود گروهی محصولات از فایل CSV/XLSX و zip تصاویر"""
+    form_class = CatalogImportForm
+    template_name = 'frontend/seller_product_import.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['shop'] = self.request.user.shop
+        return context
 
     def form_valid(self, form):
-        self.object = form.save()
-        messages.success(self.request, "محصول ویرایش شد.")
-        return redirect(self.success_url)
+        data_file = form.cleaned_data['file']
+        report = import_catalog(
+            self.request.user.shop,
+            data_file,
+            data_file.name,
+            images_zip=form.cleaned_data.get('images'),
+            user=self.request.user,
+            request=self.request
+        )
+
+        if report.imported:
+            messages.success(
+                self.request,
+                f"{report.created} محصول جدید ثبت و {report.updated} محصول به‌روزرسانی شد."
+            )
+        if report.error_count:
+            messages.warning(self.request, f"{report.error_count} خطا در فایل پیدا شد؛ جزئیات را پایین صفحه ببینید.")
+
+        return self.render_to_response(self.get_context_data(form=form, report=report))
 
 @require_http_methods(["POST", "DELETE"])
 @login_required
@@ -564,6 +628,7 @@ def delete_product(request, pk):
 @method_decorator(login_required, name='dispatch')
 class SellerOrdersView(TemplateView):
     template_name = 'frontend/seller_orders.html'
+    paginate_by = 20
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -574,18 +639,14 @@ class SellerOrdersView(TemplateView):
         
         if status_filter != 'all':
             orders = orders.filter(status=status_filter)
-            
-        context['orders'] = orders
+
+        page_obj = Paginator(orders, self.paginate_by).get_page(self.request.GET.get('page'))
+
+        context['orders'] = page_obj.object_list
+        context['page_obj'] = page_obj
         context['shop'] = shop
         context['status_filter'] = status_filter
-        
-        context['order_stats'] = {
-            'pending': Order.objects.filter(shop=shop, status='pending').count(),
-            'paid': Order.objects.filter(shop=shop, status='paid').count(),
-            'processing': Order.objects.filter(shop=shop, status='processing').count(),
-            'shipped': Order.objects.filter(shop=shop, status='shipped').count(),
-            'delivered': Order.objects.filter(shop=shop, status='delivered').count(),
-        }
+        context['order_stats'] = shop_dashboard_stats(shop)
         return context
 
 @require_http_methods(["POST", "DELETE"])
@@ -621,4 +682,82 @@ class ShopSettingsView(UpdateView):
     
     def form_valid(self, form):
         messages.success(self.request, "تنظیمات با موفقیت ذخیره شد.")
-        return super().form_valid(form)
\ No newline at end of file
+        return super().form_valid(form)
+
+
+@require_POST
+@login_required
+def seller_orders_bulk_status(request):
+    """تغییر وضعیت سفارش‌های انتخاب‌شده در صفحه سفارشات"""
+    shop = request.user.shop
+    target = request.POST.get('status')
+    ids = [pk for pk in request.POST.getlist('order_ids') if pk.isdigit()][:MAX_BULK_ORDERS]
+
+    if not ids or target not in dict(Order.STATUS_CHOICES):
+        messages.error(request, "سفارش و وضعیت جدید را انتخاب کنید.")
+    else:
+        result = transition_orders(Order.objects.filter(shop=shop, id__in=ids), target, user=request.user)
+        if result['updated']:
+            messages.success(request, f"وضعیت {len(result['updated'])} سفارش تغییر کرد.")
+        if result['skipped']:
+            messages.warning(request, f"{len(result['skipped'])} سفارش به این وضعیت قابل تغییر نبود.")
+
+    return redirect('frontend:seller-orders')
+
+
+@require_POST
+@login_required
+def seller_orders_import_tracking(request):
+    """ورود کد رهگیری سفارش‌ها از فایل پست/پیک"""
+    data_file = request.FILES.get('file')
+    if data_file is None or table_format(data_file.name) is None:
+        messages.error(request, "فایل CSV یا XLSX شامل شماره سفارش و کد رهگیری را انتخاب کنید.")
+        return redirect('frontend:seller-orders')
+
+    result = import_tracking_codes(
+        request.user.shop, data_file, data_file.name,
+        mark_shipped=bool(request.POST.get('mark_shipped')), user=request.user
+    )
+    messages.success(
+        request,
+        f"کد رهگیری {result['updated']} سفارش ثبت شد؛ {result['shipped']} سفارش به «ارسال شده» رفت."
+    )
+    for error in result['errors'][:10]:
+        messages.warning(request, f"سطر {error['row']}: {error['message']}")
+    if len(result['errors']) > 10:
+        messages.warning(request, f"و {len(result['errors']) - 10} خطای دیگر.")
+
+    return redirect('frontend:seller-orders')
+
+
+@login_required
+def seller_export(request, dataset):
+    """خروجی CSV/XLSX سفارشات، مشتریان یا محصولات فروشگاه (stream یا فایل پس‌زمینه)"""
+    if dataset not in SELLER_DATASETS or not hasattr(request.user, 'shop'):
+        raise Http404("خروجی یافت نشد")
+
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in ('csv', 'xlsx'):
+        fmt = 'csv'
+
+    queryset = seller_queryset(dataset, request.user.shop)
+    if request.GET.get('background') or should_run_in_background(queryset):
+        schedule_export(dataset, queryset, request.user, fmt)
+        messages.info(request, "فایل خروجی در حال آماده‌سازی است؛ لینک دانلود به ایمیل شما ارسال می‌شود.")
+        referer = request.META.get('HTTP_REFERER')
+        if referer and url_has_allowed_host_and_scheme(
+            referer, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+        ):
+            return redirect(referer)
+        return redirect('frontend:seller-dashboard')
+
+    return export_response(dataset, queryset, fmt)
+
+
+@login_required
+def seller_export_download(request, name):
+    """دانلود فایل خروجی پس‌زمینه (فقط فایل‌های همان کاربر)"""
+    path = export_path(request.user.pk, name)
+    if not os.path.isfile(path):
+        raise Http404("فایل یافت نشد")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=os.path.basename(path))
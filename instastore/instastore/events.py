@@ -0,0 +1,321 @@
+# instastore/events.py
+"""
+گذرگاه رویدادهای دامنه (درون پروسه)
+
+مدل‌ها یک بار ثبت می‌شوند و هر save/delete یک رویداد می‌سازد:
+
+    track_model(Shop, 'shop', fields=('is_active', 'current_plan', 'plan_expires_at'))
+
+    @subscriber('shop.updated')
+    def log_plan_change(event):
+        if event.changed('current_plan'):
+            old_plan_id, new_plan_id = event.changes['current_plan']
+
+    @subscriber('shop.created', delivery='async')      # ارسال ایمیل در thread پس‌زمینه
+    def send_welcome_email(event): ...
+
+    publish('shop.subscriptions_changed', shop_ids=[...], action='PLAN_ASSIGNED')
+
+- تغییرات فیلدها برای هر save یک بار محاسبه می‌شود و همه subscriberها همان changes را
+  می‌گیرند؛ برای مدل‌های TrackedFieldsMixin از مقادیر بارگذاری‌شده و بدون کوئری، برای بقیه
+  با یک کوئری روی فیلدهای ثبت‌شده
+- رویدادهای یک تراکنش برای هر شیء ادغام می‌شوند (چند save = یک رویداد؛ created + updated
+  = created؛ ... + deleted = deleted) و بعد از commit ارسال می‌شوند؛ تراکنش یا savepoint
+  (atomic داخلی) rollback شده رویدادی ندارد. بیرون از تراکنش رویداد همان لحظه ارسال می‌شود
+- خطای یک subscriber بقیه را متوقف نمی‌کند
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+logger = logging.getLogger('instastore')
+
+DEFAULT_DOMAIN_EVENTS = {
+    'ASYNC': True,
+    'WORKERS': 2,
+}
+
+DELIVERY_MODES = ('sync', 'async')
+
+
+def get_events_config():
+    config = dict(DEFAULT_DOMAIN_EVENTS)
+    config.update(getattr(settings, 'DOMAIN_EVENTS', {}))
+    return config
+
+
+class DomainEvent:
+    """
+    name: مثل 'shop.updated'
+    changes: {field: (قدیم، جدید)} - برای کلید خارجی شناسه‌ها (current_plan -> plan id)
+    data: اطلاعات اضافه فرستنده
+    """
+
+    def __init__(self, name, instance=None, changes=None, **data):
+        self.name = name
+        self.instance = instance
+        self.pk = getattr(instance, 'pk', None)
+        self.changes = dict(changes or {})
+        self.data = data
+
+    def __repr__(self):
+        return f"<DomainEvent {self.name} pk={self.pk} changes={sorted(self.changes)}>"
+
+    @property
+    def action(self):
+        return self.name.rsplit('.', 1)[-1]
+
+    @property
+    def key(self):
+        """کلید ادغام: (مدل، pk) - رویدادهای بدون شیء ادغام نمی‌شوند"""
+        if self.instance is None or self.pk is None:
+            return None
+        return (self.instance._meta.label, self.pk)
+
+    def changed(self, *fields):
+        return any(field in self.changes for field in fields)
+
+    def merge(self, later):
+        """ادغام رویداد بعدی همان شیء در همین تراکنش"""
+        for field, (old, new) in later.changes.items():
+            if field in self.changes:
+                old = self.changes[field][0]
+            if old == new:
+                self.changes.pop(field, None)
+            else:
+                self.changes[field] = (old, new)
+        self.instance = later.instance
+        self.data.update(later.data)
+
+
+# ------------------------------------------------------------
+# 1. subscriberها
+# ------------------------------------------------------------
+
+_subscribers = {}
+
+
+def subscribe(name, handler, delivery='sync'):
+    if delivery not in DELIVERY_MODES:
+        raise ValueError(f"delivery باید یکی از {DELIVERY_MODES} باشد")
+    handlers = _subscribers.setdefault(name, [])
+    # import دوباره ماژول (مثلاً autoreload) subscriber تکراری نسازد
+    uid = (handler.__module__, handler.__qualname__)
+    handlers[:] = [item for item in handlers if (item[0].__module__, item[0].__qualname__) != uid]
+    handlers.append((handler, delivery))
+
+
+def subscriber(*names, delivery='sync'):
+    """دکوراتور: @subscriber('shop.created', 'shop.updated', delivery='async')"""
+    def decorator(handler):
+        for name in names:
+            subscribe(name, handler, delivery)
+        return handler
+    return decorator
+
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=get_events_config()['WORKERS'], thread_name_prefix='domain-events'
+            )
+        return _pool
+
+
+def _run(handler, event):
+    try:
+        handler(event)
+    except Exception as e:
+        logger.error(f"Event subscriber {handler.__module__}.{handler.__qualname__} failed for {event.name}: {str(e)}")
+
+
+def _run_in_background(handler, event):
+    from django.db import close_old_connections
+
+    try:
+        _run(handler, event)
+    finally:
+        close_old_connections()
+
+
+def _deliver(events):
+    run_async = get_events_config()['ASYNC']
+    for event in events:
+        for handler, delivery in list(_subscribers.get(event.name, ())):
+            if delivery == 'async' and run_async:
+                _get_pool().submit(_run_in_background, handler, event)
+            else:
+                _run(handler, event)
+
+
+# ------------------------------------------------------------
+# 2. انتشار و ادغام در تراکنش
+# ------------------------------------------------------------
+
+def _coalesce(events):
+    """ادغام رویدادهای هر شیء به ترتیب انتشار"""
+    merged = {}
+    for event in events:
+        key = event.key
+        if key is None:
+            merged[id(event)] = event
+            continue
+
+        current = merged.get(key)
+        if current is None:
+            merged[key] = event
+        elif event.action == 'deleted':
+            # ساخته و حذف در همین تراکنش: هیچ رویدادی
+            if current.action == 'created':
+                del merged[key]
+            else:
+                merged[key] = event
+        elif current.action == 'created' and event.action == 'updated':
+            current.instance = event.instance
+            current.data.update(event.data)
+        elif current.name == event.name:
+            current.merge(event)
+        else:
+            # رویداد دیگری برای همان شیء (مثلاً shop.expired): جدا نگه داشته می‌شود
+            merged[(key, event.name)] = event
+    return list(merged.values())
+
+
+class _PendingEvents:
+    """
+    رویدادهای یک تراکنش
+    هر رویداد on_commit خودش را دارد تا Django با rollback شدن savepoint آن را دور بریزد؛
+    callback ارسال همیشه آخرین و بیرون از savepointها ثبت می‌شود و رویدادهای باقی‌مانده
+    را ادغام و ارسال می‌کند
+    """
+
+    def __init__(self):
+        self.committed = []
+        self.callback = self.dispatch
+
+    def add(self, event, connection):
+        transaction.on_commit(partial(self.committed.append, event))
+        entry = connection.run_on_commit[-1]
+        connection.run_on_commit[:] = [
+            item for item in connection.run_on_commit if item[1] is not self.callback
+        ]
+        # مثل ورودی‌های on_commit: (savepointها، callback، ...) - بدون savepoint تا rollback داخلی حذفش نکند
+        connection.run_on_commit.append((set(), self.callback) + tuple(entry[2:]))
+        logger.debug(f"Domain event queued: {event.name}")
+
+    def dispatch(self):
+        events, self.committed = _coalesce(self.committed), []
+        if _local.__dict__.get('pending') is self:
+            _local.pending = None
+        _deliver(events)
+
+
+_local = threading.local()
+
+
+def _pending_events(connection):
+    pending = getattr(_local, 'pending', None)
+    # اگر callback دیگر در صف on_commit نیست، تراکنش قبلی rollback یا ارسال شده است
+    if pending is None or not any(entry[1] is pending.callback for entry in connection.run_on_commit):
+        pending = _PendingEvents()
+        _local.pending = pending
+    return pending
+
+
+def publish(name, instance=None, changes=None, **data):
+    event = DomainEvent(name, instance=instance, changes=changes, **data)
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _deliver([event])
+        return event
+    _pending_events(connection).add(event, connection)
+    return event
+
+
+# ------------------------------------------------------------
+# 3. رویدادهای مدل‌ها (created / updated / deleted)
+# ------------------------------------------------------------
+
+_tracked = {}
+
+
+def track_model(model, name, fields=()):
+    """
+    ثبت رویدادهای <name>.created / <name>.updated / <name>.deleted برای مدل
+    fields: فیلدهایی که changes آن‌ها محاسبه می‌شود (فراخوانی دوباره فیلدها را اضافه می‌کند)
+    """
+    entry = _tracked.get(model)
+    if entry is None:
+        entry = _tracked[model] = {'name': name, 'fields': set()}
+        pre_save.connect(_snapshot, sender=model, dispatch_uid=f'domain-events-pre-save-{name}')
+        post_save.connect(_saved, sender=model, dispatch_uid=f'domain-events-post-save-{name}')
+        post_delete.connect(_deleted, sender=model, dispatch_uid=f'domain-events-post-delete-{name}')
+    entry['fields'].update(fields)
+
+
+def _attnames(model, fields):
+    return {field: model._meta.get_field(field).attname for field in fields}
+
+
+def _snapshot(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._event_snapshot = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+
+    fields = _tracked[sender]['fields']
+    if update_fields is not None:
+        fields = fields & set(update_fields)
+    if not fields:
+        instance._event_snapshot = {}
+        return
+
+    # مدل‌های TrackedFieldsMixin مقدار قبلی را از زمان بارگذاری دارند (instastore/tracking.py)
+    snapshot = {}
+    loaded_fields = fields & set(getattr(instance, 'tracked_fields', ()))
+    if loaded_fields:
+        snapshot.update(instance.loaded_values(*loaded_fields))
+        fields = fields - loaded_fields
+
+    # یک کوئری برای بقیه فیلدها (برای همه subscriberها)
+    if fields:
+        attnames = _attnames(sender, fields)
+        values = sender._base_manager.filter(pk=instance.pk).values(*attnames.values()).order_by().first()
+        if values:
+            snapshot.update({field: values[attname] for field, attname in attnames.items()})
+    instance._event_snapshot = snapshot
+
+
+def _saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    name = _tracked[sender]['name']
+    snapshot = instance.__dict__.pop('_event_snapshot', None)
+    if created:
+        publish(f"{name}.created", instance)
+        return
+
+    changes = {}
+    for field, old in (snapshot or {}).items():
+        new = getattr(instance, sender._meta.get_field(field).attname)
+        if old != new:
+            changes[field] = (old, new)
+    publish(
+        f"{name}.updated", instance, changes=changes,
+        update_fields=sorted(update_fields) if update_fields else None,
+    )
+
+
+def _deleted(sender, instance, **kwargs):
+    publish(f"{_tracked[sender]['name']}.deleted", instance)
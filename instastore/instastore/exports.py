@@ -0,0 +1,413 @@
+# instastore/exports.py
+"""
+خروجی گرفتن (CSV / XLSX) به صورت stream
+
+سطرها با QuerySet.iterator(chunk_size=...) خوانده و همان لحظه نوشته می‌شوند؛ پس حافظه
+مصرفی به تعداد سفارش‌ها/محصولات بستگی ندارد:
+
+    export_response('orders', queryset, fmt='xlsx')       # StreamingHttpResponse
+    schedule_export('orders', queryset, user, fmt='csv')  # فایل فشرده در پس‌زمینه + ایمیل
+
+XLSX بدون کتابخانه جانبی و با zipfile نوشته می‌شود (یک sheet، رشته‌های inline).
+"""
+
+import csv
+import gzip
+import logging
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+logger = logging.getLogger('instastore')
+
+DEFAULT_EXPORTS = {
+    'CHUNK_SIZE': 2000,
+    'BACKGROUND_THRESHOLD': 50000,
+    'ROOT': os.path.join(settings.BASE_DIR, 'private', 'exports'),
+}
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# حجم تقریبی هر تکه خروجی که به کلاینت فرستاده می‌شود
+FLUSH_BYTES = 64 * 1024
+
+
+def get_exports_config():
+    config = dict(DEFAULT_EXPORTS)
+    config.update(getattr(settings, 'EXPORTS', {}))
+    return config
+
+
+def _date(value):
+    return timezone.localtime(value).strftime('%Y/%m/%d %H:%M') if value else ''
+
+
+# ------------------------------------------------------------
+# 1. نوشتن سطرها
+# ------------------------------------------------------------
+
+class _StreamBuffer:
+    """بافر فقط-نوشتنی؛ محتوای جمع‌شده با drain برداشته می‌شود (برای csv.writer و zipfile)"""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.parts.append(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        self.size = 0
+        return data
+
+
+def csv_chunks(headers, rows):
+    """تکه‌های بایتی CSV (با BOM تا اکسل متن فارسی را درست باز کند)"""
+    buffer = _StreamBuffer()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(headers)
+
+    for row in rows:
+        writer.writerow(row)
+        if buffer.size >= FLUSH_BYTES:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+# کاراکترهای کنترلی در XML مجاز نیستند
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView rightToLeft="1" workbookViewId="0"/></sheetViews>'
+    '<sheetData>'
+)
+_XLSX_SHEET_END = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_XML_INVALID.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def xlsx_chunks(headers, rows, sheet_name='export'):
+    """تکه‌های بایتی فایل XLSX؛ zip روی بافر غیرقابل seek نوشته می‌شود (data descriptor)"""
+    stream = _StreamBuffer()
+
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _XLSX_WORKBOOK.format(name=escape(sheet_name[:31])))
+        archive.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((_XLSX_SHEET_START + _xlsx_row(headers)).encode('utf-8'))
+            for row in rows:
+                sheet.write(_xlsx_row(row).encode('utf-8'))
+                if stream.size >= FLUSH_BYTES:
+                    yield stream.drain()
+            sheet.write(_XLSX_SHEET_END.encode('utf-8'))
+
+    yield stream.drain()
+
+
+WRITERS = {'csv': csv_chunks, 'xlsx': xlsx_chunks}
+
+
+# ------------------------------------------------------------
+# 2. داده‌های قابل خروجی
+# ------------------------------------------------------------
+
+def _iterate(queryset):
+    return queryset.iterator(chunk_size=get_exports_config()['CHUNK_SIZE'])
+
+
+def shop_rows(queryset):
+    for shop in _iterate(queryset.select_related('user', 'current_plan')):
+        yield [
+            shop.shop_name,
+            shop.instagram_username,
+            shop.user.email if shop.user else '',
+            shop.current_plan.name if shop.current_plan else '',
+            shop.plan_started_at.strftime('%Y/%m/%d') if shop.plan_started_at else '',
+            shop.plan_expires_at.strftime('%Y/%m/%d') if shop.plan_expires_at else '',
+            shop.remaining_days,
+            'فعال' if shop.is_active else 'غیرفعال',
+            shop.created_at.strftime('%Y/%m/%d'),
+            shop.phone_number,
+        ]
+
+
+def plan_rows(queryset):
+    for plan in _iterate(queryset):
+        yield [
+            plan.name,
+            plan.code,
+            plan.price,
+            plan.days,
+            plan.max_products,
+            plan.max_orders_per_month,
+            'فعال' if plan.is_active else 'غیرفعال',
+        ]
+
+
+def order_rows(queryset):
+    """یک سطر برای هر آیتم سفارش (اطلاعات سفارش در سطرهای آیتم‌ها تکرار می‌شود)"""
+    # prefetch همراه iterator برای هر تکه chunk_size جداگانه اجرا می‌شود
+    for order in _iterate(queryset.order_by('-created_at').prefetch_related('items')):
+        head = [
+            order.order_number,
+            _date(order.created_at),
+            order.get_status_display_fa(),
+            'بله' if order.is_paid else 'خیر',
+            order.get_payment_method_display_fa(),
+            order.full_name,
+            order.phone_number,
+            order.province,
+            order.city,
+            order.address,
+            order.postal_code,
+            order.shipping_cost,
+            order.total_price,
+            order.tracking_code,
+        ]
+        items = list(order.items.all())
+        if not items:
+            yield head + ['', '', '', '']
+        for item in items:
+            yield head + [item.product_name, item.variant_info, item.quantity, item.price]
+
+
+def customer_rows(queryset):
+    for customer in _iterate(queryset.order_by('-created_at')):
+        yield [
+            customer.full_name,
+            customer.phone_number,
+            customer.default_address,
+            customer.total_orders,
+            customer.total_spent,
+            _date(customer.created_at),
+            _date(customer.last_seen),
+        ]
+
+
+def product_rows(queryset):
+    """یک سطر برای هر واریانت (محصول بدون واریانت یک سطر)"""
+    for product in _iterate(queryset.select_related('category').prefetch_related('variants')):
+        head = [
+            product.id,
+            product.sku,
+            product.name,
+            product.category.name if product.category else '',
+            product.base_price,
+            'فعال' if product.is_active else 'غیرفعال',
+        ]
+        variants = list(product.variants.all())
+        if not variants:
+            yield head + ['', '', '', '']
+        for variant in variants:
+            yield head + [variant.color, variant.size, variant.stock, variant.price_adjustment]
+
+
+# name -> (عنوان ستون‌ها، تابع سطرها)
+DATASETS = {
+    'shops': ([
+        'نام فروشگاه', 'آدرس اینستاگرام', 'ایمیل', 'پلن',
+        'شروع اشتراک', 'انقضای اشتراک', 'روزهای باقی‌مانده',
+        'وضعیت', 'تاریخ ایجاد', 'تلفن'
+    ], shop_rows),
+    'plans': ([
+        'نام', 'کد', 'قیمت', 'روزها', 'حداکثر محصول', 'حداکثر سفارش', 'وضعیت'
+    ], plan_rows),
+    'orders': ([
+        'شماره سفارش', 'تاریخ', 'وضعیت', 'پرداخت شده', 'روش پرداخت',
+        'گیرنده', 'تلفن', 'استان', 'شهر', 'آدرس', 'کد پستی',
+        'هزینه ارسال', 'مبلغ کل', 'کد رهگیری',
+        'محصول', 'تنوع', 'تعداد', 'قیمت واحد'
+    ], order_rows),
+    'customers': ([
+        'نام', 'تلفن', 'آدرس', 'تعداد سفارش', 'مجموع خرید', 'تاریخ عضویت', 'آخرین بازدید'
+    ], customer_rows),
+    'products': ([
+        'شناسه', 'کد کالا', 'نام محصول', 'دسته‌بندی', 'قیمت پایه', 'وضعیت',
+        'رنگ', 'سایز', 'موجودی', 'افزایش قیمت'
+    ], product_rows),
+}
+
+# داده‌هایی که فروشنده می‌تواند از فروشگاه خودش خروجی بگیرد
+SELLER_DATASETS = ('orders', 'customers', 'products')
+
+
+def seller_queryset(dataset, shop):
+    """queryset داده فروشنده (فقط ردیف‌های فروشگاه خودش)"""
+    if dataset == 'orders':
+        from orders.models import Order
+        return Order.objects.filter(shop=shop)
+    if dataset == 'customers':
+        from customers.models import Customer
+        return Customer.objects.filter(shop=shop)
+    if dataset == 'products':
+        from products.models import Product
+        return Product.objects.filter(shop=shop)
+    raise ValueError(f"خروجی ناشناخته: {dataset}")
+
+
+def export_chunks(dataset, queryset, fmt='csv'):
+    headers, rows = DATASETS[dataset]
+    if fmt == 'xlsx':
+        return xlsx_chunks(headers, rows(queryset), sheet_name=dataset)
+    return csv_chunks(headers, rows(queryset))
+
+
+def export_filename(dataset, fmt):
+    return f"{dataset}-{timezone.localtime():%Y%m%d-%H%M}.{fmt}"
+
+
+# ------------------------------------------------------------
+# 3. پاسخ HTTP و کار پس‌زمینه
+# ------------------------------------------------------------
+
+def export_response(dataset, queryset, fmt='csv', filename=None):
+    """StreamingHttpResponse برای دانلود مستقیم"""
+    if fmt not in WRITERS:
+        raise ValueError(f"فرمت ناشناخته: {fmt}")
+
+    response = StreamingHttpResponse(export_chunks(dataset, queryset, fmt), content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename or export_filename(dataset, fmt)}"'
+    return response
+
+
+def should_run_in_background(queryset):
+    return queryset.count() > get_exports_config()['BACKGROUND_THRESHOLD']
+
+
+def export_path(user_id, name):
+    """مسیر فایل خروجی هر کاربر (خارج از media و فقط با ویو دانلود قابل دسترسی)"""
+    return os.path.join(get_exports_config()['ROOT'], str(user_id), os.path.basename(name))
+
+
+def write_export_file(dataset, queryset, user_id, fmt='csv'):
+    """نوشتن خروجی در فایل (CSV فشرده با gzip؛ XLSX خودش فشرده است) - خروجی: نام فایل"""
+    name = export_filename(dataset, fmt) + ('.gz' if fmt == 'csv' else '')
+    path = export_path(user_id, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    temp_path = path + '.part'
+    opener = gzip.open if fmt == 'csv' else open
+    with opener(temp_path, 'wb') as output:
+        for chunk in export_chunks(dataset, queryset, fmt):
+            output.write(chunk)
+    os.replace(temp_path, path)
+    return name
+
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='exports')
+        return _pool
+
+
+def _notify(user, dataset, name):
+    from django.core.mail import send_mail
+    from django.urls import reverse
+
+    domain = settings.INSTASTORE_CONFIG['SITE_DOMAIN']
+    url = f"https://{domain}" + reverse('frontend:seller-export-download', kwargs={'name': name})
+    logger.info(f"Export ready for user {user.pk}: {name}")
+    if user.email:
+        send_mail(
+            subject='فایل خروجی شما آماده است',
+            message=f"خروجی «{dataset}» آماده دانلود است:\n{url}",
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[user.email],
+            fail_silently=True
+        )
+
+
+def _run_export(dataset, queryset, user, fmt):
+    from django.db import close_old_connections
+
+    try:
+        name = write_export_file(dataset, queryset, user.pk, fmt)
+        _notify(user, dataset, name)
+    except Exception as e:
+        logger.error(f"Export {dataset} failed for user {user.pk}: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def schedule_export(dataset, queryset, user, fmt='csv'):
+    """اجرای خروجی بزرگ در پس‌زمینه؛ کاربر بعد از آماده شدن فایل ایمیل می‌گیرد"""
+    _get_pool().submit(_run_export, dataset, queryset, user, fmt)
@@ -0,0 +1,291 @@
+# instastore/images.py
+"""
+پردازش تصاویر آپلودی (محصولات، لوگوی فروشگاه)
+
+برای هر فایل اصلی چند نسخه کوچک‌شده WebP/JPEG در عرض‌های مختلف و یک placeholder
+تار ساخته می‌شود. نام فایل‌ها از هش محتوا ساخته می‌شود (قابل کش دائمی).
+
+- کار سنگین Pillow در ProcessPoolExecutor انجام می‌شود
+- ارسال کار به process pool و ذخیره نتیجه در یک thread پس‌زمینه بعد از commit است
+  تا درخواست آپلود منتظر پردازش نماند
+
+این ماژول در پروسه‌های worker هم import می‌شود؛ پس در سطح ماژول مدلی import نمی‌شود.
+"""
+
+import base64
+import hashlib
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger('instastore')
+
+DEFAULT_PIPELINE = {
+    'ASYNC': True,
+    'WIDTHS': (320, 640, 1024, 1600),
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 80,
+    'PLACEHOLDER_WIDTH': 16,
+    'PROCESSES': 2,
+    'UPLOAD_TO': 'renditions',
+}
+
+FORMAT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def get_pipeline_config():
+    config = dict(DEFAULT_PIPELINE)
+    config.update(getattr(settings, 'IMAGE_PIPELINE', {}))
+    return config
+
+
+# ------------------------------------------------------------
+# 1. کار Pillow (داخل پروسه worker اجرا می‌شود)
+# ------------------------------------------------------------
+
+def _to_rgb(image):
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def render_renditions(data, widths, formats, quality, placeholder_width):
+    """
+    ساخت نسخه‌های کوچک‌شده از بایت‌های تصویر اصلی
+    خروجی فقط داده ساده است (قابل pickle برای برگشت از پروسه worker)
+    """
+    from PIL import Image, ImageFilter, ImageOps
+
+    source_hash = hashlib.sha256(data).hexdigest()
+
+    with Image.open(io.BytesIO(data)) as original:
+        # برای JPEG، دیکد با کیفیت کمتر تا اندازه بزرگ‌ترین خروجی (خیلی سریع‌تر)
+        original.draft('RGB', (max(widths), max(widths)))
+        image = _to_rgb(ImageOps.exif_transpose(original))
+
+    width, height = image.size
+
+    # بزرگ‌نمایی نمی‌کنیم؛ اگر تصویر از همه عرض‌ها کوچک‌تر است خودش تنها نسخه است
+    target_widths = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+
+    files = []
+    for target in target_widths:
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))),
+            Image.LANCZOS,
+            reducing_gap=3.0
+        )
+        for fmt in formats:
+            buffer = io.BytesIO()
+            save_kwargs = {'quality': quality}
+            if fmt == 'jpeg':
+                save_kwargs.update(optimize=True, progressive=True)
+            else:
+                save_kwargs.update(method=4)
+            resized.save(buffer, PIL_FORMATS[fmt], **save_kwargs)
+            files.append((fmt, target, buffer.getvalue()))
+
+    # placeholder تار برای نمایش تا بارگذاری تصویر اصلی
+    tiny = image.resize(
+        (placeholder_width, max(1, round(height * placeholder_width / width))),
+        Image.BILINEAR
+    ).filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    tiny.save(buffer, 'JPEG', quality=40)
+    placeholder = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+    return {
+        'source_hash': source_hash,
+        'width': width,
+        'height': height,
+        'files': files,
+        'placeholder': placeholder,
+    }
+
+
+# ------------------------------------------------------------
+# 2. اجرای pipeline و ذخیره نتیجه
+# ------------------------------------------------------------
+
+_pools_lock = threading.Lock()
+_process_pool = None
+_thread_pool = None
+
+
+def get_process_pool():
+    """process pool مشترک (spawn تا از fork شدن threadهای Django جلوگیری شود)"""
+    global _process_pool
+    with _pools_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=get_pipeline_config()['PROCESSES'],
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _process_pool
+
+
+def _get_thread_pool():
+    global _thread_pool
+    with _pools_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-pipeline')
+        return _thread_pool
+
+
+def _rendition_name(config, content, fmt, width):
+    digest = hashlib.sha256(content).hexdigest()[:20]
+    return f"{config['UPLOAD_TO']}/{digest[:2]}/{digest}-{width}w.{FORMAT_EXTENSIONS[fmt]}"
+
+
+def save_renditions(source_name, result):
+    """ذخیره فایل‌های ساخته‌شده (با نام هش محتوا) و ثبت ImageRendition"""
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from products.models import ImageRendition
+
+    config = get_pipeline_config()
+    variants = {}
+    for fmt, width, content in result['files']:
+        name = _rendition_name(config, content, fmt, width)
+        # محتوای یکسان = نام یکسان؛ فایل تکراری دوباره نوشته نمی‌شود
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        variants.setdefault(fmt, []).append([width, name])
+
+    rendition, _ = ImageRendition.objects.update_or_create(
+        source=source_name,
+        defaults={
+            'source_hash': result['source_hash'],
+            'width': result['width'],
+            'height': result['height'],
+            'placeholder': result['placeholder'],
+            'variants': variants,
+        }
+    )
+    return rendition
+
+
+def process_image(source_name, executor=None, force=False):
+    """
+    ساخت نسخه‌های یک فایل اصلی (نام فایل در storage)
+    executor: اگر داده شود کار Pillow در آن اجرا می‌شود
+    """
+    from django.core.files.storage import default_storage
+    from products.models import ImageRendition
+
+    if not force and ImageRendition.objects.filter(source=source_name).exists():
+        return None
+
+    config = get_pipeline_config()
+    with default_storage.open(source_name, 'rb') as source:
+        data = source.read()
+
+    args = (data, config['WIDTHS'], config['FORMATS'], config['QUALITY'], config['PLACEHOLDER_WIDTH'])
+    if executor is not None:
+        result = executor.submit(render_renditions, *args).result()
+    else:
+        result = render_renditions(*args)
+
+    return save_renditions(source_name, result)
+
+
+def _process_safely(source_name, executor=None):
+    # خطای پردازش تصویر نباید درخواست آپلود یا thread پس‌زمینه را از کار بیندازد
+    try:
+        process_image(source_name, executor=executor)
+    except Exception as e:
+        logger.error(f"Image pipeline failed for {source_name}: {str(e)}")
+
+
+def _process_in_background(source_name):
+    from django.db import close_old_connections
+
+    try:
+        _process_safely(source_name, executor=get_process_pool())
+    finally:
+        close_old_connections()
+
+
+def schedule_renditions(source_name):
+    """ثبت کار پردازش یک فایل بعد از commit تراکنش جاری"""
+    from django.db import transaction
+
+    if not source_name:
+        return
+
+    if not get_pipeline_config()['ASYNC']:
+        transaction.on_commit(lambda: _process_safely(source_name))
+        return
+
+    transaction.on_commit(lambda: _get_thread_pool().submit(_process_in_background, source_name))
+
+
+# ------------------------------------------------------------
+# 3. آدرس‌ها برای قالب‌ها
+# ------------------------------------------------------------
+
+def _responsive_data(field_file, rendition, fallback_format):
+    data = {
+        'src': field_file.url,
+        'thumbnail': field_file.url,
+        'srcset': '',
+        'webp_srcset': '',
+        'placeholder': '',
+        'width': None,
+        'height': None,
+    }
+    if rendition is None:
+        return data
+
+    fallback = rendition.urls(fallback_format)
+    if fallback:
+        # src پیش‌فرض: کوچک‌ترین نسخه با عرض حداقل 600 پیکسل (یا بزرگ‌ترین موجود)
+        data['src'] = next((url for width, url in fallback if width >= 600), fallback[-1][1])
+        data['thumbnail'] = fallback[0][1]
+
+    data.update({
+        'srcset': rendition.srcset(fallback_format),
+        'webp_srcset': rendition.srcset('webp'),
+        'placeholder': rendition.placeholder,
+        'width': rendition.width,
+        'height': rendition.height,
+    })
+    return data
+
+
+def responsive_images(field_files, fallback_format='jpeg'):
+    """
+    داده لازم برای <picture>/srcset چند ImageField با یک کوئری
+    اگر نسخه‌ها هنوز ساخته نشده‌اند فقط آدرس فایل اصلی برگردانده می‌شود
+    """
+    from products.models import ImageRendition
+
+    field_files = list(field_files)
+    renditions = {
+        r.source: r for r in ImageRendition.objects.filter(
+            source__in=[f.name for f in field_files if f]
+        )
+    }
+    return [
+        _responsive_data(f, renditions.get(f.name), fallback_format) if f else None
+        for f in field_files
+    ]
+
+
+def responsive_image(field_file, fallback_format='jpeg'):
+    """داده srcset یک ImageField (None اگر فایلی ندارد)"""
+    if not field_file:
+        return None
+    return responsive_images([field_file], fallback_format)[0]
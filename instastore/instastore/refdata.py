@@ -0,0 +1,267 @@
+# instastore/refdata.py
+"""
+داده‌های مرجع (پلن‌ها و دسته‌بندی‌ها) در حافظه هر پروسه
+
+    get_plan(shop.current_plan_id)           # بدون کوئری و join
+    get_category(product.category_id)
+    get_category_by_slug('shoes'), plans(), signup_plan()
+
+- جدول‌های Plan و Category کوچک و سراسری‌اند؛ همه ردیف‌ها یک بار خوانده می‌شوند و در یک
+  snapshot تغییرناپذیر (tuple و MappingProxyType) نگه داشته می‌شوند. اشیای داخل snapshot
+  بین درخواست‌ها مشترک‌اند و فقط خواندنی هستند
+- نسخه snapshot از خود دیتابیس خوانده می‌شود: (تعداد، بیشترین updated_at) پلن‌ها و
+  دسته‌بندی‌ها. پس تغییر از هر پروسه‌ای (worker دیگر، shell، setup_plans) دیده می‌شود و به
+  کش مشترک نیازی نیست. هر پروسه حداکثر هر CHECK_INTERVAL ثانیه نسخه را با دو کوئری
+  aggregate مقایسه می‌کند؛ پس کهنگی snapshot حداکثر همین مقدار است. update() گروهی باید
+  updated_at را هم بنویسد
+- تغییر در همان پروسه (post_save/post_delete از connect_reference_data) بعد از commit
+  بلافاصله دیده می‌شود؛ thread نویسنده تا پایان تراکنش خودش snapshot را نگه نمی‌دارد
+- بارگذاری در اولین درخواست (request_started؛ connect_reference_data در ShopsConfig.ready)
+  انجام می‌شود؛ شناسه‌ای که در snapshot نیست (ردیف تازه در پروسه دیگر) یک بار نسخه را
+  بدون فاصله بررسی می‌کند و در نهایت با یک کوئری خوانده می‌شود
+"""
+
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger('instastore')
+
+DEFAULT_REFERENCE_DATA = {
+    'CHECK_INTERVAL': 5,
+}
+
+# حداقل روز پلن free برای فروشگاه جدید (signup_plan)
+SIGNUP_FREE_MIN_DAYS = 5
+
+
+def get_reference_data_config():
+    config = dict(DEFAULT_REFERENCE_DATA)
+    config.update(getattr(settings, 'REFERENCE_DATA', {}))
+    return config
+
+
+class ReferenceData(NamedTuple):
+    """snapshot تغییرناپذیر یک نسخه از داده‌های مرجع"""
+    version: tuple
+    plans: tuple
+    plans_by_id: MappingProxyType
+    plans_by_code: MappingProxyType
+    categories: tuple
+    categories_by_id: MappingProxyType
+    categories_by_slug: MappingProxyType
+
+
+EMPTY = ReferenceData(
+    None, (), MappingProxyType({}), MappingProxyType({}), (), MappingProxyType({}), MappingProxyType({})
+)
+
+_snapshot = None
+_checked_at = 0.0
+_lock = threading.Lock()
+# تغییر ثبت‌نشده در تراکنش thread جاری (هر thread اتصال و تراکنش خودش را دارد)
+_local = threading.local()
+
+
+# ------------------------------------------------------------
+# 1. نسخه
+# ------------------------------------------------------------
+
+def current_version():
+    """(تعداد، آخرین updated_at) پلن‌ها و دسته‌بندی‌ها - حذف تعداد را و ایجاد/ویرایش updated_at را تغییر می‌دهد"""
+    from django.db.models import Count, Max
+
+    from products.models import Category
+    from shops.models import Plan
+
+    version = ()
+    for model in (Plan, Category):
+        row = model.objects.order_by().aggregate(count=Count('pk'), changed=Max('updated_at'))
+        version += (row['count'], row['changed'])
+    return version
+
+
+def bump_reference_data():
+    """
+    بعد از تغییر Plan/Category: این پروسه بعد از commit بلافاصله نسخه را بررسی می‌کند
+    (پروسه‌های دیگر در بررسی بعدی). تا پایان تراکنش، thread جاری snapshot را نگه نمی‌دارد
+    تا نه داده قدیمی ببیند و نه بعد از rollback داده‌ای که ثبت نشده است
+    """
+    _local.dirty = True
+
+    def bump():
+        global _checked_at
+        _checked_at = 0.0
+
+    transaction.on_commit(bump)
+
+
+# ------------------------------------------------------------
+# 2. بارگذاری
+# ------------------------------------------------------------
+
+def _build(version):
+    from products.models import Category
+    from shops.models import Plan
+
+    plans = tuple(Plan.objects.all())
+    categories = tuple(Category.objects.all())
+    return ReferenceData(
+        version=version,
+        plans=plans,
+        plans_by_id=MappingProxyType({plan.pk: plan for plan in plans}),
+        plans_by_code=MappingProxyType({plan.code: plan for plan in plans}),
+        categories=categories,
+        categories_by_id=MappingProxyType({category.pk: category for category in categories}),
+        categories_by_slug=MappingProxyType({category.slug: category for category in categories}),
+    )
+
+
+def get_reference_data(force_check=False):
+    """snapshot فعلی؛ نسخه حداکثر هر CHECK_INTERVAL ثانیه (یا با force_check) بررسی می‌شود"""
+    global _snapshot, _checked_at
+
+    if getattr(_local, 'dirty', False):
+        if transaction.get_connection().in_atomic_block:
+            # تغییر ثبت‌نشده در تراکنش جاری: بدون نگه‌داشتن
+            return _build(None)
+        # تراکنش این thread تمام شده (commit یا rollback)
+        _local.dirty = False
+        force_check = True
+        with _lock:
+            _snapshot = None
+
+    snapshot = _snapshot
+    now = time.monotonic()
+    interval = get_reference_data_config()['CHECK_INTERVAL']
+    if snapshot is not None and not force_check and now - _checked_at < interval:
+        return snapshot
+
+    try:
+        version = current_version()
+        if snapshot is None or snapshot.version != version:
+            with _lock:
+                snapshot = _snapshot
+                if snapshot is None or snapshot.version != version:
+                    snapshot = _build(version)
+                    _snapshot = snapshot
+                    logger.debug(
+                        f"Reference data loaded: {len(snapshot.plans)} plans, "
+                        f"{len(snapshot.categories)} categories"
+                    )
+    except DatabaseError as e:
+        # قبل از migrate یا قطع دیتابیس: چیزی نگه داشته نمی‌شود
+        logger.warning(f"Reference data not loaded: {e}")
+        return _snapshot or EMPTY
+    _checked_at = now
+    return snapshot
+
+
+def warm_reference_data(sender=None, **kwargs):
+    """request_started: بارگذاری در اولین درخواست و بررسی نسخه در درخواست‌های بعدی"""
+    get_reference_data()
+
+
+def _changed(sender, raw=False, **kwargs):
+    if not raw:
+        bump_reference_data()
+
+
+def connect_reference_data():
+    """اتصال بارگذاری و باطل کردن به سیگنال‌ها (یک بار در AppConfig.ready)"""
+    from django.core.signals import request_started
+    from django.db.models.signals import post_delete, post_save
+
+    from products.models import Category
+    from shops.models import Plan
+
+    request_started.connect(warm_reference_data, dispatch_uid='refdata-warm')
+    for model in (Plan, Category):
+        name = model._meta.label_lower
+        post_save.connect(_changed, sender=model, dispatch_uid=f'refdata-save-{name}')
+        post_delete.connect(_changed, sender=model, dispatch_uid=f'refdata-delete-{name}')
+
+
+def _lookup(index, key, model_path, field='pk'):
+    if key is None:
+        return None
+    snapshot = get_reference_data()
+    item = getattr(snapshot, index).get(key)
+    if item is None and snapshot.version is not None:
+        item = getattr(get_reference_data(force_check=True), index).get(key)
+    if item is None:
+        # ردیف تازه‌ای که نسخه‌اش هنوز بالا نرفته (مثلاً داخل همان تراکنش)
+        from django.apps import apps
+
+        item = apps.get_model(model_path)._default_manager.filter(**{field: key}).first()
+    return item
+
+
+# ------------------------------------------------------------
+# 3. پلن‌ها
+# ------------------------------------------------------------
+
+def plans(active_only=False):
+    """پلن‌ها به ترتیب Plan.Meta.ordering"""
+    items = get_reference_data().plans
+    if active_only:
+        return tuple(plan for plan in items if plan.is_active)
+    return items
+
+
+def get_plan(plan_id):
+    return _lookup('plans_by_id', plan_id, 'shops.Plan')
+
+
+def get_plan_by_code(code):
+    return _lookup('plans_by_code', code, 'shops.Plan', field='code')
+
+
+def signup_plan():
+    """
+    پلن فروشگاه جدید: پلن free فعال با حداقل 5 روز، پلن پیش‌فرض فعال،
+    یا ارزان‌ترین پلن فعال (همیشه حداقل 1 روز)
+    """
+    from shops.models import Plan
+
+    active = [plan for plan in plans() if plan.is_active and plan.days >= 1]
+    for plan in active:
+        if plan.code == Plan.PLAN_FREE and plan.days >= SIGNUP_FREE_MIN_DAYS:
+            return plan
+    for plan in active:
+        if plan.is_default:
+            return plan
+    return min(active, key=lambda plan: plan.price, default=None)
+
+
+# ------------------------------------------------------------
+# 4. دسته‌بندی‌ها
+# ------------------------------------------------------------
+
+def categories():
+    """دسته‌بندی‌ها به ترتیب نام"""
+    return get_reference_data().categories
+
+
+def get_category(category_id):
+    return _lookup('categories_by_id', category_id, 'products.Category')
+
+
+def get_category_by_slug(slug):
+    return _lookup('categories_by_slug', slug, 'products.Category', field='slug')
+
+
+def categories_for_ids(category_ids):
+    """دسته‌بندی‌های شناسه‌ها به ترتیب نام (ترتیب snapshot)"""
+    category_ids = set(category_ids)
+    found = [category for category in categories() if category.pk in category_ids]
+    if len(found) < len(category_ids):
+        missing = category_ids - {category.pk for category in found}
+        found.extend(filter(None, (get_category(category_id) for category_id in missing)))
+        found.sort(key=lambda category: category.name)
+    return found
@@ -5,6 +5,7 @@ Optimized for Production Environment by DevOps Team.
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 from datetime import timedelta
 
@@ -20,6 +21,9 @@ SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-default-key-change-in
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.environ.get('DEBUG', 'False') == 'True'
 
+# اجرای تست‌ها (manage.py test)
+TESTING = sys.argv[1:2] == ['test']
+
 # دامنه‌های مجاز را از env می‌خواند و تبدیل به لیست می‌کند
 ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '127.0.0.1,localhost').split(',')
 
@@ -102,6 +106,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     
     # Middlewareهای سفارشی
+    'logs.middleware.APILogMiddleware',
     'shops.middleware.ShopMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
     'django_browser_reload.middleware.BrowserReloadMiddleware',
@@ -190,6 +195,16 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# فایل‌های آپلودی با نام هش محتوا ذخیره می‌شوند (instastore/storage.py) - هر فایل تکراری یک بار
+STORAGES = {
+    'default': {
+        'BACKEND': 'instastore.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Authentication settings
@@ -352,6 +367,91 @@ CACHES = {
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 
+# پردازش تصاویر آپلودی (instastore/images.py)
+IMAGE_PIPELINE = {
+    'ASYNC': True,                         # پردازش در پس‌زمینه بعد از commit
+    'WIDTHS': (320, 640, 1024, 1600),      # عرض نسخه‌ها (بزرگ‌نمایی نمی‌شود)
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 80,
+    'PLACEHOLDER_WIDTH': 16,
+    'PROCESSES': int(os.environ.get('IMAGE_PIPELINE_PROCESSES', 2)),
+    'UPLOAD_TO': 'renditions',
+}
+
+# خروجی CSV/XLSX (instastore/exports.py) - فایل‌های پس‌زمینه خارج از media نگه داشته می‌شوند
+EXPORTS = {
+    'CHUNK_SIZE': 2000,                    # تعداد ردیف در هر کوئری iterator
+    'BACKGROUND_THRESHOLD': 50000,         # بیشتر از این تعداد ردیف: ساخت فایل در پس‌زمینه
+    'ROOT': os.path.join(BASE_DIR, 'private', 'exports'),
+}
+
+# ورود گروهی محصولات (products/importer.py)
+CATALOG_IMPORT = {
+    'BATCH_SIZE': 500,                     # تعداد محصول در هر دسته bulk_create/bulk_update
+    'MAX_ROWS': 20000,                     # حداکثر سطر هر فایل
+    'MAX_IMAGE_SIZE': 10 * 1024 * 1024,    # تصاویر بزرگ‌تر در zip نادیده گرفته می‌شوند
+    'ROOT': os.path.join(BASE_DIR, 'private', 'imports'),
+}
+
+# نوشتن بافرشده لاگ‌ها (logs/writer.py)
+# در تست‌ها همزمان: TestCase هیچ‌وقت commit نمی‌کند و on_commit لاگ‌ها اجرا نمی‌شود
+LOG_WRITER = {
+    'ASYNC': os.environ.get('LOG_WRITER_ASYNC', str(not TESTING)) == 'True',  # False: INSERT همزمان مثل قبل
+    'QUEUE_SIZE': 10000,                   # حداکثر لاگ در صف هر پروسه
+    'BATCH_SIZE': 200,                     # تعداد ردیف هر bulk_create
+    'FLUSH_INTERVAL': 1.0,                 # حداکثر تأخیر نوشتن (ثانیه)
+    'POLICY': 'drop',                      # صف پر: drop یا block (حداکثر BLOCK_TIMEOUT ثانیه)
+    'BLOCK_TIMEOUT': 0.5,
+}
+
+# لاگ درخواست‌های API (logs/middleware.py)
+API_LOGGING = {
+    'ENABLED': True,
+    'PATH_PREFIXES': ('/api/',),
+    'SAMPLE_RATE': float(os.environ.get('API_LOG_SAMPLE_RATE', 0.1)),  # سهم درخواست‌های موفق
+    'SLOW_THRESHOLD': 1.0,                 # درخواست کندتر از این (ثانیه) همیشه ثبت می‌شود
+    'MAX_BODY_SIZE': 2048,                 # بدنه بزرگ‌تر فقط با اندازه ثبت می‌شود
+}
+
+# نگهداری لاگ‌ها (logs/retention.py، دستور prune_logs)
+LOG_RETENTION = {
+    'DAYS': {                              # روزهای نگهداری هر نوع
+        'ADMIN_LOG': 90,
+        'SHOP_ACTIVITY': 90,
+        'SYSTEM_LOG': 90,
+        'API_LOG': 90,
+    },
+    'BATCH_SIZE': 5000,                    # تعداد ردیف هر DELETE
+    'PAUSE': 0.1,                          # استراحت بین دسته‌ها (ثانیه)
+    'TIME_BUDGET': 300,                    # سقف زمان هر اجرا؛ ادامه در اجرای بعدی
+    'PARTITION_MONTHS_AHEAD': 2,           # فقط برای جداول partition شده PostgreSQL
+}
+
+# بایگانی لاگ‌ها قبل از حذف (logs/archive.py) - فایل‌ها خارج از media نگه داشته می‌شوند
+LOG_ARCHIVE = {
+    'ENABLED': True,
+    'TYPES': ('SHOP_ACTIVITY', 'API_LOG'),  # نوع‌هایی که قبل از حذف بایگانی می‌شوند
+    'ROOT': os.path.join(BASE_DIR, 'private', 'log-archive'),
+    'COMPRESSION': 'gzip',                 # gzip یا zstd (نیاز به پکیج zstandard)
+}
+
+# گذرگاه رویدادهای دامنه (instastore/events.py)
+DOMAIN_EVENTS = {
+    'ASYNC': True,                         # False: subscriberهای async هم همزمان اجرا می‌شوند
+    'WORKERS': 2,                          # threadهای اجرای subscriberهای async
+}
+
+# پردازش انقضای اشتراک‌ها (shops/expiry.py، دستور process_subscription_expiry)
+SUBSCRIPTION_EXPIRY = {
+    'WARNING_DAYS': (7, 3, 1),             # هشدار در این تعداد روز مانده به انقضا
+    'BATCH_SIZE': 1000,                    # تعداد فروشگاه هر دسته
+}
+
+# داده‌های مرجع پلن و دسته‌بندی در حافظه هر پروسه (instastore/refdata.py)
+REFERENCE_DATA = {
+    'CHECK_INTERVAL': 5,                   # ثانیه؛ حداکثر کهنگی بعد از تغییر در پروسه دیگر (نسخه از دیتابیس)
+}
+
 # تنظیمات امنیتی اضافی برای production
 if not DEBUG:
     # امنیت SSL
@@ -383,6 +483,8 @@ INSTASTORE_CONFIG = {
     'DEFAULT_LANGUAGE': 'fa',
     'MAX_PRODUCTS_PER_SHOP': 100,
     'MAX_IMAGES_PER_PRODUCT': 5,
+    'CATALOG_CACHE_TIMEOUT': 60 * 60 * 24,  # کش ویترین (با تغییر کاتالوگ خودکار باطل می‌شود)
+    'RELEASE_VERSION': os.environ.get('RELEASE_VERSION', ''),  # با هر deploy تغییر کند تا ETag صفحات عوض شود
     'ORDER_STATUSES': {
         'pending': 'در انتظار پرداخت',
         'paid': 'پرداخت شده',
@@ -0,0 +1,182 @@
+# instastore/spreadsheets.py
+"""
+خواندن فایل‌های جدولی (CSV / XLSX) به صورت stream
+
+    for row_number, row in iter_table(uploaded_file, uploaded_file.name):
+        row['نام محصول'] ...
+
+هر سطر یک dict از عنوان ستون (سطر اول فایل) به مقدار متنی است و سطرهای خالی رد
+می‌شوند. XLSX بدون کتابخانه جانبی و با zipfile + iterparse خوانده می‌شود؛ فقط جدول
+رشته‌های مشترک در حافظه می‌ماند و سطرهای sheet بعد از خوانده شدن پاک می‌شوند.
+"""
+
+import csv
+import io
+import os
+import re
+import zipfile
+import zlib
+from decimal import Decimal, InvalidOperation
+from xml.etree.ElementTree import ParseError, iterparse
+
+SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+TABLE_EXTENSIONS = ('.csv', '.xlsx')
+
+_CELL_COLUMN = re.compile(r'^([A-Z]+)')
+
+
+def table_format(filename):
+    """فرمت فایل از روی پسوند (csv یا xlsx) یا None"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    return extension[1:] if extension in TABLE_EXTENSIONS else None
+
+
+# ------------------------------------------------------------
+# 1. CSV
+# ------------------------------------------------------------
+
+def _csv_rows(file):
+    # utf-8-sig: فایل‌های ذخیره‌شده با Excel (و خروجی‌های خود سایت) BOM دارند
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    try:
+        for values in reader:
+            yield reader.line_num, values
+    except UnicodeDecodeError:
+        raise ValueError("فایل CSV باید با کدگذاری UTF-8 ذخیره شده باشد")
+    except csv.Error as e:
+        raise ValueError(f"فایل CSV معتبر نیست: {e}")
+    finally:
+        # فایل آپلودی بعد از خواندن بسته نشود
+        text.detach()
+
+
+# ------------------------------------------------------------
+# 2. XLSX
+# ------------------------------------------------------------
+
+def _column_index(reference):
+    """شماره ستون (از صفر) از روی آدرس سلول مثل C12"""
+    match = _CELL_COLUMN.match(reference or '')
+    if not match:
+        return None
+    index = 0
+    for char in match.group(1):
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index - 1
+
+
+def _text_of(element):
+    return ''.join(node.text or '' for node in element.iter(f'{SPREADSHEET_NS}t'))
+
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as source:
+        for _, element in iterparse(source):
+            if element.tag == f'{SPREADSHEET_NS}si':
+                strings.append(_text_of(element))
+                element.clear()
+    return strings
+
+
+def _first_sheet(archive):
+    names = sorted(
+        name for name in archive.namelist()
+        if name.startswith('xl/worksheets/') and name.endswith('.xml')
+    )
+    if 'xl/worksheets/sheet1.xml' in names:
+        return 'xl/worksheets/sheet1.xml'
+    if not names:
+        raise ValueError("فایل اکسل هیچ sheetی ندارد")
+    return names[0]
+
+
+def _number_text(raw):
+    # اکسل عددهای صحیح را گاهی به صورت 150000.0 یا 1.5E5 ذخیره می‌کند
+    try:
+        number = Decimal(raw)
+    except InvalidOperation:
+        return raw
+    if number == number.to_integral_value():
+        return str(int(number))
+    return raw
+
+
+def _cell_value(cell, strings):
+    cell_type = cell.get('t')
+    if cell_type == 'inlineStr':
+        return _text_of(cell)
+
+    value = cell.find(f'{SPREADSHEET_NS}v')
+    raw = value.text if value is not None and value.text is not None else ''
+    if cell_type == 's':
+        return strings[int(raw)] if raw else ''
+    if cell_type in (None, 'n') and raw:
+        return _number_text(raw)
+    return raw
+
+
+# خطاهای فایل اکسل خراب که iter_table به ValueError تبدیل می‌کند
+XLSX_ERRORS = (ParseError, KeyError, IndexError, zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError)
+
+
+def _xlsx_rows(file):
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise ValueError("فایل اکسل معتبر نیست")
+
+    with archive:
+        strings = _shared_strings(archive)
+        with archive.open(_first_sheet(archive)) as source:
+            row_number = 0
+            for _, element in iterparse(source):
+                if element.tag != f'{SPREADSHEET_NS}row':
+                    continue
+                # آدرس سطر (r) اختیاری است
+                row_number = int(element.get('r') or row_number + 1)
+                values = []
+                for cell in element.iter(f'{SPREADSHEET_NS}c'):
+                    index = _column_index(cell.get('r'))
+                    if index is None:
+                        index = len(values)
+                    values.extend([''] * (index + 1 - len(values)))
+                    values[index] = _cell_value(cell, strings)
+                yield row_number, values
+                element.clear()
+
+
+# ------------------------------------------------------------
+# 3. سطرها به صورت dict
+# ------------------------------------------------------------
+
+def iter_table(file, filename):
+    """
+    سطرهای فایل به صورت (شماره سطر، dict عنوان ستون -> مقدار)
+    ValueError برای فرمت ناشناخته یا فایل خراب
+    """
+    fmt = table_format(filename)
+    if fmt is None:
+        raise ValueError("فقط فایل CSV یا XLSX پذیرفته می‌شود")
+
+    rows = _xlsx_rows(file) if fmt == 'xlsx' else _csv_rows(file)
+    headers = None
+    try:
+        for row_number, values in rows:
+            values = [str(value).strip() for value in values]
+            if not any(values):
+                continue
+            if headers is None:
+                headers = values
+                continue
+            yield row_number, {
+                header: values[index] if index < len(values) else ''
+                for index, header in enumerate(headers) if header
+            }
+    except XLSX_ERRORS:
+        # XML خراب، فایل ناقص داخل zip یا اندیس رشته نامعتبر
+        raise ValueError("فایل اکسل معتبر نیست")
@@ -0,0 +1,125 @@
+# instastore/storage.py
+"""
+ذخیره‌سازی محتوامحور (content-addressed) فایل‌های مدیا
+
+هر فایل آپلودی هنگام نوشتن (به صورت stream) هش می‌شود و با نام
+blobs/<2>/<2>/<sha256>.<ext> ذخیره می‌شود؛ پس یک عکس تکراری فقط یک بار روی دیسک است.
+تعداد ارجاع‌ها به هر blob در MediaBlob نگه داشته می‌شود (ProductImage، لوگو، آیتم سفارش،
+نسخه‌های کوچک‌شده) و blobهای بی‌ارجاع با دستور gc_media_blobs پاک می‌شوند.
+
+فایل‌های قدیمی (products/%Y/%m/...) مثل قبل خوانده و سرو می‌شوند.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.move import file_move_safe
+from django.db.models import F
+from django.db.models.functions import Now
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs/'
+
+
+def blob_name(digest, extension):
+    return f"{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage با نام‌گذاری بر اساس هش محتوا و حذف فایل‌های تکراری"""
+
+    def get_available_name(self, name, max_length=None):
+        # نام نهایی در _save از هش محتوا ساخته می‌شود؛ بررسی تکراری بودن نام لازم نیست
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        digest = hashlib.sha256()
+
+        # نوشتن در فایل موقت و هش کردن همزمان (بدون خواندن دوباره فایل)
+        temp_dir = self.path(BLOB_PREFIX + 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            final_name = blob_name(digest.hexdigest(), extension)
+            final_path = self.path(final_name)
+
+            if os.path.exists(final_path):
+                # blob تکراری: فایل موقت دور ریخته می‌شود؛ mtime به‌روز می‌شود تا GC
+                # آن را در فاصله آپلود تا ثبت ارجاع پاک نکند
+                os.utime(final_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                file_move_safe(temp_path, final_path, allow_overwrite=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(final_path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return final_name
+
+
+# ------------------------------------------------------------
+# شمارش ارجاع‌ها
+# ------------------------------------------------------------
+
+def acquire_blob(name):
+    """ثبت یک ارجاع جدید به blob"""
+    from products.models import MediaBlob
+
+    if not is_blob(name):
+        return
+    updated = MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + 1, updated_at=Now())
+    if not updated:
+        blob, created = MediaBlob.objects.get_or_create(name=name, defaults={'refcount': 1})
+        if not created:
+            MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1, updated_at=Now())
+
+
+def release_blob(name):
+    """حذف یک ارجاع؛ blob با ارجاع صفر توسط GC پاک می‌شود"""
+    from products.models import MediaBlob
+
+    if not is_blob(name):
+        return
+    MediaBlob.objects.filter(name=name, refcount__gt=0).update(refcount=F('refcount') - 1, updated_at=Now())
+
+
+def remember_blob_reference(instance, field_name):
+    """pre_save: نگه داشتن مقدار قبلی فیلد فایل برای مقایسه در post_save"""
+    old_name = None
+    if field_name in getattr(instance, 'tracked_fields', ()):
+        # مقدار زمان بارگذاری (instastore/tracking.py) - بدون خواندن دوباره ردیف
+        old_name = instance.loaded_value(field_name)
+    elif instance.pk:
+        old_name = type(instance).objects.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+    if not hasattr(instance, '_old_blob_names'):
+        instance._old_blob_names = {}
+    instance._old_blob_names[field_name] = old_name or None
+
+
+def sync_blob_reference(instance, field_name):
+    """post_save: به‌روزرسانی شمارش ارجاع اگر فایل عوض شده باشد"""
+    old_name = getattr(instance, '_old_blob_names', {}).get(field_name)
+    new_name = getattr(instance, field_name).name or None
+    if old_name != new_name:
+        if new_name:
+            acquire_blob(new_name)
+        if old_name:
+            release_blob(old_name)
+    instance._old_blob_names[field_name] = new_name
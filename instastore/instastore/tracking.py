@@ -0,0 +1,125 @@
+# instastore/tracking.py
+"""
+ردگیری تغییر فیلدها از روی مقادیری که هنگام بارگذاری از دیتابیس خوانده شده‌اند
+
+    class Shop(TrackedFieldsMixin, models.Model):
+        tracked_fields = ('current_plan', 'is_active', 'plan_expires_at')
+
+    shop = Shop.objects.get(pk=1)
+    shop.current_plan = pro
+    shop.has_changed('current_plan')         # True - بدون کوئری
+    shop.changed_fields()                    # {'current_plan': (1, 3)}
+    shop.loaded_value('current_plan')        # 1 (برای کلید خارجی شناسه)
+
+- مقادیر در from_db ذخیره می‌شوند و بعد از save (فقط update_fields اگر داده شده باشد) و
+  refresh_from_db به‌روز می‌شوند؛ پس تا پایان post_save هنوز مقدار قبل از ذخیره را دارند
+- شیء جدید (_state.adding) مقدار قبلی ندارد و همه فیلدهایش تغییرکرده حساب می‌شوند
+- فیلدی که با only()/defer() بارگذاری نشده یا با F() ذخیره شده، در اولین پرسش با یک کوئری
+  values() خوانده می‌شود
+- MixIn باید قبل از models.Model در لیست کلاس‌های پایه بیاید
+"""
+
+from django.db.models import DEFERRED
+from django.db.models.fields.files import FieldFile
+
+
+class TrackedFieldsMixin:
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._store_loaded_values()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._store_loaded_values(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._store_loaded_values(fields)
+
+    # ------------------------------------------------------------
+    # 1. نگهداری مقادیر بارگذاری‌شده
+    # ------------------------------------------------------------
+
+    @classmethod
+    def _tracked_attnames(cls):
+        """{نام فیلد: نام ستون} - یک بار برای هر کلاس"""
+        attnames = cls.__dict__.get('_tracked_attnames_cache')
+        if attnames is None:
+            attnames = {name: cls._meta.get_field(name).attname for name in cls.tracked_fields}
+            cls._tracked_attnames_cache = attnames
+        return attnames
+
+    def _current_value(self, attname):
+        # خواندن مستقیم از __dict__: فیلدهای defer شده بارگذاری نشوند و FieldFile ساخته نشود
+        value = self.__dict__.get(attname, DEFERRED)
+        if isinstance(value, FieldFile):
+            # در دیتابیس نام فایل ذخیره می‌شود ('' برای خالی)
+            value = value.name or ''
+        return value
+
+    def _store_loaded_values(self, fields=None):
+        loaded = dict(self.__dict__.get('_loaded_values', {}))
+        for name, attname in self._tracked_attnames().items():
+            if fields is not None and name not in fields and attname not in fields:
+                continue
+            value = self._current_value(attname)
+            if value is DEFERRED or hasattr(value, 'resolve_expression'):
+                loaded.pop(name, None)
+            else:
+                loaded[name] = value
+        self._loaded_values = loaded
+
+    def loaded_values(self, *fields):
+        """
+        مقادیر فیلدها در دیتابیس (قبل از تغییرات ذخیره‌نشده)
+        شیء جدید: {}. فیلدهای ناموجود در snapshot با یک کوئری خوانده می‌شوند
+        """
+        if self._state.adding or self.pk is None:
+            return {}
+
+        attnames = self._tracked_attnames()
+        fields = fields or tuple(attnames)
+        loaded = self.__dict__.get('_loaded_values', {})
+        missing = [name for name in fields if name not in loaded]
+        if missing:
+            row = type(self)._base_manager.using(self._state.db).filter(pk=self.pk).values(
+                *[attnames[name] for name in missing]
+            ).order_by().first()
+            if row is not None:
+                loaded = dict(loaded)
+                loaded.update({name: row[attnames[name]] for name in missing})
+                self._loaded_values = loaded
+        return {name: loaded[name] for name in fields if name in loaded}
+
+    # ------------------------------------------------------------
+    # 2. پرسش تغییرات
+    # ------------------------------------------------------------
+
+    def loaded_value(self, field):
+        return self.loaded_values(field).get(field)
+
+    def has_changed(self, *fields):
+        """آیا هر کدام از فیلدها نسبت به دیتابیس تغییر کرده است (شیء جدید: همیشه True)"""
+        return bool(self.changed_fields(*fields))
+
+    def changed_fields(self, *fields):
+        """{فیلد: (مقدار در دیتابیس، مقدار فعلی)}؛ بدون آرگومان: همه tracked_fields"""
+        attnames = self._tracked_attnames()
+        fields = fields or tuple(attnames)
+        loaded = self.loaded_values(*fields)
+
+        changes = {}
+        for name in fields:
+            current = self._current_value(attnames[name])
+            if current is DEFERRED:
+                continue
+            if name not in loaded:
+                # شیء جدید یا ردیفی که دیگر وجود ندارد
+                changes[name] = (None, current)
+            elif hasattr(current, 'resolve_expression') or loaded[name] != current:
+                changes[name] = (loaded[name], current)
+        return changes
@@ -40,6 +40,9 @@ class APILogAdmin(admin.ModelAdmin):
 
 @admin.register(LogCleanupJob)
 class LogCleanupJobAdmin(admin.ModelAdmin):
-    list_display = ('job_type', 'retention_days', 'deleted_count', 'is_success', 'started_at')
-    list_filter = ('job_type', 'is_success', 'started_at')
-    readonly_fields = ('started_at', 'finished_at', 'duration', 'deleted_count', 'error_count')
\ No newline at end of file
+    list_display = ('job_type', 'retention_days', 'deleted_count', 'batches', 'is_complete', 'is_success', 'started_at')
+    list_filter = ('job_type', 'is_complete', 'is_success', 'started_at')
+    readonly_fields = (
+        'started_at', 'finished_at', 'duration', 'deleted_count', 'error_count',
+        'archived_count', 'batches', 'dropped_partitions', 'cutoff', 'last_timestamp', 'is_complete',
+    )
\ No newline at end of file
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LogsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'logs'
+
+    def ready(self):
+        # subscriberهای رویدادهای دامنه (instastore/events.py)
+        import logs.subscribers  # noqa: F401
@@ -0,0 +1,217 @@
+# logs/archive.py
+"""
+بایگانی سرد لاگ‌های قدیمی به فایل‌های فشرده JSONL قبل از حذف از دیتابیس
+
+    archive_rows('SHOP_ACTIVITY', queryset, part='<job id>')
+    for row in iter_archived('SHOP_ACTIVITY', shop_id=12, date_from=..., date_to=...):
+        ...
+
+ساختار پوشه (خارج از media):
+
+    <ROOT>/<type>/<shop_id یا all>/<YYYY-MM>/<part>.jsonl.gz
+    <ROOT>/<type>/manifest.json          # فهرست فایل‌ها: فروشگاه، ماه، تعداد، بازه زمانی
+
+- ردیف‌ها با values().iterator() به ترتیب (فروشگاه، زمان) خوانده می‌شوند؛ پس در هر لحظه
+  فقط یک فایل باز است و کل داده در حافظه نمی‌ماند
+- هر اجرای پاک‌سازی در فایل part خودش append می‌کند (gzip و zstd چند frame پشت سر هم
+  را یک فایل می‌خوانند)؛ فایل قبل از DELETE با fsync روی دیسک نوشته می‌شود
+- اگر بین بایگانی و حذف خطا رخ دهد ممکن است ردیفی دو بار بایگانی شود؛ id هر ردیف
+  ذخیره می‌شود تا در صورت نیاز تکراری‌ها حذف شوند
+- zstd فقط وقتی پکیج zstandard نصب باشد؛ پیش‌فرض gzip
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+from datetime import timezone as dt_timezone
+from itertools import groupby
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger('instastore')
+
+DEFAULT_LOG_ARCHIVE = {
+    'ENABLED': True,
+    'TYPES': ('SHOP_ACTIVITY', 'API_LOG'),
+    'ROOT': os.path.join(settings.BASE_DIR, 'private', 'log-archive'),
+    'COMPRESSION': 'gzip',
+    'CHUNK_SIZE': 2000,
+}
+
+EXTENSIONS = {'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def get_archive_config():
+    config = dict(DEFAULT_LOG_ARCHIVE)
+    config.update(getattr(settings, 'LOG_ARCHIVE', {}))
+    if config['COMPRESSION'] not in EXTENSIONS:
+        raise ImproperlyConfigured("LOG_ARCHIVE['COMPRESSION'] باید gzip یا zstd باشد")
+    return config
+
+
+def is_archived_type(job_type):
+    config = get_archive_config()
+    return config['ENABLED'] and job_type in config['TYPES']
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImproperlyConfigured("برای COMPRESSION='zstd' پکیج zstandard لازم است")
+    return zstandard
+
+
+def _type_root(job_type):
+    return os.path.join(get_archive_config()['ROOT'], job_type.lower())
+
+
+# ------------------------------------------------------------
+# 1. manifest
+# ------------------------------------------------------------
+
+def load_manifest(job_type):
+    """{مسیر نسبی: {'shop_id', 'month', 'rows', 'min_timestamp', 'max_timestamp', 'bytes'}}"""
+    path = os.path.join(_type_root(job_type), MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def _save_manifest(job_type, manifest):
+    root = _type_root(job_type)
+    path = os.path.join(root, MANIFEST_NAME)
+    temp = f"{path}.tmp"
+    with open(temp, 'w', encoding='utf-8') as target:
+        json.dump(manifest, target, ensure_ascii=False, indent=1, sort_keys=True)
+        target.flush()
+        os.fsync(target.fileno())
+    os.replace(temp, path)
+
+
+# ------------------------------------------------------------
+# 2. نوشتن
+# ------------------------------------------------------------
+
+def _archive_fields(model):
+    # ستون‌های واقعی جدول (کلید خارجی‌ها به صورت *_id)
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _group_key(row, has_shop):
+    timestamp = row['timestamp'].astimezone(dt_timezone.utc)
+    shop = str(row['shop_id']) if has_shop else 'all'
+    return shop, f"{timestamp.year:04d}-{timestamp.month:02d}"
+
+
+def _write_group(path, compression, rows):
+    """نوشتن (append) ردیف‌های یک فروشگاه/ماه؛ خروجی: (تعداد، کمترین و بیشترین زمان)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    count, first, last = 0, None, None
+
+    with open(path, 'ab') as raw:
+        if compression == 'zstd':
+            stream = _zstandard().ZstdCompressor().stream_writer(raw, closefd=False)
+        else:
+            stream = gzip.GzipFile(fileobj=raw, mode='ab')
+        with stream:
+            for row in rows:
+                stream.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8'))
+                stream.write(b'\n')
+                count += 1
+                first = first or row['timestamp']
+                last = row['timestamp']
+        raw.flush()
+        os.fsync(raw.fileno())
+
+    return count, first, last
+
+
+def archive_rows(job_type, queryset, part):
+    """
+    نوشتن ردیف‌های queryset در فایل‌های فروشگاه/ماه (نام فایل: part) و به‌روزرسانی manifest
+    خروجی: تعداد ردیف‌های بایگانی‌شده. حذف ردیف‌ها با فراخوان است
+    """
+    config = get_archive_config()
+    model = queryset.model
+    fields = _archive_fields(model)
+    has_shop = 'shop_id' in fields
+    ordering = ('shop_id', 'timestamp') if has_shop else ('timestamp',)
+
+    rows = queryset.order_by(*ordering).values(*fields).iterator(chunk_size=config['CHUNK_SIZE'])
+
+    root = _type_root(job_type)
+    manifest = load_manifest(job_type)
+    extension = EXTENSIONS[config['COMPRESSION']]
+    total = 0
+
+    for (shop, month), group in groupby(rows, key=lambda row: _group_key(row, has_shop)):
+        relative = os.path.join(shop, month, f"{part}{extension}")
+        count, first, last = _write_group(os.path.join(root, relative), config['COMPRESSION'], group)
+        total += count
+
+        entry = manifest.setdefault(relative, {
+            'shop_id': int(shop) if has_shop else None,
+            'month': month,
+            'compression': config['COMPRESSION'],
+            'rows': 0,
+            'min_timestamp': first.isoformat(),
+            'max_timestamp': last.isoformat(),
+        })
+        entry['rows'] += count
+        entry['min_timestamp'] = min(entry['min_timestamp'], first.isoformat(), key=parse_datetime)
+        entry['max_timestamp'] = max(entry['max_timestamp'], last.isoformat(), key=parse_datetime)
+        entry['bytes'] = os.path.getsize(os.path.join(root, relative))
+
+    if total:
+        _save_manifest(job_type, manifest)
+    return total
+
+
+# ------------------------------------------------------------
+# 3. جستجو در بایگانی
+# ------------------------------------------------------------
+
+def _open_lines(path, compression):
+    if compression == 'zstd':
+        reader = _zstandard().ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return gzip.open(path, 'rt', encoding='utf-8')
+
+
+def iter_archived(job_type, shop_id=None, date_from=None, date_to=None):
+    """
+    ردیف‌های بایگانی‌شده (dict) یک فروشگاه در بازه [date_from, date_to)
+    فایل‌ها از روی manifest انتخاب و خط به خط خوانده می‌شوند (نه یک‌جا در حافظه)
+    """
+    root = _type_root(job_type)
+    entries = sorted(
+        load_manifest(job_type).items(),
+        key=lambda item: (item[1]['month'], item[1]['min_timestamp'])
+    )
+
+    for relative, entry in entries:
+        if shop_id is not None and entry['shop_id'] != shop_id:
+            continue
+        if date_from and parse_datetime(entry['max_timestamp']) < date_from:
+            continue
+        if date_to and parse_datetime(entry['min_timestamp']) >= date_to:
+            continue
+
+        with _open_lines(os.path.join(root, relative), entry.get('compression', 'gzip')) as lines:
+            for line in lines:
+                row = json.loads(line)
+                timestamp = parse_datetime(row['timestamp'])
+                if date_from and timestamp < date_from:
+                    continue
+                if date_to and timestamp >= date_to:
+                    continue
+                yield row
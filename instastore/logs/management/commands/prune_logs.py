@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from logs.models import LogCleanupJob
+from logs.retention import log_model, partition_table_sql, run_retention
+
+JOB_TYPES = [choice for choice, _ in LogCleanupJob.JOB_TYPES]
+
+
+class Command(BaseCommand):
+    help = 'حذف دسته‌ای لاگ‌های قدیمی با سقف زمانی (کار نیمه‌تمام در اجرای بعدی ادامه پیدا می‌کند)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', dest='job_types', action='append', choices=JOB_TYPES,
+                            help='نوع لاگ (قابل تکرار؛ پیش‌فرض همه)')
+        parser.add_argument('--time-budget', type=float, help='حداکثر زمان اجرا (ثانیه)')
+        parser.add_argument('--batch-size', type=int, help='تعداد ردیف هر DELETE')
+        parser.add_argument('--pause', type=float, help='استراحت بین دسته‌ها (ثانیه)')
+        parser.add_argument('--partition-sql', choices=JOB_TYPES,
+                            help='فقط چاپ دستورات تبدیل جدول به partition ماهانه (PostgreSQL)')
+
+    def handle(self, *args, **options):
+        if options['partition_sql']:
+            for statement in partition_table_sql(log_model(options['partition_sql'])):
+                self.stdout.write(statement)
+            return
+
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('batch-size باید مثبت باشد.')
+
+        results = run_retention(
+            options['job_types'],
+            time_budget=options['time_budget'],
+            pause=options['pause'],
+            batch_size=options['batch_size'],
+        )
+        for result in results:
+            status = 'تمام شد' if result['complete'] else 'نیمه‌تمام'
+            if not result['success']:
+                status = 'خطا'
+            line = (
+                f"{result['type']}: {result['deleted']} ردیف حذف شد ({result['archived']} بایگانی)، "
+                f"{result['dropped_partitions']} partition - {status} ({result['duration']} ثانیه)"
+            )
+            self.stdout.write(self.style.SUCCESS(line) if result['success'] else self.style.ERROR(line))
@@ -0,0 +1,48 @@
+import json
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from logs.archive import get_archive_config, iter_archived
+from shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = 'جستجوی لاگ‌های بایگانی‌شده یک فروشگاه در بازه تاریخ (خروجی JSONL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('type', choices=get_archive_config()['TYPES'], help='نوع لاگ')
+        parser.add_argument('--shop', help='slug فروشگاه')
+        parser.add_argument('--from', dest='date_from', help='از تاریخ (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='تا تاریخ، خود روز هم شامل می‌شود (YYYY-MM-DD)')
+        parser.add_argument('--limit', type=int, default=1000, help='حداکثر تعداد ردیف')
+
+    def handle(self, *args, **options):
+        shop_id = None
+        if options['shop']:
+            shop_id = Shop.objects.filter(slug=options['shop']).values_list('id', flat=True).first()
+            if shop_id is None:
+                raise CommandError(f"فروشگاه '{options['shop']}' یافت نشد.")
+
+        date_from = self.parse(options['date_from'])
+        date_to = self.parse(options['date_to'], next_day=True)
+
+        count = 0
+        for row in iter_archived(options['type'], shop_id=shop_id, date_from=date_from, date_to=date_to):
+            self.stdout.write(json.dumps(row, ensure_ascii=False))
+            count += 1
+            if count >= options['limit']:
+                break
+        self.stderr.write(f"{count} ردیف")
+
+    @staticmethod
+    def parse(value, next_day=False):
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"تاریخ نامعتبر: {value}")
+        moment = timezone.make_aware(datetime.combine(day, time.min))
+        return moment + timezone.timedelta(days=1) if next_day else moment
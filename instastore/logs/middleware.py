@@ -0,0 +1,133 @@
+# logs/middleware.py
+"""
+لاگ درخواست‌های API (APILog) با نمونه‌برداری
+
+- خطاها (کد وضعیت 400 به بالا یا exception) و درخواست‌های کند همیشه ثبت می‌شوند
+- از درخواست‌های موفق فقط SAMPLE_RATE ثبت می‌شود
+- بدنه درخواست فقط تا MAX_BODY_SIZE بایت و بدون فایل‌های multipart نگه داشته می‌شود؛
+  مقدار کلیدهای حساس (password، token، ...) پوشانده می‌شود
+- زمان با perf_counter اندازه‌گیری می‌شود و ردیف با logs/writer.py در پس‌زمینه نوشته می‌شود
+
+برای درخواست‌هایی که ثبت نمی‌شوند کار اضافه فقط دو perf_counter و یک random است؛
+ساخت شیء لاگ و خواندن هدرها فقط برای درخواست‌های انتخاب‌شده انجام می‌شود.
+"""
+
+import logging
+import random
+import re
+import traceback
+from time import perf_counter
+
+from django.conf import settings
+
+logger = logging.getLogger('instastore')
+
+DEFAULT_API_LOGGING = {
+    'ENABLED': True,
+    'PATH_PREFIXES': ('/api/',),
+    'EXCLUDE_PREFIXES': (),
+    'SAMPLE_RATE': 0.1,
+    'SLOW_THRESHOLD': 1.0,
+    'MAX_BODY_SIZE': 2048,
+}
+
+BODY_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+# "password": "..." در JSON و password=... در فرم
+_SENSITIVE_VALUE = re.compile(
+    r'(?i)("?[\w-]*(?:password|passwd|token|secret|card|cvv2?)[\w-]*"?\s*[:=]\s*)("(?:[^"\\]|\\.)*"|[^&,}\s]*)'
+)
+
+
+def get_api_logging_config():
+    config = dict(DEFAULT_API_LOGGING)
+    config.update(getattr(settings, 'API_LOGGING', {}))
+    return config
+
+
+def redact_body(raw):
+    text = raw.decode('utf-8', errors='replace') if isinstance(raw, bytes) else raw
+    return _SENSITIVE_VALUE.sub(r'\1"***"', text)
+
+
+class APILogMiddleware:
+    """
+    ثبت نمونه‌برداری‌شده درخواست‌های API
+    (تنظیمات یک بار هنگام ساخت middleware خوانده می‌شود)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = get_api_logging_config()
+        self.enabled = config['ENABLED']
+        self.prefixes = tuple(config['PATH_PREFIXES'])
+        self.excluded = tuple(config['EXCLUDE_PREFIXES'])
+        self.sample_rate = config['SAMPLE_RATE']
+        self.slow_threshold = config['SLOW_THRESHOLD']
+        self.max_body_size = config['MAX_BODY_SIZE']
+
+    def __call__(self, request):
+        path = request.path_info
+        if not self.enabled or not path.startswith(self.prefixes) or (self.excluded and path.startswith(self.excluded)):
+            return self.get_response(request)
+
+        body = self._capture_body(request)
+
+        started = perf_counter()
+        response = self.get_response(request)
+        elapsed = perf_counter() - started
+
+        if response.status_code >= 400 or elapsed >= self.slow_threshold:
+            sample_rate = 1.0
+        elif random.random() < self.sample_rate:
+            sample_rate = self.sample_rate
+        else:
+            return response
+
+        self._log(request, response, elapsed, body, sample_rate)
+        return response
+
+    def process_exception(self, request, exception):
+        # فقط نگه داشتن متن خطا؛ پاسخ 500 را handler جنگو می‌سازد و در __call__ ثبت می‌شود
+        if request.path_info.startswith(self.prefixes):
+            request._api_log_traceback = ''.join(traceback.format_exception(exception))
+        return None
+
+    def _capture_body(self, request):
+        """بدنه کوچک (bytes) یا توضیح کوتاه برای بدنه‌های بزرگ/multipart"""
+        if request.method not in BODY_METHODS:
+            return b''
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return b''
+        if not length:
+            return b''
+
+        content_type = request.META.get('CONTENT_TYPE', '').split(';')[0]
+        if content_type.startswith('multipart/') or length > self.max_body_size:
+            return f"<{length} bytes {content_type}>".encode()
+
+        # request.body کش می‌شود و parserهای Django/DRF همان را دوباره می‌خوانند
+        try:
+            return request.body
+        except Exception:
+            return b''
+
+    def _log(self, request, response, elapsed, body, sample_rate):
+        from .models import APILog
+
+        user = getattr(request, 'user', None)
+        try:
+            APILog.log_request(
+                request,
+                response,
+                round(elapsed, 6),
+                user=user if user is not None and user.is_authenticated else None,
+                body=redact_body(body) if body else '',
+                error_traceback=getattr(request, '_api_log_traceback', ''),
+                sample_rate=sample_rate,
+            )
+        except Exception as e:
+            # لاگ نباید پاسخ را خراب کند
+            logger.error(f"API logging failed for {request.path}: {str(e)}")
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-19 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apilog',
+            name='request_body',
+            field=models.TextField(blank=True, verbose_name='بدنه درخواست'),
+        ),
+        migrations.AddField(
+            model_name='apilog',
+            name='sample_rate',
+            field=models.FloatField(default=1.0, verbose_name='نرخ نمونه\u200cبرداری'),
+        ),
+    ]
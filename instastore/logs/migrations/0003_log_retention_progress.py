@@ -0,0 +1,52 @@
+# Generated by Django 5.1.4 on 2026-10-19 01:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_jobs_complete(apps, schema_editor):
+    # کارهای قبلی یک‌جا اجرا شده‌اند و نباید به عنوان کار نیمه‌تمام ادامه داده شوند
+    LogCleanupJob = apps.get_model('logs', 'LogCleanupJob')
+    LogCleanupJob.objects.update(is_complete=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0002_apilog_request_body_sample_rate'),
+        ('shops', '0002_alter_plan_options_alter_shop_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logcleanupjob',
+            name='batches',
+            field=models.IntegerField(default=0, verbose_name='تعداد دسته\u200cها'),
+        ),
+        migrations.AddField(
+            model_name='logcleanupjob',
+            name='cutoff',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='حذف قبل از'),
+        ),
+        migrations.AddField(
+            model_name='logcleanupjob',
+            name='dropped_partitions',
+            field=models.IntegerField(default=0, verbose_name='partitionهای حذف شده'),
+        ),
+        migrations.AddField(
+            model_name='logcleanupjob',
+            name='is_complete',
+            field=models.BooleanField(default=False, verbose_name='تمام شده'),
+        ),
+        migrations.AddField(
+            model_name='logcleanupjob',
+            name='last_timestamp',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='آخرین زمان حذف شده'),
+        ),
+        migrations.AddIndex(
+            model_name='shopactivitylog',
+            index=models.Index(fields=['timestamp'], name='logs_shopac_timesta_ae5f84_idx'),
+        ),
+        migrations.RunPython(mark_existing_jobs_complete, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0003_log_retention_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logcleanupjob',
+            name='archived_count',
+            field=models.IntegerField(default=0, verbose_name='تعداد بایگانی شده'),
+        ),
+    ]
@@ -107,7 +107,7 @@ class AdminLog(models.Model):
         log_data = {
             'admin': admin,
             'action': action,
-            'model': model,
+            'model': model or '',
             'object_id': str(object_id) if object_id else '',
             'old_data': old_data or {},
             'new_data': new_data or {},
@@ -123,7 +123,8 @@ class AdminLog(models.Model):
                 'method': request.method,
             })
         
-        return cls.objects.create(**log_data)
+        from .writer import submit
+        return submit(cls(**log_data))
     
     @staticmethod
     def get_client_ip(request):
@@ -191,6 +192,7 @@ class ShopActivityLog(models.Model):
             models.Index(fields=['category', '-timestamp']),
             models.Index(fields=['user', '-timestamp']),
             models.Index(fields=['action', '-timestamp']),
+            models.Index(fields=['timestamp']),
         ]
     
     def __str__(self):
@@ -215,10 +217,11 @@ class ShopActivityLog(models.Model):
             log_data.update({
                 'ip_address': AdminLog.get_client_ip(request),
                 'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
-                'session_key': request.session.session_key if hasattr(request, 'session') else '',
+                'session_key': (request.session.session_key or '') if hasattr(request, 'session') else '',
             })
         
-        return cls.objects.create(**log_data)
+        from .writer import submit
+        return submit(cls(**log_data))
 
 
 class SystemLog(models.Model):
@@ -341,7 +344,8 @@ class SystemLog(models.Model):
         except:
             pass
         
-        return cls.objects.create(**log_data)
+        from .writer import submit
+        return submit(cls(**log_data))
 
 
 class APILog(models.Model):
@@ -384,6 +388,10 @@ class APILog(models.Model):
     # اطلاعات خطا
     error_message = models.TextField(blank=True, verbose_name='پیام خطا')
     error_traceback = models.TextField(blank=True, verbose_name='تریس‌بک خطا')
+    request_body = models.TextField(blank=True, verbose_name='بدنه درخواست')
+    
+    # نرخ نمونه‌برداری هنگام ثبت (برای تخمین تعداد واقعی: 1 / sample_rate)
+    sample_rate = models.FloatField(default=1.0, verbose_name='نرخ نمونه‌برداری')
     
     # اطلاعات کلاینت
     ip_address = models.GenericIPAddressField(verbose_name='آی‌پی')
@@ -417,55 +425,62 @@ class APILog(models.Model):
         """آیا درخواست خطا داشته؟"""
         return self.status_code >= 400
     
+    # فقط این هدرها ذخیره می‌شوند (Authorization و Cookie هرگز)
+    LOGGED_HEADERS = (
+        'Content-Type', 'Content-Length', 'Accept', 'Accept-Language',
+        'Origin', 'X-Requested-With', 'HX-Request',
+    )
+
     @classmethod
-    def log_request(cls, request, response, response_time, user=None):
+    def log_request(cls, request, response, response_time, user=None,
+                    body='', error_traceback='', sample_rate=1.0):
         """
-        ثبت لاگ درخواست API
+        ثبت لاگ درخواست API (از طریق نویسنده بافرشده logs/writer.py؛ شیء لاگ در thread
+        نویسنده ساخته می‌شود)
+        body: بدنه‌ای که فراخوان قبل از view برداشته و کوتاه کرده است؛ request.body
+        این‌جا دوباره خوانده نمی‌شود
         """
-        import json
-        
         try:
-            # استخراج داده‌های درخواست
-            request_data = {}
-            if request.method in ['POST', 'PUT', 'PATCH']:
-                try:
-                    request_data = json.loads(request.body.decode('utf-8'))
-                except:
-                    request_data = {'raw_body': str(request.body)[:1000]}
-            
-            # استخراج هدرها
-            headers = {}
-            for key, value in request.headers.items():
-                if key.lower() not in ['authorization', 'cookie', 'set-cookie']:
-                    headers[key] = value
-            
-            # ایجاد لاگ
-            log = cls.objects.create(
+            headers = {
+                name: request.headers[name]
+                for name in cls.LOGGED_HEADERS if name in request.headers
+            }
+
+            # پاسخ stream شده نباید برای اندازه‌گیری مصرف شود
+            if response.streaming:
+                response_size = int(response.get('Content-Length') or 0)
+            else:
+                response_size = len(response.content)
+
+            # پاسخ DRF داده خطا را قبل از render دارد؛ JSON دوباره parse نمی‌شود
+            error_message = ''
+            data = getattr(response, 'data', None)
+            if response.status_code >= 400 and data is not None:
+                if isinstance(data, dict):
+                    data = data.get('error') or data.get('detail') or data
+                error_message = str(data)[:1000]
+
+            log_data = dict(
                 method=request.method,
-                path=request.path,
+                path=request.path[:500],
                 query_params=dict(request.GET),
                 headers=headers,
-                user=user,
+                request_body=body,
+                user_id=user.pk if user is not None else None,
                 status_code=response.status_code,
                 response_time=response_time,
-                response_size=len(response.content) if hasattr(response, 'content') else 0,
-                ip_address=AdminLog.get_client_ip(request),
+                response_size=response_size,
+                error_message=error_message,
+                error_traceback=error_traceback[:5000],
+                ip_address=AdminLog.get_client_ip(request) or '0.0.0.0',
                 user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
-                referer=request.META.get('HTTP_REFERER', '')[:500],
+                referer=request.META.get('HTTP_REFERER', '')[:200],
+                sample_rate=sample_rate,
             )
-            
-            # اگر خطا وجود دارد
-            if response.status_code >= 400:
-                try:
-                    response_data = json.loads(response.content.decode('utf-8'))
-                    if 'error' in response_data:
-                        log.error_message = str(response_data.get('error'))[:1000]
-                        log.save()
-                except:
-                    pass
-            
-            return log
-            
+
+            from .writer import submit_row
+            return submit_row(cls, log_data)
+
         except Exception as e:
             SystemLog.error(f"Failed to log API request: {str(e)}", component='API')
             return None
@@ -493,6 +508,14 @@ class LogCleanupJob(models.Model):
     # نتایج
     deleted_count = models.IntegerField(default=0, verbose_name='تعداد حذف شده')
     error_count = models.IntegerField(default=0, verbose_name='تعداد خطا')
+    archived_count = models.IntegerField(default=0, verbose_name='تعداد بایگانی شده')
+    batches = models.IntegerField(default=0, verbose_name='تعداد دسته‌ها')
+    dropped_partitions = models.IntegerField(default=0, verbose_name='partitionهای حذف شده')
+    
+    # پیشرفت (کار نیمه‌تمام با همان cutoff از last_timestamp ادامه پیدا می‌کند)
+    cutoff = models.DateTimeField(null=True, blank=True, verbose_name='حذف قبل از')
+    last_timestamp = models.DateTimeField(null=True, blank=True, verbose_name='آخرین زمان حذف شده')
+    is_complete = models.BooleanField(default=False, verbose_name='تمام شده')
     
     # زمان
     started_at = models.DateTimeField(auto_now_add=True, verbose_name='زمان شروع')
@@ -512,82 +535,13 @@ class LogCleanupJob(models.Model):
         status = "✅ موفق" if self.is_success else "❌ ناموفق"
         return f"{self.get_job_type_display()} - {status} - {self.started_at.strftime('%Y-%m-%d')}"
     
-    def run_cleanup(self):
-        """اجرای پاک‌سازی"""
-        import time
-        from django.utils import timezone
-        from django.db import connection
-        
-        start_time = time.time()
-        
-        try:
-            cutoff_date = timezone.now() - timezone.timedelta(days=self.retention_days)
-            
-            if self.job_type == 'ADMIN_LOG':
-                from .models import AdminLog
-                deleted, _ = AdminLog.objects.filter(
-                    timestamp__lt=cutoff_date
-                ).delete()
-                
-            elif self.job_type == 'SHOP_ACTIVITY':
-                from .models import ShopActivityLog
-                deleted, _ = ShopActivityLog.objects.filter(
-                    timestamp__lt=cutoff_date
-                ).delete()
-                
-            elif self.job_type == 'SYSTEM_LOG':
-                from .models import SystemLog
-                deleted, _ = SystemLog.objects.filter(
-                    timestamp__lt=cutoff_date
-                ).delete()
-                
-            elif self.job_type == 'API_LOG':
-                from .models import APILog
-                deleted, _ = APILog.objects.filter(
-                    timestamp__lt=cutoff_date
-                ).delete()
-            
-            else:
-                deleted = 0
-            
-            # بهینه‌سازی جدول
-            try:
-                with connection.cursor() as cursor:
-                    cursor.execute(f"VACUUM logs_{self.job_type.lower()}")
-            except:
-                pass
-            
-            self.deleted_count = deleted
-            self.is_success = True
-            
-        except Exception as e:
-            self.error_count += 1
-            self.error_message = str(e)[:1000]
-            self.is_success = False
-        
-        finally:
-            end_time = time.time()
-            self.finished_at = timezone.now()
-            self.duration = round(end_time - start_time, 2)
-            self.save()
+    def run_cleanup(self, time_budget=None, pause=None):
+        """اجرای (یا ادامه) پاک‌سازی به صورت دسته‌ای - logs/retention.py"""
+        from .retention import run_job
+        return run_job(self, time_budget=time_budget, pause=pause)
     
     @classmethod
-    def run_all_cleanups(cls):
-        """اجرای همه پاک‌سازی‌ها"""
-        results = []
-        
-        for job_type, _ in cls.JOB_TYPES:
-            job = cls.objects.create(
-                job_type=job_type,
-                retention_days=90,
-                batch_size=1000
-            )
-            job.run_cleanup()
-            results.append({
-                'type': job_type,
-                'success': job.is_success,
-                'deleted': job.deleted_count,
-                'duration': job.duration
-            })
-        
-        return results
\ No newline at end of file
+    def run_all_cleanups(cls, time_budget=None):
+        """اجرای همه پاک‌سازی‌ها (کارهای نیمه‌تمام قبلی ادامه داده می‌شوند)"""
+        from .retention import run_retention
+        return run_retention(time_budget=time_budget)
@@ -0,0 +1,311 @@
+# logs/retention.py
+"""
+پاک‌سازی لاگ‌های قدیمی (نگهداری محدود) به صورت دسته‌ای و با سقف زمانی
+
+    run_retention()                              # همه نوع‌ها، با تنظیمات LOG_RETENTION
+    run_retention(['API_LOG'], time_budget=60)
+
+- حذف در دسته‌های batch_size بر اساس timestamp (کلیدها UUID هستند و بازه PK معنی ندارد)؛
+  هر دسته یک تراکنش کوتاه و یک DELETE است و بین دسته‌ها PAUSE ثانیه استراحت
+- با تمام شدن TIME_BUDGET کار متوقف و در LogCleanupJob ثبت می‌شود؛ اجرای بعدی همان
+  کار نیمه‌تمام را با همان cutoff و از آخرین timestamp حذف‌شده ادامه می‌دهد
+- روی PostgreSQL اگر جدول لاگ به صورت ماهانه partition شده باشد (partitionهای
+  <table>_pYYYYMM)، partitionهای کاملاً منقضی با DROP حذف می‌شوند و فقط ماه مرزی
+  دسته‌ای پاک می‌شود. partition_table_sql دستورات تبدیل یک‌باره جدول را می‌سازد و
+  ensure_partitions ماه‌های آینده را از قبل می‌سازد
+- برای نوع‌های LOG_ARCHIVE['TYPES'] ردیف‌ها قبل از حذف در logs/archive.py بایگانی می‌شوند
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .archive import archive_rows, is_archived_type
+
+logger = logging.getLogger('instastore')
+
+DEFAULT_LOG_RETENTION = {
+    'DAYS': {
+        'ADMIN_LOG': 90,
+        'SHOP_ACTIVITY': 90,
+        'SYSTEM_LOG': 90,
+        'API_LOG': 90,
+    },
+    'BATCH_SIZE': 5000,
+    'PAUSE': 0.1,
+    'TIME_BUDGET': 300,
+    'PARTITION_MONTHS_AHEAD': 2,
+}
+
+
+def get_retention_config():
+    config = dict(DEFAULT_LOG_RETENTION)
+    custom = getattr(settings, 'LOG_RETENTION', {})
+    config.update(custom)
+    config['DAYS'] = {**DEFAULT_LOG_RETENTION['DAYS'], **custom.get('DAYS', {})}
+    return config
+
+
+def log_model(job_type):
+    from .models import AdminLog, APILog, ShopActivityLog, SystemLog
+
+    return {
+        'ADMIN_LOG': AdminLog,
+        'SHOP_ACTIVITY': ShopActivityLog,
+        'SYSTEM_LOG': SystemLog,
+        'API_LOG': APILog,
+    }[job_type]
+
+
+# ------------------------------------------------------------
+# 1. partitionهای ماهانه (فقط PostgreSQL)
+# ------------------------------------------------------------
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _next_month(value):
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def is_partitioned(model):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [model._meta.db_table]
+        )
+        return cursor.fetchone() is not None
+
+
+def _monthly_partitions(model):
+    """[(نام partition، شروع ماه)] از روی نام‌گذاری <table>_pYYYYMM"""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    prefix = f"{table}_p"
+    for name in names:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            partitions.append((name, datetime(int(suffix[:4]), int(suffix[4:]), 1, tzinfo=dt_timezone.utc)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def ensure_partitions(model, months_ahead=None):
+    """ساخت partition ماه جاری و months_ahead ماه بعد (اگر وجود نداشته باشند)"""
+    if not is_partitioned(model):
+        return []
+    if months_ahead is None:
+        months_ahead = get_retention_config()['PARTITION_MONTHS_AHEAD']
+
+    table = model._meta.db_table
+    quote = connection.ops.quote_name
+    existing = {name for name, _ in _monthly_partitions(model)}
+
+    created = []
+    month = _month_start(timezone.now())
+    for _ in range(months_ahead + 1):
+        name = partition_name(table, month)
+        if name not in existing:
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(
+                        f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} "
+                        f"FOR VALUES FROM (%s) TO (%s)",
+                        [month, _next_month(month)]
+                    )
+                created.append(name)
+            except Exception as e:
+                # معمولاً یعنی partition پیش‌فرض ردیف‌هایی از همین ماه دارد
+                logger.error(f"Could not create log partition {name}: {str(e)}")
+        month = _next_month(month)
+    return created
+
+
+def drop_expired_partitions(model, cutoff, before_drop=None):
+    """
+    حذف partitionهایی که کل بازه آن‌ها قبل از cutoff است؛ خروجی: نام‌ها
+    before_drop(start, end): مثلاً بایگانی ردیف‌های همان ماه قبل از DROP
+    """
+    if not is_partitioned(model):
+        return []
+
+    table = model._meta.db_table
+    quote = connection.ops.quote_name
+    dropped = []
+    for name, month in _monthly_partitions(model):
+        if _next_month(month) > cutoff:
+            break
+        if before_drop is not None:
+            before_drop(month, _next_month(month))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}")
+            cursor.execute(f"DROP TABLE {quote(name)}")
+        dropped.append(name)
+    return dropped
+
+
+def partition_table_sql(model):
+    """
+    دستورات یک‌باره تبدیل جدول لاگ به جدول partition شده بر اساس timestamp (برای DBA؛
+    در پنجره نگهداری اجرا شود). کلید اصلی (id, timestamp) می‌شود چون کلید یکتا در جدول
+    partition شده باید ستون partition را داشته باشد؛ کلید خارجی‌ها کپی نمی‌شوند.
+    """
+    table = model._meta.db_table
+    old = f"{table}_unpartitioned"
+    quote = connection.ops.quote_name
+    timestamp = model._meta.get_field('timestamp').column
+
+    statements = [
+        "BEGIN;",
+        f"ALTER TABLE {quote(table)} RENAME TO {quote(old)};",
+        f"CREATE TABLE {quote(table)} (LIKE {quote(old)} INCLUDING DEFAULTS) PARTITION BY RANGE ({quote(timestamp)});",
+        f"ALTER TABLE {quote(table)} ADD PRIMARY KEY ({quote('id')}, {quote(timestamp)});",
+        f"CREATE TABLE {quote(table + '_default')} PARTITION OF {quote(table)} DEFAULT;",
+        f"INSERT INTO {quote(table)} SELECT * FROM {quote(old)};",
+        f"DROP TABLE {quote(old)};",
+    ]
+    with connection.schema_editor(collect_sql=True) as editor:
+        for index in model._meta.indexes:
+            statements.append(f"{index.create_sql(model, editor)};")
+    statements.append("COMMIT;")
+    return statements
+
+
+# ------------------------------------------------------------
+# 2. حذف دسته‌ای
+# ------------------------------------------------------------
+
+def _delete_batches(job, model, deadline, pause):
+    """حذف دسته‌ای تا تمام شدن ردیف‌های منقضی یا سقف زمانی؛ خروجی: آیا تمام شد"""
+    expired = model.objects.filter(timestamp__lt=job.cutoff)
+    while True:
+        if time.monotonic() >= deadline:
+            return False
+
+        candidates = expired
+        if job.last_timestamp is not None:
+            # از آخرین نقطه ادامه (در PostgreSQL از روی ایندکس‌های مرده vacuum نشده عبور نمی‌کند)
+            candidates = candidates.filter(timestamp__gte=job.last_timestamp)
+        rows = list(candidates.order_by('timestamp').values_list('pk', 'timestamp')[:job.batch_size])
+        if not rows:
+            return True
+
+        batch = model.objects.filter(pk__in=[pk for pk, _ in rows])
+        if is_archived_type(job.job_type):
+            # اول بایگانی (با fsync) و بعد حذف
+            job.archived_count += archive_rows(job.job_type, batch, part=job.pk)
+
+        with transaction.atomic():
+            # مدل‌های لاگ رابطه معکوس و سیگنال حذف ندارند؛ جنگو یک DELETE مستقیم می‌زند
+            deleted, _ = batch.delete()
+
+        job.deleted_count += deleted
+        job.batches += 1
+        job.last_timestamp = rows[-1][1]
+        job.save(update_fields=['deleted_count', 'archived_count', 'batches', 'last_timestamp'])
+
+        if len(rows) < job.batch_size:
+            return True
+        if pause:
+            time.sleep(pause)
+
+
+def run_job(job, time_budget=None, pause=None):
+    """اجرای (یا ادامه) یک LogCleanupJob"""
+    config = get_retention_config()
+    time_budget = config['TIME_BUDGET'] if time_budget is None else time_budget
+    pause = config['PAUSE'] if pause is None else pause
+
+    started = time.monotonic()
+    deadline = started + time_budget
+    model = log_model(job.job_type)
+
+    if job.cutoff is None:
+        job.cutoff = timezone.now() - timedelta(days=job.retention_days)
+        job.save(update_fields=['cutoff'])
+
+    try:
+        before_drop = None
+        if is_archived_type(job.job_type):
+            def before_drop(start, end):
+                job.archived_count += archive_rows(
+                    job.job_type, model.objects.filter(timestamp__gte=start, timestamp__lt=end), part=job.pk
+                )
+
+        dropped = drop_expired_partitions(model, job.cutoff, before_drop=before_drop)
+        if dropped:
+            job.dropped_partitions += len(dropped)
+            job.save(update_fields=['dropped_partitions', 'archived_count'])
+        job.is_complete = _delete_batches(job, model, deadline, pause)
+        job.is_success = True
+        job.error_message = ''
+    except Exception as e:
+        job.error_count += 1
+        job.error_message = str(e)[:1000]
+        job.is_success = False
+        logger.error(f"Log retention failed for {job.job_type}: {str(e)}")
+    finally:
+        job.finished_at = timezone.now()
+        job.duration = round((job.duration or 0) + time.monotonic() - started, 2)
+        job.save()
+    return job
+
+
+def run_retention(job_types=None, time_budget=None, pause=None, batch_size=None):
+    """
+    اجرای پاک‌سازی برای نوع‌های داده‌شده (پیش‌فرض همه)؛ سقف زمانی بین همه تقسیم نمی‌شود
+    و هر نوع از زمان باقی‌مانده استفاده می‌کند
+    """
+    from .models import LogCleanupJob
+
+    config = get_retention_config()
+    time_budget = config['TIME_BUDGET'] if time_budget is None else time_budget
+    deadline = time.monotonic() + time_budget
+
+    results = []
+    for job_type in job_types or [choice for choice, _ in LogCleanupJob.JOB_TYPES]:
+        model = log_model(job_type)
+        ensure_partitions(model)
+
+        # کار نیمه‌تمام قبلی ادامه داده می‌شود (همان cutoff)
+        job = LogCleanupJob.objects.filter(job_type=job_type, is_complete=False).order_by('-started_at').first()
+        if job is None:
+            job = LogCleanupJob.objects.create(
+                job_type=job_type,
+                retention_days=config['DAYS'][job_type],
+                batch_size=batch_size or config['BATCH_SIZE'],
+            )
+        elif batch_size:
+            job.batch_size = batch_size
+
+        run_job(job, time_budget=max(0, deadline - time.monotonic()), pause=pause)
+        results.append({
+            'type': job_type,
+            'success': job.is_success,
+            'complete': job.is_complete,
+            'deleted': job.deleted_count,
+            'archived': job.archived_count,
+            'dropped_partitions': job.dropped_partitions,
+            'duration': job.duration,
+        })
+    return results
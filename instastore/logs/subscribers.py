@@ -0,0 +1,155 @@
+# logs/subscribers.py
+"""
+ثبت لاگ رویدادهای دامنه (instastore/events.py)
+
+جایگزین receiverهای post_save قدیمی core/signals.py و logs/signals.py: تغییرات فیلدها
+یک بار در گذرگاه رویداد محاسبه می‌شود و این‌جا فقط خوانده می‌شود (بدون Model.objects.get
+دوباره در هر receiver) و برای هر فروشگاه در هر تراکنش فقط یک SystemLog ثبت می‌شود.
+"""
+
+import logging
+
+from django.contrib.auth.models import User
+
+from instastore.events import subscriber, track_model
+from shops.models import Plan, Shop
+
+from .models import AdminLog, ShopActivityLog, SystemLog
+
+logger = logging.getLogger('instastore')
+
+track_model(User, 'user', fields=('is_active',))
+track_model(Shop, 'shop', fields=('is_active', 'current_plan', 'plan_expires_at'))
+track_model(Plan, 'plan', fields=('is_active',))
+
+
+# ------------------------------------------------------------
+# 1. کاربر
+# ------------------------------------------------------------
+
+@subscriber('user.created')
+def log_user_created(event):
+    user = event.instance
+    SystemLog.info(
+        f"User created: {user.username}",
+        component='AUTH',
+        data={
+            'username': user.username,
+            'email': user.email,
+            'is_staff': user.is_staff,
+            'is_superuser': user.is_superuser
+        }
+    )
+
+
+@subscriber('user.deleted')
+def log_user_deleted(event):
+    user = event.instance
+    AdminLog.log_action(
+        admin=None,
+        action='USER_DELETED',
+        model='User',
+        object_id=event.pk,
+        description=f'User {user.username} was deleted'
+    )
+
+
+# ------------------------------------------------------------
+# 2. فروشگاه
+# ------------------------------------------------------------
+
+@subscriber('shop.created')
+def log_shop_created(event):
+    shop = event.instance
+    SystemLog.info(
+        f"Shop created: {shop.shop_name}",
+        component='SHOP',
+        data={'shop_slug': shop.slug, 'action': 'created'}
+    )
+    ShopActivityLog.log_activity(
+        shop=shop,
+        action='SHOP_CREATED',
+        category='SETTINGS',
+        user=shop.user,
+        details={
+            'shop_name': shop.shop_name,
+            'plan': shop.current_plan.code if shop.current_plan else None
+        }
+    )
+
+
+@subscriber('shop.updated')
+def log_shop_updated(event):
+    shop = event.instance
+    SystemLog.info(
+        f"Shop updated: {shop.shop_name}",
+        component='SHOP',
+        data={
+            'shop_slug': shop.slug,
+            'action': 'updated',
+            'changed_fields': sorted(event.changes),
+        }
+    )
+
+    if event.changed('is_active'):
+        action = 'SHOP_REACTIVATED' if shop.is_active else 'SHOP_DEACTIVATED'
+        logger.info(f"Shop {shop.slug}: {action}")
+        ShopActivityLog.log_activity(shop=shop, action=action, category='SETTINGS', user=shop.user)
+
+    if event.changed('current_plan'):
+        old_plan_id, new_plan_id = event.changes['current_plan']
+        ShopActivityLog.log_activity(
+            shop=shop,
+            action='PLAN_CHANGED',
+            category='PLAN',
+            user=shop.user,
+            details={
+                'old_plan_id': old_plan_id,
+                'new_plan_id': new_plan_id,
+                'new_plan': shop.current_plan.name if shop.current_plan else None
+            }
+        )
+
+
+@subscriber('shop.deleted')
+def log_shop_deleted(event):
+    shop = event.instance
+    SystemLog.warning(
+        f"Shop deleted: {shop.shop_name}",
+        component='SHOP',
+        data={'shop_id': event.pk, 'shop_slug': shop.slug, 'action': 'deleted'}
+    )
+
+
+# ------------------------------------------------------------
+# 3. پلن
+# ------------------------------------------------------------
+
+@subscriber('plan.created')
+def log_default_plan_created(event):
+    plan = event.instance
+    if plan.is_default:
+        SystemLog.info(
+            f"New default plan created: {plan.name}",
+            component='SHOP',
+            data={
+                'plan_id': plan.id,
+                'plan_name': plan.name,
+                'price': plan.price,
+                'days': plan.days
+            }
+        )
+
+
+@subscriber('plan.updated')
+def log_plan_deactivated(event):
+    plan = event.instance
+    if not event.changed('is_active') or plan.is_active:
+        return
+
+    affected_shops = plan.shops.count()
+    if affected_shops > 0:
+        SystemLog.warning(
+            f"Plan deactivated: {plan.name}, affecting {affected_shops} shops",
+            component='SHOP'
+        )
@@ -0,0 +1,246 @@
+# logs/writer.py
+"""
+نوشتن بافرشده لاگ‌ها (SystemLog / ShopActivityLog / AdminLog)
+
+classmethodهای ثبت لاگ به جای INSERT همزمان، شیء لاگ را در یک صف محدود در حافظه
+پروسه می‌گذارند و یک thread پس‌زمینه آن‌ها را دسته‌ای با bulk_create می‌نویسد:
+
+    SystemLog.info("...")                          # بدون تغییر برای فراخوان‌ها
+    ShopActivityLog.log_activity(shop, 'X')
+    AdminLog.log_action(admin, 'UPDATE', ...)
+
+- نوشتن هر دسته وقتی BATCH_SIZE لاگ جمع شود یا FLUSH_INTERVAL ثانیه بگذرد
+- لاگ بعد از commit تراکنش جاری وارد صف می‌شود (عملیات rollback شده لاگ ندارد و
+  کلیدهای خارجی مثل shop هنگام نوشتن وجود دارند)
+- صف پر: POLICY='drop' لاگ را دور می‌ریزد، POLICY='block' تا BLOCK_TIMEOUT ثانیه
+  منتظر جا می‌ماند و بعد دور می‌ریزد (درخواست کاربر هیچ‌وقت بیش از آن معطل نمی‌شود)
+- هنگام خروج پروسه (atexit) لاگ‌های باقی‌مانده نوشته می‌شوند؛ بعد از fork (مثلاً
+  gunicorn --preload) صف و thread در پروسه فرزند از نو ساخته می‌شوند
+- ASYNC=False: همان رفتار قبلی (INSERT همزمان)؛ پیش‌فرض هنگام اجرای تست‌ها (TESTING در
+  settings)، چون TestCase تراکنش را commit نمی‌کند و لاگ‌ها هرگز نوشته نمی‌شدند
+
+submit_row(model, fields) مستقیم (بدون on_commit) وارد صف می‌شود؛ برای لاگ‌هایی که به
+تراکنش درخواست وابسته نیستند (APILog).
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger('instastore')
+
+DEFAULT_LOG_WRITER = {
+    'ASYNC': True,
+    'QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 1.0,
+    'POLICY': 'drop',
+    'BLOCK_TIMEOUT': 0.5,
+}
+
+POLICIES = ('drop', 'block')
+
+
+def get_writer_config():
+    config = dict(DEFAULT_LOG_WRITER)
+    config['ASYNC'] = not getattr(settings, 'TESTING', False)
+    config.update(getattr(settings, 'LOG_WRITER', {}))
+    if config['POLICY'] not in POLICIES:
+        raise ValueError(f"LOG_WRITER['POLICY'] باید یکی از {POLICIES} باشد")
+    return config
+
+
+class LogWriter:
+    """صف محدود + thread نویسنده (یک نمونه برای هر پروسه)"""
+
+    def __init__(self, config):
+        self.config = config
+        self.queue = queue.Queue(maxsize=config['QUEUE_SIZE'])
+        self.pid = os.getpid()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        # شمارنده‌ها از threadهای درخواست و thread نویسنده به‌روز می‌شوند
+        self._counter_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------
+    # 1. افزودن به صف
+    # ------------------------------------------------------------
+
+    def put(self, instance):
+        try:
+            if self.config['POLICY'] == 'block':
+                self.queue.put(instance, timeout=self.config['BLOCK_TIMEOUT'])
+            else:
+                self.queue.put_nowait(instance)
+        except queue.Full:
+            dropped = self._count('dropped')
+            # هشدار برای اولین لاگ دورریخته و بعد هر 1000 تا (لاگ خطا نباید خودش سیل شود)
+            if dropped % 1000 == 1:
+                logger.warning(f"Log writer queue is full; {dropped} log rows dropped so far")
+
+    def _count(self, name, amount=1):
+        with self._counter_lock:
+            value = getattr(self, name) + amount
+            setattr(self, name, value)
+            return value
+
+    # ------------------------------------------------------------
+    # 2. نوشتن دسته‌ها
+    # ------------------------------------------------------------
+
+    def _take_batch(self, wait):
+        """تا BATCH_SIZE لاگ؛ اگر wait داده شود حداکثر همان‌قدر برای پر شدن دسته صبر می‌کند"""
+        batch = []
+        deadline = time.monotonic() + wait
+        while len(batch) < self.config['BATCH_SIZE']:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    batch.append(self.queue.get(timeout=timeout))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        from django.db import IntegrityError
+
+        by_model = {}
+        for item in batch:
+            # (مدل، فیلدها): شیء مدل این‌جا ساخته می‌شود نه در مسیر درخواست
+            instance = item[0](**item[1]) if isinstance(item, tuple) else item
+            by_model.setdefault(type(instance), []).append(instance)
+
+        for model, instances in by_model.items():
+            try:
+                model.objects.bulk_create(instances)
+                self._count('written', len(instances))
+                continue
+            except IntegrityError:
+                pass
+            except Exception as e:
+                self._count('failed', len(instances))
+                logger.error(f"Log writer failed to write {len(instances)} {model.__name__} rows: {str(e)}")
+                continue
+
+            # یک ردیف خراب (مثلاً کاربری که در این فاصله حذف شده) کل دسته را از بین نبرد
+            for instance in instances:
+                try:
+                    instance.save(force_insert=True)
+                    self._count('written')
+                except Exception as e:
+                    self._count('failed')
+                    logger.error(f"Log writer dropped a {model.__name__} row: {str(e)}")
+
+    def _run(self):
+        from django.db import close_old_connections
+
+        while not self._stop.is_set():
+            batch = self._take_batch(self.config['FLUSH_INTERVAL'])
+            if not batch:
+                continue
+            try:
+                self._write(batch)
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """نوشتن همه لاگ‌های موجود در صف در thread فراخوان"""
+        while True:
+            batch = self._take_batch(0)
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout=5):
+        self._stop.set()
+        self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        with self._counter_lock:
+            return {
+                'queued': self.queue.qsize(),
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+
+# ------------------------------------------------------------
+# 3. نمونه پروسه
+# ------------------------------------------------------------
+
+_writer_lock = threading.Lock()
+_writer = None
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = LogWriter(get_writer_config())
+        return _writer
+
+
+def _reset_after_fork():
+    # thread نویسنده در پروسه فرزند وجود ندارد و قفل‌ها ممکن است در حالت گرفته کپی شده باشند
+    global _writer, _writer_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def submit(instance):
+    """
+    ثبت یک شیء لاگ ذخیره‌نشده
+    خروجی: همان شیء (شناسه UUID آن از قبل ساخته شده است)
+    """
+    from django.db import transaction
+
+    if not get_writer_config()['ASYNC']:
+        instance.save(force_insert=True)
+        return instance
+
+    transaction.on_commit(lambda: get_writer().put(instance))
+    return instance
+
+
+def submit_row(model, fields):
+    """
+    مثل submit ولی ساخت شیء مدل (و UUID آن) به thread نویسنده سپرده می‌شود؛
+    برای مسیرهای داغ مثل middleware. خروجی: شیء ذخیره‌شده در حالت همزمان، وگرنه None
+    """
+    if not get_writer_config()['ASYNC']:
+        return model.objects.create(**fields)
+
+    get_writer().put((model, fields))
+    return None
+
+
+def flush():
+    """نوشتن فوری لاگ‌های صف (برای management commandها و تست‌ها)"""
+    if _writer is not None and _writer.pid == os.getpid():
+        _writer.flush()
+
+
+@atexit.register
+def _flush_on_exit():
+    if _writer is not None and _writer.pid == os.getpid():
+        try:
+            _writer.close()
+        except Exception as e:
+            logger.error(f"Log writer failed to flush on exit: {str(e)}")
@@ -0,0 +1,231 @@
+# orders/bulk.py
+"""
+عملیات گروهی سفارش‌ها (تغییر وضعیت و ورود کد رهگیری از فایل پست/پیک)
+
+    transition_orders(queryset, 'shipped', user=request.user)
+    import_tracking_codes(shop, uploaded_file, uploaded_file.name, user=request.user)
+
+- مجاز بودن تغییر وضعیت برای همه سفارش‌ها در حافظه بررسی می‌شود (ORDER_TRANSITIONS)
+- وضعیت و زمان‌های shipped_at / delivered_at / paid_at با یک UPDATE نوشته می‌شوند
+- لاگ تغییرات (LogEntry ادمین) با یک bulk_create ثبت می‌شود
+- سیگنال post_save اجرا نمی‌شود؛ پس آمار داشبورد و جدول فروش روزانه همین‌جا یک بار
+  برای هر فروشگاه به‌روز می‌شوند
+"""
+
+from django.db import transaction
+from django.db.models import F, Value, DateTimeField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from instastore.spreadsheets import iter_table
+
+from .models import Order
+from .rollups import order_day, rebuild_daily_sales
+from .services import invalidate_shop_stats
+
+# وضعیت فعلی -> وضعیت‌های مجاز بعدی
+ORDER_TRANSITIONS = {
+    'pending': {'paid', 'processing', 'canceled'},
+    'paid': {'processing', 'shipped', 'canceled', 'refunded'},
+    'processing': {'shipped', 'canceled', 'refunded'},
+    'shipped': {'delivered', 'refunded'},
+    'delivered': {'refunded'},
+    'canceled': set(),
+    'refunded': set(),
+}
+
+# وضعیت‌هایی که روی جدول فروش روزانه (پرداخت‌شده/لغوشده) اثر دارند
+ROLLUP_STATUSES = {'paid', 'canceled', 'refunded'}
+
+MAX_BULK_ORDERS = 1000
+LOOKUP_BATCH_SIZE = 500
+UPDATE_BATCH_SIZE = 500
+
+TRACKING_COLUMNS = {
+    'order_number': ('order_number', 'شماره سفارش'),
+    'tracking_code': ('tracking_code', 'کد رهگیری', 'بارکد'),
+}
+
+
+def can_transition(current, target):
+    return target in ORDER_TRANSITIONS.get(current, set())
+
+
+def _status_label(status):
+    return dict(Order.STATUS_CHOICES).get(status, status)
+
+
+def log_order_changes(user, orders, message):
+    """ثبت لاگ ادمین برای چند سفارش با یک bulk_create (ContentType یک بار)"""
+    from django.contrib.admin.models import LogEntry, CHANGE
+    from django.contrib.contenttypes.models import ContentType
+
+    if user is None or not orders:
+        return
+    content_type = ContentType.objects.get_for_model(Order)
+    now = timezone.now()
+    LogEntry.objects.bulk_create([
+        LogEntry(
+            action_time=now,
+            user_id=user.pk,
+            content_type_id=content_type.pk,
+            object_id=str(order.pk),
+            object_repr=f"سفارش {order.order_number or order.pk}"[:200],
+            action_flag=CHANGE,
+            change_message=message,
+        )
+        for order in orders
+    ], batch_size=UPDATE_BATCH_SIZE)
+
+
+def _refresh_aggregates(orders, rollups=True):
+    """آمار کش‌شده و (در صورت نیاز) بازه روزهای فروش هر فروشگاه - یک بار برای هر فروشگاه"""
+    days = {}
+    for order in orders:
+        days.setdefault(order.shop_id, []).append(order_day(order))
+
+    for shop_id, shop_days in days.items():
+        invalidate_shop_stats(shop_id)
+        if rollups:
+            date_from, date_to = min(shop_days), max(shop_days)
+            transaction.on_commit(
+                lambda shop_id=shop_id, date_from=date_from, date_to=date_to:
+                    rebuild_daily_sales([shop_id], date_from, date_to)
+            )
+
+
+# ------------------------------------------------------------
+# 1. تغییر وضعیت گروهی
+# ------------------------------------------------------------
+
+def transition_orders(queryset, target, user=None):
+    """
+    تغییر وضعیت سفارش‌های queryset به target
+    خروجی: {'updated': [...ids], 'skipped': [{'id', 'order_number', 'reason'}]}
+    """
+    if target not in ORDER_TRANSITIONS:
+        raise ValueError(f"وضعیت ناشناخته: {target}")
+
+    now = timezone.now()
+    now_value = Value(now, output_field=DateTimeField())
+
+    with transaction.atomic():
+        orders = list(
+            queryset.select_for_update().only('id', 'shop_id', 'order_number', 'status', 'created_at')
+        )
+
+        allowed, skipped = [], []
+        for order in orders:
+            if can_transition(order.status, target):
+                allowed.append(order)
+            else:
+                skipped.append({
+                    'id': order.id,
+                    'order_number': order.order_number,
+                    'reason': f"تغییر از «{_status_label(order.status)}» به «{_status_label(target)}» مجاز نیست",
+                })
+
+        if allowed:
+            changes = {'status': target, 'updated_at': now}
+            if target == 'paid':
+                changes.update(is_paid=True, paid_at=Coalesce(F('paid_at'), now_value))
+            elif target == 'shipped':
+                changes['shipped_at'] = Coalesce(F('shipped_at'), now_value)
+            elif target == 'delivered':
+                changes['delivered_at'] = Coalesce(F('delivered_at'), now_value)
+
+            Order.objects.filter(id__in=[order.id for order in allowed]).update(**changes)
+            log_order_changes(user, allowed, f"تغییر وضعیت گروهی به: {target}")
+            _refresh_aggregates(allowed, rollups=target in ROLLUP_STATUSES)
+
+    return {
+        'updated': [order.id for order in allowed],
+        'skipped': skipped,
+    }
+
+
+# ------------------------------------------------------------
+# 2. ورود کد رهگیری از فایل
+# ------------------------------------------------------------
+
+def _lookup_header(headers, column):
+    aliases = {alias.lower() for alias in TRACKING_COLUMNS[column]}
+    for header in headers:
+        if header.strip().lower() in aliases:
+            return header
+    return None
+
+
+def _read_tracking_rows(data_file, filename, errors):
+    """شماره سفارش -> (شماره سطر، کد رهگیری)"""
+    codes = {}
+    columns = None
+    max_length = Order._meta.get_field('tracking_code').max_length
+
+    for row_number, row in iter_table(data_file, filename):
+        if columns is None:
+            columns = {column: _lookup_header(row, column) for column in TRACKING_COLUMNS}
+            if not all(columns.values()):
+                raise ValueError("فایل باید ستون‌های «شماره سفارش» و «کد رهگیری» را داشته باشد")
+
+        order_number = row[columns['order_number']].strip()
+        tracking_code = row[columns['tracking_code']].strip()
+        if not order_number or not tracking_code:
+            errors.append({'row': row_number, 'message': "شماره سفارش یا کد رهگیری خالی است"})
+        elif len(tracking_code) > max_length:
+            errors.append({'row': row_number, 'message': f"کد رهگیری بیشتر از {max_length} کاراکتر است"})
+        elif order_number in codes:
+            errors.append({'row': row_number, 'message': f"سفارش {order_number} تکراری است"})
+        else:
+            codes[order_number] = (row_number, tracking_code)
+    return codes
+
+
+def import_tracking_codes(shop, data_file, filename, mark_shipped=True, user=None):
+    """
+    ثبت کد رهگیری سفارش‌های فروشگاه از فایل CSV/XLSX پست یا پیک
+    mark_shipped: سفارش‌های پرداخت‌شده/در حال پردازش به «ارسال شده» می‌روند
+    """
+    errors = []
+    try:
+        codes = _read_tracking_rows(data_file, filename, errors)
+    except ValueError as e:
+        return {'updated': 0, 'shipped': 0, 'errors': [{'row': 0, 'message': str(e)}]}
+
+    numbers = list(codes)
+    orders = []
+    for start in range(0, len(numbers), LOOKUP_BATCH_SIZE):
+        orders.extend(
+            Order.objects.filter(shop=shop, order_number__in=numbers[start:start + LOOKUP_BATCH_SIZE])
+            .only('id', 'shop_id', 'order_number', 'status', 'tracking_code', 'created_at')
+        )
+
+    found = {order.order_number for order in orders}
+    for order_number in numbers:
+        if order_number not in found:
+            errors.append({'row': codes[order_number][0], 'message': f"سفارش {order_number} در این فروشگاه پیدا نشد"})
+
+    now = timezone.now()
+    changed = []
+    for order in orders:
+        tracking_code = codes[order.order_number][1]
+        if order.tracking_code != tracking_code:
+            order.tracking_code = tracking_code
+            order.updated_at = now
+            changed.append(order)
+
+    shipped = {'updated': []}
+    with transaction.atomic():
+        Order.objects.bulk_update(changed, ['tracking_code', 'updated_at'], batch_size=UPDATE_BATCH_SIZE)
+        log_order_changes(user, changed, "ثبت کد رهگیری از فایل")
+
+        if mark_shipped:
+            ready = [order.id for order in orders if can_transition(order.status, 'shipped')]
+            if ready:
+                shipped = transition_orders(Order.objects.filter(id__in=ready), 'shipped', user=user)
+
+    return {
+        'updated': len(changed),
+        'shipped': len(shipped['updated']),
+        'errors': sorted(errors, key=lambda error: error['row']),
+    }
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from shops.models import Shop
+from orders.rollups import rebuild_daily_sales
+
+
+class Command(BaseCommand):
+    help = 'ساخت دوباره جداول فروش روزانه (ShopDailySales / ProductDailySales) از روی سفارش‌ها'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', help='slug فروشگاه (پیش‌فرض: همه فروشگاه‌ها)')
+        parser.add_argument('--from', dest='date_from', help='از تاریخ (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='تا تاریخ (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        date_from = self.parse(options.get('date_from'))
+        date_to = self.parse(options.get('date_to'))
+
+        shop_ids = None
+        if options.get('shop'):
+            shop_ids = list(Shop.objects.filter(slug=options['shop']).values_list('id', flat=True))
+            if not shop_ids:
+                raise CommandError(f"فروشگاه '{options['shop']}' یافت نشد.")
+
+        count = rebuild_daily_sales(shop_ids, date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f"جداول فروش روزانه ساخته شد ({count} ردیف فروشگاه-روز)."))
+
+    @staticmethod
+    def parse(value):
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"تاریخ نامعتبر: {value}")
+        return day
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-19 00:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+        ('products', '0004_mediablob'),
+        ('shops', '0002_alter_plan_options_alter_shop_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='تاریخ')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='تعداد')),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='مبلغ (ریال)')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product', verbose_name='محصول')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_daily_sales', to='shops.shop', verbose_name='فروشگاه')),
+            ],
+            options={
+                'verbose_name': 'فروش روزانه محصول',
+                'verbose_name_plural': 'فروش روزانه محصولات',
+                'indexes': [models.Index(fields=['shop', 'date'], name='orders_prod_shop_id_2983ed_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'date'), name='unique_product_daily_sales')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShopDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='تاریخ')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='تعداد سفارش')),
+                ('paid_orders', models.PositiveIntegerField(default=0, verbose_name='سفارش\u200cهای پرداخت\u200cشده')),
+                ('canceled_orders', models.PositiveIntegerField(default=0, verbose_name='سفارش\u200cهای لغو/مرجوع')),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='درآمد (ریال)')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='تعداد اقلام فروخته\u200cشده')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='shops.shop', verbose_name='فروشگاه')),
+            ],
+            options={
+                'verbose_name': 'فروش روزانه فروشگاه',
+                'verbose_name_plural': 'فروش روزانه فروشگاه\u200cها',
+                'indexes': [models.Index(fields=['date'], name='orders_shop_date_0665a8_idx')],
+                'constraints': [models.UniqueConstraint(fields=('shop', 'date'), name='unique_shop_daily_sales')],
+            },
+        ),
+    ]
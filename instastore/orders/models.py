@@ -2,10 +2,16 @@
 from django.db import models
 from django.conf import settings
 from django.db.models import Sum
+from django.utils.functional import cached_property
 from shops.models import Shop
 from products.models import Product, ProductVariant
+from instastore.images import responsive_image
+from instastore.tracking import TrackedFieldsMixin
+
+class Order(TrackedFieldsMixin, models.Model):
+    # فیلدهایی که روی آمار فروش اثر دارند (orders/signals.py)
+    tracked_fields = ('shop', 'status', 'is_paid', 'total_price')
 
-class Order(models.Model):
     STATUS_CHOICES = (
         ('pending', 'در انتظار پرداخت'),
         ('paid', 'پرداخت شده'),
@@ -72,7 +78,7 @@ class Order(models.Model):
         ]
 
     def __str__(self):
-        return f"سفارش {self.order_number or self.id} - {self.shop.name}"
+        return f"سفارش {self.order_number or self.id} - {self.shop.shop_name}"
 
     def save(self, *args, **kwargs):
         # ایجاد شماره سفارش منحصر به فرد
@@ -166,6 +172,11 @@ class OrderItem(models.Model):
         """محاسبه هزینه کل این آیتم"""
         return self.price * self.quantity
     
+    @cached_property
+    def product_image_responsive(self):
+        """آدرس‌های srcset عکس محصول (نسخه‌ها بین ProductImage و آیتم سفارش مشترک‌اند)"""
+        return responsive_image(self.product_image)
+    
     @property
     def unit_price_display(self):
         """قیمت واحد به صورت فرمت شده"""
@@ -174,4 +185,57 @@ class OrderItem(models.Model):
     @property
     def total_price_display(self):
         """قیمت کل به صورت فرمت شده"""
-        return f"{self.get_cost():,} ریال"
\ No newline at end of file
+        return f"{self.get_cost():,} ریال"
+
+# ------------------------------------------------------------
+# جداول تجمیعی فروش روزانه (برای داشبورد و آمار)
+# ------------------------------------------------------------
+
+class ShopDailySales(models.Model):
+    """
+    خلاصه فروش یک فروشگاه در یک روز (بر اساس تاریخ ثبت سفارش به وقت محلی)
+    با هر تغییر سفارش، ردیف همان روز از روی سفارش‌ها دوباره محاسبه می‌شود (orders/rollups.py)
+    """
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='daily_sales', verbose_name='فروشگاه')
+    date = models.DateField(verbose_name='تاریخ')
+    orders = models.PositiveIntegerField(default=0, verbose_name='تعداد سفارش')
+    paid_orders = models.PositiveIntegerField(default=0, verbose_name='سفارش‌های پرداخت‌شده')
+    canceled_orders = models.PositiveIntegerField(default=0, verbose_name='سفارش‌های لغو/مرجوع')
+    revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0, verbose_name='درآمد (ریال)')
+    units = models.PositiveIntegerField(default=0, verbose_name='تعداد اقلام فروخته‌شده')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'فروش روزانه فروشگاه'
+        verbose_name_plural = 'فروش روزانه فروشگاه‌ها'
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'date'], name='unique_shop_daily_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.shop_id} - {self.date}"
+
+
+class ProductDailySales(models.Model):
+    """تعداد و مبلغ فروش هر محصول در یک روز (فقط سفارش‌های پرداخت‌شده)"""
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='product_daily_sales', verbose_name='فروشگاه')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales', verbose_name='محصول')
+    date = models.DateField(verbose_name='تاریخ')
+    units = models.PositiveIntegerField(default=0, verbose_name='تعداد')
+    revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0, verbose_name='مبلغ (ریال)')
+
+    class Meta:
+        verbose_name = 'فروش روزانه محصول'
+        verbose_name_plural = 'فروش روزانه محصولات'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'date'], name='unique_product_daily_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['shop', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.date}"
@@ -0,0 +1,189 @@
+# orders/rollups.py
+"""
+جداول تجمیعی فروش روزانه (ShopDailySales و ProductDailySales)
+
+هر ردیف خلاصه سفارش‌های ثبت‌شده یک فروشگاه در یک روز (به وقت محلی) است. با هر تغییر
+سفارش فقط ردیف همان فروشگاه و همان روز از روی سفارش‌ها دوباره محاسبه می‌شود؛ پس آمار
+هر بازه زمانی با خواندن چند ده/صد ردیف (به جای اسکن همه سفارش‌ها) به دست می‌آید.
+
+- درآمد و اقلام فقط از سفارش‌های پرداخت‌شده (is_paid) حساب می‌شوند
+- دستور backfill_sales_rollups کل تاریخچه (یا یک بازه) را دوباره می‌سازد
+"""
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Order, OrderItem, ShopDailySales, ProductDailySales
+
+PAID = Q(is_paid=True)
+CANCELED = Q(status__in=('canceled', 'refunded'))
+
+SHOP_ROLLUP_FIELDS = ['orders', 'paid_orders', 'canceled_orders', 'revenue', 'units']
+PRODUCT_ROLLUP_FIELDS = ['shop', 'units', 'revenue']
+
+
+def day_start(day):
+    """ابتدای روز به وقت محلی (aware)"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def order_day(order):
+    return timezone.localdate(order.created_at)
+
+
+def default_date_range(days=30):
+    today = timezone.localdate()
+    return today - timedelta(days=days - 1), today
+
+
+# ------------------------------------------------------------
+# 1. ساخت ردیف‌ها از روی سفارش‌ها
+# ------------------------------------------------------------
+
+def _filter_range(queryset, shop_ids, date_from, date_to, shop_field, date_field):
+    if shop_ids is not None:
+        queryset = queryset.filter(**{f'{shop_field}__in': shop_ids})
+    if date_from is not None:
+        queryset = queryset.filter(**{f'{date_field}__gte': date_from})
+    if date_to is not None:
+        queryset = queryset.filter(**{f'{date_field}__lte': date_to})
+    return queryset
+
+
+def rebuild_daily_sales(shop_ids=None, date_from=None, date_to=None):
+    """
+    بازسازی ردیف‌های تجمیعی فروشگاه‌ها در یک بازه (None یعنی بدون محدودیت)
+    خروجی: تعداد ردیف‌های روزانه فروشگاه
+    """
+    orders = Order.objects.all()
+    if shop_ids is not None:
+        orders = orders.filter(shop_id__in=shop_ids)
+    if date_from is not None:
+        orders = orders.filter(created_at__gte=day_start(date_from))
+    if date_to is not None:
+        orders = orders.filter(created_at__lt=day_start(date_to + timedelta(days=1)))
+
+    # دو کوئری گروه‌بندی‌شده جدا؛ join سفارش و آیتم در یک کوئری جمع مبلغ را چند برابر می‌کند
+    shop_rows = orders.annotate(day=TruncDate('created_at')).values('shop_id', 'day').annotate(
+        orders=Count('id'),
+        paid_orders=Count('id', filter=PAID),
+        canceled_orders=Count('id', filter=CANCELED),
+        revenue=Coalesce(Sum('total_price', filter=PAID), Decimal('0')),
+    ).order_by()
+
+    product_rows = OrderItem.objects.filter(
+        order__in=orders.filter(PAID)
+    ).annotate(
+        day=TruncDate('order__created_at'),
+        shop_id=F('order__shop_id'),
+    ).values('shop_id', 'day', 'product_id').annotate(
+        units=Sum('quantity'),
+        revenue=Sum(F('price') * F('quantity')),
+    ).order_by()
+
+    product_sales = [
+        ProductDailySales(
+            shop_id=row['shop_id'],
+            product_id=row['product_id'],
+            date=row['day'],
+            units=row['units'] or 0,
+            revenue=row['revenue'] or 0,
+        )
+        for row in product_rows
+    ]
+
+    units = {}
+    for row in product_sales:
+        key = (row.shop_id, row.date)
+        units[key] = units.get(key, 0) + row.units
+
+    shop_sales = [
+        ShopDailySales(
+            shop_id=row['shop_id'],
+            date=row['day'],
+            orders=row['orders'],
+            paid_orders=row['paid_orders'],
+            canceled_orders=row['canceled_orders'],
+            revenue=row['revenue'],
+            units=units.get((row['shop_id'], row['day']), 0),
+        )
+        for row in shop_rows
+    ]
+
+    with transaction.atomic():
+        _filter_range(ShopDailySales.objects.all(), shop_ids, date_from, date_to, 'shop_id', 'date').delete()
+        _filter_range(ProductDailySales.objects.all(), shop_ids, date_from, date_to, 'shop_id', 'date').delete()
+
+        # upsert: بازسازی همزمان همان روز (دو درخواست موازی) خطای unique نمی‌دهد
+        ShopDailySales.objects.bulk_create(
+            shop_sales, batch_size=500,
+            update_conflicts=True, unique_fields=['shop', 'date'], update_fields=SHOP_ROLLUP_FIELDS
+        )
+        ProductDailySales.objects.bulk_create(
+            product_sales, batch_size=500,
+            update_conflicts=True, unique_fields=['product', 'date'], update_fields=PRODUCT_ROLLUP_FIELDS
+        )
+
+    return len(shop_sales)
+
+
+def refresh_daily_sales(shop_id, day):
+    """محاسبه دوباره ردیف یک فروشگاه در یک روز"""
+    return rebuild_daily_sales([shop_id], day, day)
+
+
+def schedule_daily_sales_refresh(order):
+    """به‌روزرسانی ردیف روز سفارش بعد از commit (تا آیتم‌ها و مبلغ نهایی دیده شوند)"""
+    shop_id, day = order.shop_id, order_day(order)
+    transaction.on_commit(lambda: refresh_daily_sales(shop_id, day))
+
+
+# ------------------------------------------------------------
+# 2. گزارش از روی ردیف‌های تجمیعی
+# ------------------------------------------------------------
+
+def sales_summary(date_from, date_to, shop_id=None, top=10):
+    """
+    خلاصه فروش یک بازه: جمع کل، سری روزانه و پرفروش‌ترین محصولات
+    shop_id=None یعنی کل پلتفرم
+    """
+    rows = ShopDailySales.objects.filter(date__gte=date_from, date__lte=date_to)
+    products = ProductDailySales.objects.filter(date__gte=date_from, date__lte=date_to)
+    if shop_id is not None:
+        rows = rows.filter(shop_id=shop_id)
+        products = products.filter(shop_id=shop_id)
+
+    sums = {
+        'orders': Coalesce(Sum('orders'), 0),
+        'paid_orders': Coalesce(Sum('paid_orders'), 0),
+        'canceled_orders': Coalesce(Sum('canceled_orders'), 0),
+        'revenue': Coalesce(Sum('revenue'), Decimal('0')),
+        'units': Coalesce(Sum('units'), 0),
+    }
+
+    totals = rows.aggregate(**sums)
+    totals['average_order_value'] = (
+        totals['revenue'] / totals['paid_orders'] if totals['paid_orders'] else Decimal('0')
+    )
+
+    daily = list(rows.values('date').annotate(**sums).order_by('date'))
+
+    top_products = list(
+        products.values('product_id', name=F('product__name')).annotate(
+            units=Sum('units'),
+            revenue=Sum('revenue'),
+        ).order_by('-units', '-revenue')[:top]
+    )
+
+    return {
+        'date_from': date_from,
+        'date_to': date_to,
+        'totals': totals,
+        'daily': daily,
+        'top_products': top_products,
+    }
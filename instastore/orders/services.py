@@ -0,0 +1,58 @@
+# orders/services.py
+"""
+آمار سفارشات فروشگاه برای داشبورد فروشنده
+
+همه شمارش‌ها (به تفکیک وضعیت)، تعداد سفارش‌های پرداخت‌شده و درآمد با یک کوئری
+(تجمیع شرطی با Count/Sum و filter) محاسبه می‌شوند. نتیجه برای هر فروشگاه کش می‌شود
+و با هر تغییر سفارش (سیگنال‌های orders) بعد از commit پاک می‌شود.
+"""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import Order
+
+STATS_CACHE_KEY = 'orders:stats:{shop_id}'
+STATS_CACHE_TIMEOUT = 60 * 60
+
+ORDER_STATUSES = [status for status, _ in Order.STATUS_CHOICES]
+
+
+def order_stats_aggregate(queryset):
+    """آمار یک queryset سفارش با یک کوئری تجمیعی"""
+    aggregates = {
+        status: Count('id', filter=Q(status=status)) for status in ORDER_STATUSES
+    }
+    aggregates.update({
+        'total': Count('id'),
+        'paid_count': Count('id', filter=Q(is_paid=True)),
+        'revenue': Sum('total_price', filter=Q(is_paid=True)),
+    })
+
+    # ترتیب پیش‌فرض queryset در GROUP BY اثری ندارد ولی حذفش کوئری را ساده‌تر می‌کند
+    stats = queryset.order_by().aggregate(**aggregates)
+    stats['revenue'] = stats['revenue'] or Decimal('0')
+    stats['average_order_value'] = (
+        stats['revenue'] / stats['paid_count'] if stats['paid_count'] else Decimal('0')
+    )
+    return stats
+
+
+def shop_dashboard_stats(shop):
+    """آمار سفارشات یک فروشگاه (کش‌شده تا تغییر بعدی سفارش‌ها)"""
+    shop_id = getattr(shop, 'pk', shop)
+    key = STATS_CACHE_KEY.format(shop_id=shop_id)
+
+    stats = cache.get(key)
+    if stats is None:
+        stats = order_stats_aggregate(Order.objects.filter(shop_id=shop_id))
+        cache.set(key, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_shop_stats(shop_id):
+    """پاک کردن آمار کش‌شده بعد از commit (تا درخواست همزمان داده قدیمی را دوباره کش نکند)"""
+    transaction.on_commit(lambda: cache.delete(STATS_CACHE_KEY.format(shop_id=shop_id)))
@@ -0,0 +1,58 @@
+# orders/signals.py
+"""
+سیگنال‌های سفارشات
+- شمارش ارجاع آیتم‌های سفارش به عکس محصول (MediaBlob)
+- باطل کردن آمار کش‌شده داشبورد فروشنده
+- به‌روزرسانی جداول فروش روزانه
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from instastore.storage import release_blob, remember_blob_reference, sync_blob_reference
+from .models import Order, OrderItem
+from .services import invalidate_shop_stats
+from .rollups import schedule_daily_sales_refresh
+
+# فیلدهایی که روی آمار فروش اثری ندارند
+ROLLUP_NEUTRAL_FIELDS = {'tracking_code', 'notes', 'shipping_method', 'shipped_at', 'delivered_at'}
+
+
+@receiver(pre_save, sender=OrderItem)
+def remember_order_item_blob(sender, instance, **kwargs):
+    remember_blob_reference(instance, 'product_image')
+
+
+@receiver(post_save, sender=OrderItem)
+def sync_order_item_blob(sender, instance, **kwargs):
+    sync_blob_reference(instance, 'product_image')
+
+
+@receiver(post_delete, sender=OrderItem)
+def release_order_item_blob(sender, instance, **kwargs):
+    release_blob(instance.product_image.name)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_order_stats(sender, instance, **kwargs):
+    invalidate_shop_stats(instance.shop_id)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def refresh_order_daily_sales(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= ROLLUP_NEUTRAL_FIELDS:
+        return
+    # ذخیره‌ای که وضعیت، پرداخت یا مبلغ را عوض نکرده (Order.tracked_fields) ردیف روز را تغییر نمی‌دهد
+    if kwargs.get('signal') is post_save and not kwargs.get('created') and not instance.has_changed():
+        return
+    schedule_daily_sales_refresh(instance)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def refresh_order_item_daily_sales(sender, instance, **kwargs):
+    """اقلام فقط برای سفارش‌های پرداخت‌شده شمرده می‌شوند؛ ثبت آیتم‌های سفارش جدید ردیفی را بازسازی نمی‌کند"""
+    order = Order.objects.filter(pk=instance.order_id, is_paid=True).first()
+    if order is not None:
+        schedule_daily_sales_refresh(order)
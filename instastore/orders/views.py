@@ -4,8 +4,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Sum
+from django.db.models import Q
+from django.utils.dateparse import parse_date
 from .models import Order
+from .services import shop_dashboard_stats, order_stats_aggregate
+from .rollups import sales_summary, default_date_range
+from .bulk import transition_orders, import_tracking_codes, log_order_changes, MAX_BULK_ORDERS
 from .serializers import OrderSerializer, OrderStatusUpdateSerializer, AdminOrderSerializer
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -53,16 +57,8 @@ class OrderViewSet(viewsets.ModelViewSet):
             serializer.save()
             
             # ثبت لاگ تغییر وضعیت
-            from django.contrib.admin.models import LogEntry, CHANGE
-            from django.contrib.contenttypes.models import ContentType
-            
-            LogEntry.objects.log_action(
-                user_id=request.user.id,
-                content_type_id=ContentType.objects.get_for_model(order).pk,
-                object_id=order.id,
-                object_repr=str(order),
-                action_flag=CHANGE,
-                change_message=f"تغییر وضعیت به: {serializer.validated_data['status']}"
+            log_order_changes(
+                request.user, [order], f"تغییر وضعیت به: {serializer.validated_data['status']}"
             )
             
             return Response(serializer.data)
@@ -88,27 +84,118 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         return Response({'status': 'پرداخت با موفقیت ثبت شد.'})
     
+    @action(detail=False, methods=['post'])
+    def bulk_status(self, request):
+        """
+        تغییر وضعیت چند سفارش: {"ids": [...], "status": "shipped"}
+        سفارش‌هایی که تغییرشان مجاز نیست با دلیل در skipped برمی‌گردند
+        """
+        ids = request.data.get('ids')
+        target = request.data.get('status')
+
+        if not isinstance(ids, list) or not ids or len(ids) > MAX_BULK_ORDERS:
+            return Response(
+                {'error': f'ids باید لیستی از ۱ تا {MAX_BULK_ORDERS} شناسه باشد.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if target not in dict(Order.STATUS_CHOICES):
+            return Response({'error': 'وضعیت نامعتبر است.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            ids = {int(pk) for pk in ids}
+        except (TypeError, ValueError):
+            return Response({'error': 'شناسه‌ها نامعتبر است.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset()
+        if not (request.user.is_staff or request.user.is_superuser):
+            if not hasattr(request.user, 'shop'):
+                return Response(
+                    {'error': 'فقط فروشندگان می‌توانند وضعیت سفارش را تغییر دهند.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            queryset = queryset.filter(shop=request.user.shop)
+
+        result = transition_orders(queryset.filter(id__in=ids), target, user=request.user)
+        found = set(result['updated']) | {item['id'] for item in result['skipped']}
+        result['not_found'] = sorted(ids - found)
+        return Response(result)
+
+    @action(detail=False, methods=['post'])
+    def import_tracking(self, request):
+        """
+        ورود کد رهگیری از فایل CSV/XLSX پست یا پیک (ستون‌های شماره سفارش و کد رهگیری)
+        mark_shipped=false: فقط کد رهگیری ثبت شود
+        """
+        if not hasattr(request.user, 'shop'):
+            return Response(
+                {'error': 'فقط فروشندگان به این بخش دسترسی دارند.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        data_file = request.FILES.get('file')
+        if data_file is None:
+            return Response({'error': 'فایل ارسال نشده است.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        mark_shipped = str(request.data.get('mark_shipped', 'true')).lower() not in ('0', 'false', 'no')
+        result = import_tracking_codes(
+            request.user.shop, data_file, data_file.name, mark_shipped=mark_shipped, user=request.user
+        )
+        return Response(result)
+
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """
         آمار سفارشات
         """
-        queryset = self.get_queryset()
-        
+        user = request.user
+
+        # صاحب فروشگاه: آمار کش‌شده مشترک با داشبورد؛ بقیه: یک کوئری تجمیعی
+        if hasattr(user, 'shop') and not (user.is_staff or user.is_superuser):
+            data = shop_dashboard_stats(user.shop)
+        else:
+            data = order_stats_aggregate(self.get_queryset())
+
         stats = {
-            'total_orders': queryset.count(),
-            'pending_orders': queryset.filter(status='pending').count(),
-            'paid_orders': queryset.filter(is_paid=True).count(),
-            'total_revenue': queryset.filter(is_paid=True).aggregate(
-                total=Sum('total_price')
-            )['total'] or 0,
-            'average_order_value': queryset.filter(is_paid=True).aggregate(
-                avg=Sum('total_price') / Sum('items__quantity')
-            )['avg'] or 0,
+            'total_orders': data['total'],
+            'pending_orders': data['pending'],
+            'paid_orders': data['paid_count'],
+            'total_revenue': data['revenue'],
+            'average_order_value': data['average_order_value'],
         }
-        
+
         return Response(stats)
 
+    @action(detail=False, methods=['get'])
+    def sales(self, request):
+        """
+        گزارش فروش یک بازه از جداول تجمیعی روزانه
+        پارامترها: date_from و date_to (YYYY-MM-DD، پیش‌فرض ۳۰ روز اخیر)؛ ادمین: shop (اختیاری)
+        """
+        user = request.user
+        default_from, default_to = default_date_range()
+
+        try:
+            date_from = parse_date(request.query_params.get('date_from', '')) or default_from
+            date_to = parse_date(request.query_params.get('date_to', '')) or default_to
+            shop_param = int(request.query_params['shop']) if request.query_params.get('shop') else None
+        except ValueError:
+            return Response({'error': 'پارامترها نامعتبر است.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if date_from > date_to:
+            return Response({'error': 'بازه تاریخ نامعتبر است.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if user.is_staff or user.is_superuser:
+            shop_id = shop_param
+        elif hasattr(user, 'shop'):
+            shop_id = user.shop.id
+        else:
+            return Response(
+                {'error': 'فقط فروشندگان به گزارش فروش دسترسی دارند.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        return Response(sales_summary(date_from, date_to, shop_id=shop_id))
+
 class ShopOrderViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet برای مشاهده سفارشات هر فروشگاه
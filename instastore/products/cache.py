@@ -0,0 +1,176 @@
+# products/cache.py
+"""
+کش ویترین فروشگاه بر اساس «نسخه کاتالوگ»
+
+هر فروشگاه یک شماره نسخه در کش دارد که با هر تغییر محصول/واریانت/تصویر/فروشگاه
+یک واحد بالا می‌رود. کلید همه صفحات و قطعه‌های کش‌شده شامل این نسخه است؛ پس با
+تغییر کاتالوگ، کلیدهای قدیمی دیگر خوانده نمی‌شوند و خودشان منقضی می‌شوند
+(بدون جستجو و حذف کلیدها).
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import Counter
+from rest_framework.response import Response
+
+# کلید نسخه‌ها - نسخه سراسری برای تغییر دسته‌بندی‌ها (مشترک بین فروشگاه‌ها)
+VERSION_KEY = 'catalog:v:{shop_id}'
+GLOBAL_VERSION_KEY = 'catalog:v:global'
+
+# زمان آخرین تغییر هر نسخه (برای هدر Last-Modified)
+CHANGED_AT_KEY = 'catalog:ts:{shop_id}'
+GLOBAL_CHANGED_AT_KEY = 'catalog:ts:global'
+
+# پارامترهای GET که روی محتوای ویترین اثر دارند (سبد خرید و session در کلید نمی‌آیند)
+STOREFRONT_VARY_PARAMS = ('q', 'category', 'color', 'size', 'price_min', 'price_max', 'page')
+
+catalog_cache_requests = Counter(
+    'instastore_catalog_cache_requests_total',
+    'درخواست‌های کش ویترین (نسبت hit از hit / (hit + miss))',
+    ['kind', 'result']
+)
+
+
+def get_cache_timeout():
+    return settings.INSTASTORE_CONFIG.get('CATALOG_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _initial_version():
+    # مقدار اولیه بر پایه زمان است تا اگر کلید نسخه از کش حذف شد،
+    # کلیدهای قدیمی با نسخه تکراری دوباره خوانده نشوند
+    return int(time.time() * 1000)
+
+
+# ------------------------------------------------------------
+# 1. نسخه کاتالوگ
+# ------------------------------------------------------------
+
+def _get_version(key, changed_at_key):
+    version = cache.get(key)
+    if version is None:
+        version = _initial_version()
+        if cache.add(key, version, timeout=None):
+            cache.add(changed_at_key, int(time.time()), timeout=None)
+        else:
+            version = cache.get(key, version)
+    return version
+
+
+def _bump_version(key, changed_at_key):
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        # کلید وجود ندارد (اولین تغییر یا حذف از کش)
+        version = _initial_version()
+        cache.set(key, version, timeout=None)
+    # Last-Modified دقت ثانیه دارد؛ زمان تغییر باید از مقدار قبلی بزرگ‌تر باشد
+    # تا دو تغییر در یک ثانیه هم باعث 304 اشتباه نشوند
+    previous = cache.get(changed_at_key) or 0
+    cache.set(changed_at_key, max(int(time.time()), previous + 1), timeout=None)
+    return version
+
+
+def catalog_version(shop_id):
+    """نسخه فعلی کاتالوگ فروشگاه (همراه با نسخه سراسری)"""
+    shop_key = VERSION_KEY.format(shop_id=shop_id)
+    versions = cache.get_many([shop_key, GLOBAL_VERSION_KEY])
+
+    shop_version = versions.get(shop_key)
+    if shop_version is None:
+        shop_version = _get_version(shop_key, CHANGED_AT_KEY.format(shop_id=shop_id))
+
+    global_version = versions.get(GLOBAL_VERSION_KEY)
+    if global_version is None:
+        global_version = _get_version(GLOBAL_VERSION_KEY, GLOBAL_CHANGED_AT_KEY)
+
+    return f'{shop_version}.{global_version}'
+
+
+def catalog_last_modified(shop_id):
+    """
+    زمان آخرین تغییر کاتالوگ فروشگاه (datetime با timezone) یا None اگر نامعلوم است
+    اگر کلیدها از کش حذف شده باشند زمان جدید ثبت می‌شود که فقط باعث ارسال پاسخ کامل می‌شود
+    """
+    changed_at = cache.get_many([CHANGED_AT_KEY.format(shop_id=shop_id), GLOBAL_CHANGED_AT_KEY])
+    if len(changed_at) < 2:
+        return None
+    return datetime.fromtimestamp(max(changed_at.values()), tz=dt_timezone.utc)
+
+
+def bump_catalog_version(shop_id):
+    """باطل کردن کش ویترین یک فروشگاه"""
+    return _bump_version(VERSION_KEY.format(shop_id=shop_id), CHANGED_AT_KEY.format(shop_id=shop_id))
+
+
+def bump_global_catalog_version():
+    """باطل کردن کش ویترین همه فروشگاه‌ها (مثلاً تغییر دسته‌بندی‌ها)"""
+    return _bump_version(GLOBAL_VERSION_KEY, GLOBAL_CHANGED_AT_KEY)
+
+
+# ------------------------------------------------------------
+# 2. کلید و خواندن/نوشتن کش
+# ------------------------------------------------------------
+
+def storefront_vary(params):
+    """پارامترهای مؤثر بر محتوا به صورت مرتب‌شده (برای کلید کش)"""
+    return tuple(
+        (name, tuple(sorted(params.getlist(name))))
+        for name in STOREFRONT_VARY_PARAMS
+        if params.getlist(name)
+    )
+
+
+def catalog_cache_key(kind, shop_id, *parts, version=None):
+    """کلید کش شامل نوع محتوا، فروشگاه، نسخه کاتالوگ و ورودی‌های مؤثر"""
+    if version is None:
+        version = catalog_version(shop_id)
+    digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    return f'catalog:{kind}:{shop_id}:{version}:{digest}'
+
+
+def cache_get(key, kind):
+    value = cache.get(key)
+    catalog_cache_requests.labels(kind=kind, result='miss' if value is None else 'hit').inc()
+    return value
+
+
+def cache_set(key, value):
+    cache.set(key, value, get_cache_timeout())
+
+
+# ------------------------------------------------------------
+# 3. کش کامل پاسخ API
+# ------------------------------------------------------------
+
+def cache_catalog_response(kind):
+    """
+    کش کامل پاسخ GET برای APIهای عمومی کاتالوگ (متد list/get ویو DRF)
+    پاسخ‌های HTML به خاطر توکن CSRF و پیام‌های کاربر در base.html در سطح قطعه کش می‌شوند
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            shop = getattr(request, 'shop', None)
+            if shop is None:
+                return method(view, request, *args, **kwargs)
+
+            query = tuple(sorted(
+                (name, tuple(values)) for name, values in request.query_params.lists()
+            ))
+            key = catalog_cache_key(kind, shop.id, request.path, query)
+
+            data = cache_get(key, kind)
+            if data is not None:
+                return Response(data)
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache_set(key, response.data)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,73 @@
+# products/conditional.py
+"""
+درخواست شرطی (ETag / Last-Modified) برای ویترین و APIهای محصولات
+
+ETag و Last-Modified فقط از نسخه کاتالوگ فروشگاه در کش ساخته می‌شوند؛ پس پاسخ 304
+قبل از اجرای کوئری‌ها، serializer و قالب برگردانده می‌شود.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .cache import catalog_version, catalog_last_modified
+
+
+def _has_pending_messages(request):
+    # len() پیام‌ها را «خوانده‌شده» علامت نمی‌زند
+    return bool(len(get_messages(request)))
+
+
+def catalog_condition(private=False):
+    """
+    Decorator برای متد get ویو (با method_decorator)
+
+    private=True برای صفحات HTML که نام کاربر و توکن CSRF در آن‌ها هست:
+    ETag به کاربر وابسته است و اگر پیام (messages) در صف باشد پاسخ کامل ارسال می‌شود.
+    """
+    def shop_for(request):
+        shop = getattr(request, 'shop', None)
+        if shop is None:
+            return None
+        if private and _has_pending_messages(request):
+            return None
+        return shop
+
+    def etag_func(request, *args, **kwargs):
+        shop = shop_for(request)
+        if shop is None:
+            return None
+
+        parts = [
+            catalog_version(shop.id),
+            settings.INSTASTORE_CONFIG.get('RELEASE_VERSION', ''),
+        ]
+        if private:
+            parts.append(request.user.pk or 'anon')
+
+        return hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        shop = shop_for(request)
+        if shop is None:
+            return None
+        return catalog_last_modified(shop.id)
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header('ETag'):
+                # مرورگر هر بار اعتبارسنجی کند؛ پاسخ HTML نباید در کش مشترک بماند
+                if private:
+                    patch_cache_control(response, no_cache=True, private=True)
+                else:
+                    patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
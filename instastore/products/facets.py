@@ -0,0 +1,196 @@
+# products/facets.py
+"""
+ایندکس فیلترهای ویترین (رنگ / سایز / بازه قیمت)
+شمارش فیلترها و شناسه محصولات فیلترشده با یک کوئری روی ProductFacet محاسبه می‌شود
+"""
+
+from decimal import Decimal, InvalidOperation
+import logging
+
+from django.db import transaction
+
+from .models import Product, ProductVariant, ProductFacet
+
+logger = logging.getLogger('instastore')
+
+# مرز بالای هر بازه قیمت (تومان) - آخرین بازه بدون سقف است
+PRICE_BUCKETS = (100000, 250000, 500000, 1000000, 2000000)
+
+
+def price_bucket_for(price):
+    """شماره بازه قیمت برای یک مبلغ"""
+    for index, upper in enumerate(PRICE_BUCKETS):
+        if price < upper:
+            return index
+    return len(PRICE_BUCKETS)
+
+
+def price_bucket_label(bucket):
+    """بازه قیمت به صورت (حداقل، حداکثر) - حداکثر برای آخرین بازه None است"""
+    lower = PRICE_BUCKETS[bucket - 1] if bucket > 0 else 0
+    upper = PRICE_BUCKETS[bucket] if bucket < len(PRICE_BUCKETS) else None
+    return lower, upper
+
+
+# ------------------------------------------------------------
+# 1. به‌روزرسانی ایندکس
+# ------------------------------------------------------------
+
+def _facet_values(variant, product):
+    price = product.base_price + variant.price_adjustment
+    return {
+        'shop_id': product.shop_id,
+        'product_id': product.id,
+        'color': variant.color or '',
+        'size': variant.size or '',
+        'price': price,
+        'price_bucket': price_bucket_for(price),
+        'in_stock': variant.stock > 0,
+        'is_active': product.is_active,
+    }
+
+
+def sync_variant_facet(variant):
+    """به‌روزرسانی افزایشی ردیف ایندکس یک واریانت"""
+    # decrease_stock موجودی را با F() ذخیره می‌کند
+    if not isinstance(variant.stock, int):
+        variant.refresh_from_db(fields=['stock'])
+
+    ProductFacet.objects.update_or_create(
+        variant=variant,
+        defaults=_facet_values(variant, variant.product)
+    )
+
+
+def refresh_product_facets(product_ids):
+    """
+    بازسازی ردیف‌های ایندکس چند محصول
+    برای تغییر قیمت پایه/وضعیت محصول و عملیات bulk که سیگنال ندارند
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return 0
+
+    products = {
+        p.id: p for p in Product.objects.filter(id__in=product_ids).only(
+            'id', 'shop_id', 'base_price', 'is_active'
+        )
+    }
+    variants = ProductVariant.objects.filter(product_id__in=product_ids).only(
+        'id', 'product_id', 'color', 'size', 'stock', 'price_adjustment'
+    )
+
+    rows = [
+        ProductFacet(variant_id=v.id, **_facet_values(v, products[v.product_id]))
+        for v in variants
+    ]
+
+    with transaction.atomic():
+        ProductFacet.objects.filter(product_id__in=product_ids).delete()
+        ProductFacet.objects.bulk_create(rows, batch_size=500)
+
+    return len(rows)
+
+
+def rebuild_shop_facets(shop):
+    """بازسازی کامل ایندکس یک فروشگاه"""
+    product_ids = Product.objects.filter(shop=shop).values_list('id', flat=True)
+    return refresh_product_facets(product_ids)
+
+
+# ------------------------------------------------------------
+# 2. جستجو و شمارش
+# ------------------------------------------------------------
+
+def _parse_price(value):
+    if value in (None, ''):
+        return None
+    try:
+        price = Decimal(str(value).replace(',', ''))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    # NaN/sNaN/Infinity در مقایسه با قیمت‌ها InvalidOperation می‌دهند
+    return price if price.is_finite() else None
+
+
+def parse_facet_params(params):
+    """
+    خواندن فیلترها از QueryDict
+    ?color=قرمز&color=مشکی&size=XL&price_min=100000&price_max=500000
+    """
+    return {
+        'colors': [c for c in params.getlist('color') if c],
+        'sizes': [s for s in params.getlist('size') if s],
+        'price_min': _parse_price(params.get('price_min')),
+        'price_max': _parse_price(params.get('price_max')),
+    }
+
+
+def has_active_filters(filters):
+    return bool(
+        filters['colors'] or filters['sizes'] or
+        filters['price_min'] is not None or filters['price_max'] is not None
+    )
+
+
+def search_facets(shop, colors=(), sizes=(), price_min=None, price_max=None):
+    """
+    شناسه محصولات منطبق با فیلترها + شمارش هر گزینه فیلتر
+
+    یک محصول منطبق است اگر حداقل یک واریانت موجود داشته باشد که همزمان با
+    همه فیلترها جور باشد. شمارش هر گروه (مثلاً رنگ) با در نظر گرفتن فیلترهای
+    گروه‌های دیگر محاسبه می‌شود تا کاربر بداند هر انتخاب چند نتیجه دارد.
+    """
+    colors = set(colors)
+    sizes = set(sizes)
+
+    rows = ProductFacet.objects.filter(
+        shop=shop,
+        is_active=True,
+        in_stock=True
+    ).values_list('product_id', 'color', 'size', 'price', 'price_bucket')
+
+    matched = set()
+    color_products = {}
+    size_products = {}
+    bucket_products = {}
+
+    for product_id, color, size, price, bucket in rows:
+        color_ok = not colors or color in colors
+        size_ok = not sizes or size in sizes
+        price_ok = (
+            (price_min is None or price >= price_min) and
+            (price_max is None or price <= price_max)
+        )
+
+        if color_ok and size_ok and price_ok:
+            matched.add(product_id)
+        if color and size_ok and price_ok:
+            color_products.setdefault(color, set()).add(product_id)
+        if size and color_ok and price_ok:
+            size_products.setdefault(size, set()).add(product_id)
+        if color_ok and size_ok:
+            bucket_products.setdefault(bucket, set()).add(product_id)
+
+    prices = []
+    for bucket in sorted(bucket_products):
+        lower, upper = price_bucket_label(bucket)
+        prices.append({
+            'bucket': bucket,
+            'min': lower,
+            'max': upper,
+            'count': len(bucket_products[bucket]),
+        })
+
+    return {
+        'product_ids': matched,
+        'colors': [
+            {'value': c, 'count': len(ids), 'selected': c in colors}
+            for c, ids in sorted(color_products.items())
+        ],
+        'sizes': [
+            {'value': s, 'count': len(ids), 'selected': s in sizes}
+            for s, ids in sorted(size_products.items())
+        ],
+        'prices': prices,
+    }
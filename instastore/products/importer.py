@@ -0,0 +1,559 @@
+# products/importer.py
+"""
+ورود گروهی محصولات از فایل CSV/XLSX (به همراه یک فایل zip تصاویر)
+
+هر سطر فایل یک واریانت است و سطرهای با کد کالای (SKU) یکسان یک محصول را می‌سازند.
+عنوان ستون‌ها فارسی (مثل فایل خروجی محصولات) یا انگلیسی پذیرفته می‌شود:
+
+    کد کالا | نام محصول | دسته‌بندی | قیمت پایه | وضعیت | رنگ | سایز | موجودی | افزایش قیمت | تصاویر
+
+- سطرها stream خوانده و همان لحظه اعتبارسنجی می‌شوند؛ خطای هر سطر با شماره سطر گزارش
+  و بقیه فایل وارد می‌شود
+- محصول با SKU موجود به‌روزرسانی می‌شود؛ خانه خالی یعنی مقدار فعلی حفظ شود
+- نوشتن در دسته‌های BATCH_SIZE محصولی با bulk_create / bulk_update؛ تعداد کوئری‌ها به
+  تعداد دسته‌ها بستگی دارد نه تعداد سطرها
+- سقف محصولات پلن (Plan.max_products) برای محصولات فعال جدید رعایت می‌شود
+- تصاویر بعد از commit در پس‌زمینه از zip خوانده و ذخیره می‌شوند
+"""
+
+import logging
+import os
+import shutil
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from instastore.spreadsheets import iter_table
+
+from .cache import bump_catalog_version
+from .facets import refresh_product_facets
+from .models import Category, Product, ProductImage, ProductVariant
+from .numbers import MAX_PRICE, MAX_STOCK, parse_integer
+
+logger = logging.getLogger('instastore')
+
+DEFAULT_CATALOG_IMPORT = {
+    'BATCH_SIZE': 500,                     # تعداد محصول در هر دسته نوشتن
+    'MAX_ROWS': 20000,
+    'MAX_ERRORS': 500,                     # بیشتر از این فقط شمرده می‌شود
+    'MAX_IMAGES_PER_PRODUCT': 10,
+    'MAX_IMAGE_SIZE': 10 * 1024 * 1024,
+    'ASYNC': True,                         # False: ذخیره تصاویر همان لحظه بعد از commit
+    'ROOT': os.path.join(settings.BASE_DIR, 'private', 'imports'),
+}
+
+# نام ستون -> عنوان‌های قابل قبول
+COLUMNS = {
+    'sku': ('sku', 'کد کالا'),
+    'name': ('name', 'نام محصول'),
+    'category': ('category', 'دسته‌بندی'),
+    'base_price': ('base_price', 'price', 'قیمت پایه'),
+    'is_active': ('is_active', 'status', 'وضعیت'),
+    'brand': ('brand', 'برند'),
+    'material': ('material', 'جنس'),
+    'description': ('description', 'توضیحات'),
+    'color': ('color', 'رنگ'),
+    'size': ('size', 'سایز'),
+    'stock': ('stock', 'موجودی'),
+    'price_adjustment': ('price_adjustment', 'افزایش قیمت'),
+    'images': ('images', 'تصاویر'),
+}
+
+HEADER_LOOKUP = {alias.lower(): column for column, aliases in COLUMNS.items() for alias in aliases}
+
+TRUE_VALUES = {'1', 'true', 'yes', 'بله', 'فعال'}
+FALSE_VALUES = {'0', 'false', 'no', 'خیر', 'غیرفعال'}
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+PRODUCT_TEXT_FIELDS = ('name', 'brand', 'material', 'description')
+
+
+def get_import_config():
+    config = dict(DEFAULT_CATALOG_IMPORT)
+    config.update(getattr(settings, 'CATALOG_IMPORT', {}))
+    return config
+
+
+class RowError(ValueError):
+    """خطای یک سطر فایل (سطر وارد نمی‌شود)"""
+
+
+class ImportReport:
+    """نتیجه ورود: شمارش‌ها و خطای سطرها"""
+
+    def __init__(self, max_errors=500):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.variants_created = 0
+        self.variants_updated = 0
+        self.images_queued = 0
+        self.errors = []
+        self.error_count = 0
+        self.max_errors = max_errors
+
+    def add_error(self, row, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'message': message})
+
+    @property
+    def imported(self):
+        return self.created + self.updated
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'variants_created': self.variants_created,
+            'variants_updated': self.variants_updated,
+            'images_queued': self.images_queued,
+            'error_count': self.error_count,
+        }
+
+
+# ------------------------------------------------------------
+# 1. اعتبارسنجی سطرها
+# ------------------------------------------------------------
+
+def _max_length(model, field):
+    return model._meta.get_field(field).max_length
+
+
+def _text(values, column, max_length=None):
+    value = values.get(column, '').strip()
+    if max_length and len(value) > max_length:
+        raise RowError(f"«{COLUMNS[column][-1]}» بیشتر از {max_length} کاراکتر است")
+    return value
+
+
+def _number(values, column, allow_negative=False, maximum=MAX_PRICE):
+    """عدد صحیح (ارقام فارسی و جداکننده هزارگان پذیرفته می‌شود) - خانه خالی: None"""
+    value = values.get(column, '').strip().translate(DIGITS).replace(',', '').replace('٬', '')
+    return parse_integer(
+        value, f"«{COLUMNS[column][-1]}»", allow_negative=allow_negative, maximum=maximum, error=RowError
+    )
+
+
+def _boolean(values, column):
+    value = values.get(column, '').strip().lower()
+    if not value:
+        return None
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise RowError(f"«{COLUMNS[column][-1]}» نامعتبر است: {value}")
+
+
+def _category_lookup():
+    """دسته‌بندی‌ها با slug یا نام (بدون حساسیت به حروف) - یک کوئری"""
+    lookup = {}
+    for category_id, slug, name in Category.objects.values_list('id', 'slug', 'name'):
+        lookup[slug.lower()] = category_id
+        lookup[name.strip().lower()] = category_id
+    return lookup
+
+
+def _image_index(archive, config):
+    """نام فایل (بدون مسیر، حروف کوچک) -> نام ورودی zip برای تصاویر مجاز"""
+    index = {}
+    for info in archive.infolist():
+        name = os.path.basename(info.filename)
+        if info.is_dir() or not name or name.startswith('.'):
+            continue
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        # اندازه از سربرگ zip خوانده می‌شود (بدون باز کردن فایل)
+        if info.file_size > config['MAX_IMAGE_SIZE']:
+            continue
+        index.setdefault(name.lower(), info.filename)
+    return index
+
+
+def parse_row(values, categories):
+    """
+    اعتبارسنجی یک سطر (dict نام ستون -> متن)
+    خروجی: (sku، فیلدهای محصول، کلید واریانت، فیلدهای واریانت، نام تصاویر)
+    مقدار None در فیلدها یعنی خانه خالی
+    """
+    sku = _text(values, 'sku', _max_length(Product, 'sku'))
+    if not sku:
+        raise RowError("کد کالا (SKU) خالی است")
+
+    fields = {field: _text(values, field, _max_length(Product, field)) or None for field in PRODUCT_TEXT_FIELDS}
+    fields['base_price'] = _number(values, 'base_price')
+    fields['is_active'] = _boolean(values, 'is_active')
+
+    category = _text(values, 'category').lower()
+    fields['category_id'] = None
+    if category:
+        if category not in categories:
+            raise RowError(f"دسته‌بندی «{values['category']}» وجود ندارد")
+        fields['category_id'] = categories[category]
+
+    key = (
+        _text(values, 'size', _max_length(ProductVariant, 'size')),
+        _text(values, 'color', _max_length(ProductVariant, 'color')),
+    )
+    variant = {
+        'stock': _number(values, 'stock', maximum=MAX_STOCK),
+        'price_adjustment': _number(values, 'price_adjustment', allow_negative=True),
+    }
+
+    images = [
+        name.strip() for name in values.get('images', '').replace('،', ';').replace(',', ';').split(';')
+        if name.strip()
+    ]
+    return sku, fields, key, variant, images
+
+
+def _new_spec(row_number):
+    return {'row': row_number, 'rows': [], 'fields': {}, 'variants': {}, 'images': []}
+
+
+def read_specs(data_file, filename, categories, image_index, report, config):
+    """
+    خواندن و گروه‌بندی سطرها بر اساس SKU (ترتیب فایل حفظ می‌شود)
+    فیلدهای محصول از اولین سطری که مقدار دارد خوانده می‌شوند
+    """
+    specs = {}
+    max_images = config['MAX_IMAGES_PER_PRODUCT']
+
+    try:
+        for row_number, raw in iter_table(data_file, filename):
+            if report.rows >= config['MAX_ROWS']:
+                report.add_error(row_number, f"فایل بیشتر از {config['MAX_ROWS']} سطر دارد؛ بقیه سطرها خوانده نشد")
+                break
+            report.rows += 1
+
+            values = {HEADER_LOOKUP[header.lower()]: value for header, value in raw.items() if header.lower() in HEADER_LOOKUP}
+            if report.rows == 1 and 'sku' not in values:
+                raise ValueError("ستون «کد کالا» (sku) در فایل نیست")
+
+            try:
+                sku, fields, key, variant, images = parse_row(values, categories)
+                spec = specs.get(sku) or _new_spec(row_number)
+                if key in spec['variants']:
+                    raise RowError(f"رنگ «{key[1]}» و سایز «{key[0]}» برای این کالا تکراری است")
+            except RowError as e:
+                report.add_error(row_number, str(e))
+                continue
+
+            specs[sku] = spec
+            spec['rows'].append(row_number)
+            spec['variants'][key] = variant
+            for field, value in fields.items():
+                if value is not None:
+                    spec['fields'].setdefault(field, value)
+
+            for name in images:
+                entry = image_index.get(name.lower()) if image_index is not None else None
+                if entry is None:
+                    report.add_error(row_number, f"تصویر «{name}» در فایل zip نیست (یا بزرگ‌تر از حد مجاز است)")
+                elif entry not in spec['images'] and len(spec['images']) < max_images:
+                    spec['images'].append(entry)
+    except ValueError as e:
+        report.add_error(0, str(e))
+
+    return specs
+
+
+# ------------------------------------------------------------
+# 2. محصولات جدید و سقف پلن
+# ------------------------------------------------------------
+
+def _drop(specs, sku, report, message):
+    for row_number in specs.pop(sku)['rows']:
+        report.add_error(row_number, message)
+
+
+def check_new_products(shop, specs, existing, report):
+    """
+    محصولات جدید باید نام و قیمت داشته باشند و از سقف پلن بیشتر نشوند
+    (محصول غیرفعال سهمیه مصرف نمی‌کند؛ فعال شدن محصول غیرفعال موجود مصرف می‌کند)
+    """
+    from shops.annotations import get_shop_stat
+
+    remaining = shop.current_plan.max_products - get_shop_stat(shop, 'active_product_count')
+
+    for sku in list(specs):
+        fields = specs[sku]['fields']
+        if sku not in existing:
+            missing = [label for field, label in (('name', 'نام محصول'), ('base_price', 'قیمت پایه')) if field not in fields]
+            if missing:
+                _drop(specs, sku, report, f"برای کالای جدید «{sku}» {' و '.join(missing)} لازم است")
+                continue
+            activates = fields.get('is_active', True)
+        else:
+            activates = fields.get('is_active') is True and not existing[sku][1]
+
+        if activates:
+            if remaining <= 0:
+                _drop(specs, sku, report, f"سقف {shop.current_plan.max_products} محصول فعال پلن شما پر شده است")
+                continue
+            remaining -= 1
+
+    return specs
+
+
+# ------------------------------------------------------------
+# 3. نوشتن در دیتابیس
+# ------------------------------------------------------------
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _write_products(shop, batch, existing, report, now):
+    """ساخت/به‌روزرسانی محصولات یک دسته - خروجی: sku -> id"""
+    created = [
+        Product(
+            shop=shop,
+            sku=sku,
+            name=spec['fields']['name'],
+            base_price=spec['fields']['base_price'],
+            description=spec['fields'].get('description', ''),
+            brand=spec['fields'].get('brand', ''),
+            material=spec['fields'].get('material', ''),
+            category_id=spec['fields'].get('category_id'),
+            is_active=spec['fields'].get('is_active', True),
+        )
+        for sku, spec in batch if sku not in existing
+    ]
+    Product.objects.bulk_create(created)
+
+    ids = {product.sku: product.id for product in created}
+    updates = {existing[sku][0]: spec for sku, spec in batch if sku in existing}
+    products = Product.objects.in_bulk(list(updates))
+
+    update_fields = {'updated_at'}
+    for pk, product in products.items():
+        for field, value in updates[pk]['fields'].items():
+            setattr(product, field, value)
+            update_fields.add(field)
+        # bulk_update مقدار auto_now را خودش پر نمی‌کند
+        product.updated_at = now
+        ids[product.sku] = product.id
+    if products:
+        Product.objects.bulk_update(products.values(), sorted(update_fields))
+
+    report.created += len(created)
+    report.updated += len(products)
+    return ids, {product.id for product in created}
+
+
+def _write_variants(batch, ids, new_ids, report):
+    """ساخت/به‌روزرسانی واریانت‌ها؛ واریانت‌هایی که در فایل نیستند دست نمی‌خورند"""
+    current = {}
+    existing_ids = [pk for pk in ids.values() if pk not in new_ids]
+    if existing_ids:
+        variants = ProductVariant.objects.filter(product_id__in=existing_ids).only(
+            'id', 'product_id', 'size', 'color', 'stock', 'price_adjustment'
+        )
+        current = {(v.product_id, v.size, v.color): v for v in variants}
+
+    created, updated = [], []
+    for sku, spec in batch:
+        product_id = ids[sku]
+        for (size, color), values in spec['variants'].items():
+            variant = current.get((product_id, size, color))
+            if variant is None:
+                created.append(ProductVariant(
+                    product_id=product_id,
+                    size=size,
+                    color=color,
+                    stock=values['stock'] or 0,
+                    price_adjustment=values['price_adjustment'] or 0,
+                ))
+                continue
+            if values['stock'] is not None:
+                variant.stock = values['stock']
+            if values['price_adjustment'] is not None:
+                variant.price_adjustment = values['price_adjustment']
+            updated.append(variant)
+
+    ProductVariant.objects.bulk_create(created)
+    if updated:
+        ProductVariant.objects.bulk_update(updated, ['stock', 'price_adjustment'])
+
+    report.variants_created += len(created)
+    report.variants_updated += len(updated)
+
+
+def _image_jobs(batch, ids, new_ids):
+    """تصاویر فقط برای محصولاتی که هنوز تصویری ندارند (ورود دوباره فایل تصاویر را تکرار نمی‌کند)"""
+    wanted = {ids[sku]: spec for sku, spec in batch if spec['images']}
+    if not wanted:
+        return []
+    with_images = set(
+        ProductImage.objects.filter(
+            product_id__in=[pk for pk in wanted if pk not in new_ids]
+        ).values_list('product_id', flat=True).distinct()
+    )
+    return [
+        (product_id, spec['images'], spec['fields'].get('name', ''))
+        for product_id, spec in wanted.items() if product_id not in with_images
+    ]
+
+
+def import_catalog(shop, data_file, filename, images_zip=None, user=None, request=None):
+    """
+    ورود فایل محصولات یک فروشگاه
+    images_zip: فایل zip تصاویر (نام فایل‌ها در ستون «تصاویر» با ; جدا می‌شوند)
+    خروجی: ImportReport
+    """
+    from logs.models import ShopActivityLog
+
+    config = get_import_config()
+    report = ImportReport(config['MAX_ERRORS'])
+
+    if not shop.current_plan or not shop.is_subscription_active:
+        report.add_error(0, "برای ورود محصولات اشتراک فعال لازم است")
+        return report
+
+    image_index = None
+    if images_zip is not None:
+        try:
+            with zipfile.ZipFile(images_zip) as archive:
+                image_index = _image_index(archive, config)
+        except zipfile.BadZipFile:
+            report.add_error(0, "فایل zip تصاویر معتبر نیست")
+            return report
+
+    # SKUهای موجود فروشگاه و وضعیتشان با یک کوئری (تعداد محصولات هر فروشگاه محدود به پلن است)
+    existing = {
+        sku: (pk, is_active)
+        for sku, pk, is_active in Product.objects.filter(shop=shop).exclude(sku='').values_list('sku', 'id', 'is_active')
+    }
+
+    specs = read_specs(data_file, filename, _category_lookup(), image_index, report, config)
+    specs = check_new_products(shop, specs, existing, report)
+    if not specs:
+        return report
+
+    now = timezone.now()
+    jobs = []
+    with transaction.atomic():
+        for batch in _batches(list(specs.items()), config['BATCH_SIZE']):
+            ids, new_ids = _write_products(shop, batch, existing, report, now)
+            _write_variants(batch, ids, new_ids, report)
+            # bulk_create/bulk_update سیگنال ندارند؛ ایندکس فیلترها برای هر دسته یک بار
+            refresh_product_facets(ids.values())
+            jobs.extend(_image_jobs(batch, ids, new_ids))
+
+        if jobs:
+            report.images_queued = sum(len(entries) for _, entries, _ in jobs)
+            schedule_image_import(shop.id, images_zip, jobs, config)
+
+        shop_id = shop.id
+        transaction.on_commit(lambda: bump_catalog_version(shop_id))
+
+        ShopActivityLog.log_activity(
+            shop=shop,
+            action='CATALOG_IMPORTED',
+            category='PRODUCT',
+            user=user,
+            details=dict(report.as_dict(), filename=os.path.basename(filename)),
+            request=request,
+        )
+
+    logger.info(f"Catalog import for shop {shop.id}: {report.as_dict()}")
+    return report
+
+
+# ------------------------------------------------------------
+# 4. تصاویر در پس‌زمینه
+# ------------------------------------------------------------
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='catalog-import')
+        return _pool
+
+
+def _stage_archive(images_zip, config):
+    """کپی zip آپلودی (که بعد از پاسخ حذف می‌شود) برای کار پس‌زمینه"""
+    os.makedirs(config['ROOT'], exist_ok=True)
+    path = os.path.join(config['ROOT'], f"{uuid.uuid4().hex}.zip")
+    images_zip.seek(0)
+    with open(path, 'wb') as output:
+        shutil.copyfileobj(images_zip, output)
+    return path
+
+
+def attach_images(shop_id, path, jobs):
+    """
+    ذخیره تصاویر zip و ثبت ProductImage با bulk_create
+    (سیگنال‌ها اجرا نمی‌شوند؛ ارجاع blob، ساخت نسخه‌های کوچک و نسخه کاتالوگ همین‌جا)
+    """
+    from instastore.images import schedule_renditions
+    from instastore.storage import acquire_blob
+
+    alive = set(Product.objects.filter(id__in=[job[0] for job in jobs]).values_list('id', flat=True))
+    images = []
+    with zipfile.ZipFile(path) as archive:
+        for product_id, entries, alt_text in jobs:
+            if product_id not in alive:
+                continue
+            for entry in entries:
+                image = ProductImage(product_id=product_id, alt_text=alt_text[:200])
+                image.image.save(os.path.basename(entry), ContentFile(archive.read(entry)), save=False)
+                images.append(image)
+
+    with transaction.atomic():
+        ProductImage.objects.bulk_create(images, batch_size=500)
+        for image in images:
+            acquire_blob(image.image.name)
+            schedule_renditions(image.image.name)
+        transaction.on_commit(lambda: bump_catalog_version(shop_id))
+    return len(images)
+
+
+def _attach_safely(shop_id, path, jobs):
+    # خطای ذخیره تصاویر نباید درخواست یا thread پس‌زمینه را از کار بیندازد
+    try:
+        count = attach_images(shop_id, path, jobs)
+        logger.info(f"Catalog import for shop {shop_id}: {count} images attached")
+    except Exception as e:
+        logger.error(f"Catalog image import failed for shop {shop_id}: {str(e)}")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _attach_in_background(shop_id, path, jobs):
+    from django.db import close_old_connections
+
+    try:
+        _attach_safely(shop_id, path, jobs)
+    finally:
+        close_old_connections()
+
+
+def schedule_image_import(shop_id, images_zip, jobs, config):
+    """ذخیره تصاویر بعد از commit تراکنش جاری"""
+    path = _stage_archive(images_zip, config)
+
+    if not config['ASYNC']:
+        transaction.on_commit(lambda: _attach_safely(shop_id, path, jobs))
+        return
+
+    transaction.on_commit(lambda: _get_pool().submit(_attach_in_background, shop_id, path, jobs))
@@ -0,0 +1,266 @@
+# products/inventory.py
+"""
+همگام‌سازی گروهی موجودی و قیمت (برای فروشنده‌هایی که انبار را در اکسل یا POS نگه می‌دارند)
+
+    sync_inventory(shop, rows=[
+        {'variant_id': 12, 'stock': 5},
+        {'product': 'SKU-1', 'color': 'قرمز', 'size': 'XL', 'stock': 0, 'price_adjustment': 20000},
+    ], price_change={'mode': 'percent', 'value': 10})
+
+- شناسایی واریانت‌ها با چند کوئری روی کل مجموعه (نه یک کوئری برای هر سطر) و فقط در
+  محصولات همان فروشگاه؛ سطرهای ناشناخته یا متعلق به فروشگاه دیگر خطا گزارش می‌شوند
+- نوشتن فقط برای ردیف‌های تغییرکرده: روی PostgreSQL با UPDATE ... FROM (VALUES ...) و
+  روی بقیه دیتابیس‌ها با bulk_update، در دسته‌های WRITE_BATCH_SIZE
+- تغییر قیمت پایه (درصدی یا مبلغ ثابت) با یک UPDATE روی محصولات فروشگاه
+- ایندکس فیلترها و نسخه کاتالوگ یک بار برای کل درخواست به‌روز می‌شوند
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Greatest, Least, Round
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .facets import refresh_product_facets
+from .models import Product, ProductVariant
+from .numbers import MAX_ID, MAX_PRICE, MAX_STOCK, parse_id, parse_integer
+
+MAX_ROWS = 10000
+WRITE_BATCH_SIZE = 1000
+LOOKUP_BATCH_SIZE = 500
+
+PRICE_CHANGE_MODES = ('percent', 'fixed')
+
+# بازه ستون‌ها (products/numbers.py)
+MAX_PRICE_ADJUSTMENT = MAX_PRICE
+MAX_VARIANT_ID = MAX_ID
+
+
+class InventoryError(ValueError):
+    """درخواست نامعتبر (کل درخواست رد می‌شود)"""
+
+
+# ------------------------------------------------------------
+# 1. اعتبارسنجی سطرها
+# ------------------------------------------------------------
+
+def _integer(value, label, allow_negative=False, maximum=None):
+    return parse_integer(value, label, allow_negative=allow_negative, maximum=maximum, error=InventoryError)
+
+
+def _parse_row(row):
+    """(کلید شناسایی، موجودی، افزایش قیمت) - کلید: ('id', variant_id) یا ('key', product, size, color)"""
+    if not isinstance(row, dict):
+        raise ValueError("هر سطر باید یک شیء باشد")
+
+    stock = _integer(row.get('stock'), 'موجودی', maximum=MAX_STOCK)
+    price_adjustment = _integer(
+        row.get('price_adjustment'), 'افزایش قیمت', allow_negative=True, maximum=MAX_PRICE_ADJUSTMENT
+    )
+    if stock is None and price_adjustment is None:
+        raise ValueError("موجودی یا افزایش قیمت لازم است")
+
+    if row.get('variant_id') not in (None, ''):
+        variant_id = _integer(row['variant_id'], 'شناسه تنوع', maximum=MAX_VARIANT_ID)
+        return ('id', int(variant_id)), stock, price_adjustment
+
+    product = str(row.get('product') or row.get('sku') or '').strip()
+    if not product:
+        raise ValueError("variant_id یا product (شناسه یا کد کالا) لازم است")
+    key = ('key', product, str(row.get('size') or '').strip(), str(row.get('color') or '').strip())
+    return key, stock, price_adjustment
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _resolve_variants(shop, keys):
+    """
+    کلیدهای سطرها -> واریانت (فقط محصولات همین فروشگاه)
+    تعداد کوئری‌ها به تعداد دسته‌های LOOKUP_BATCH_SIZE بستگی دارد نه تعداد سطرها
+    """
+    fields = ('id', 'product_id', 'size', 'color', 'stock', 'price_adjustment')
+    scoped = ProductVariant.objects.filter(product__shop=shop).only(*fields)
+    resolved = {}
+
+    variant_ids = [key[1] for key in keys if key[0] == 'id']
+    for chunk in _chunks(variant_ids, LOOKUP_BATCH_SIZE):
+        for variant in scoped.filter(id__in=chunk):
+            resolved[('id', variant.id)] = variant
+
+    # product می‌تواند شناسه عددی یا کد کالا باشد
+    references = {key[1] for key in keys if key[0] == 'key'}
+    product_ids = {}
+    for chunk in _chunks(references, LOOKUP_BATCH_SIZE):
+        # '²'.isdigit() هم True است؛ parse_id فقط ارقام ASCII در بازه شناسه را می‌پذیرد
+        numeric = [pk for pk in map(parse_id, chunk) if pk is not None]
+        for pk, sku in Product.objects.filter(shop=shop, sku__in=chunk).values_list('id', 'sku'):
+            product_ids[sku] = pk
+        for pk in Product.objects.filter(shop=shop, id__in=numeric).values_list('id', flat=True):
+            product_ids.setdefault(str(pk), pk)
+
+    for chunk in _chunks(set(product_ids.values()), LOOKUP_BATCH_SIZE):
+        variants = {(v.product_id, v.size, v.color): v for v in scoped.filter(product_id__in=chunk)}
+        for key in keys:
+            if key[0] == 'key' and key[1] in product_ids:
+                variant = variants.get((product_ids[key[1]], key[2], key[3]))
+                if variant is not None:
+                    resolved[key] = variant
+
+    return resolved
+
+
+# ------------------------------------------------------------
+# 2. نوشتن
+# ------------------------------------------------------------
+
+def _update_from_values(variants):
+    """یک UPDATE با جدول VALUES برای هر دسته (PostgreSQL)"""
+    table = ProductVariant._meta.db_table
+    with connection.cursor() as cursor:
+        for chunk in _chunks(variants, WRITE_BATCH_SIZE):
+            values = ', '.join(['(%s::bigint, %s::integer, %s::numeric)'] * len(chunk))
+            params = []
+            for variant in chunk:
+                params.extend([variant.id, variant.stock, variant.price_adjustment])
+            cursor.execute(
+                f'UPDATE "{table}" AS v SET stock = data.stock, price_adjustment = data.price_adjustment '
+                f'FROM (VALUES {values}) AS data(id, stock, price_adjustment) WHERE v.id = data.id',
+                params
+            )
+
+
+def write_variants(variants):
+    if not variants:
+        return
+    if connection.vendor == 'postgresql':
+        _update_from_values(variants)
+    else:
+        ProductVariant.objects.bulk_update(variants, ['stock', 'price_adjustment'], batch_size=WRITE_BATCH_SIZE)
+
+
+def parse_price_change(price_change):
+    """{'mode': 'percent' | 'fixed', 'value': عدد} - درصد بین -90 و 500"""
+    if not price_change:
+        return None
+    if not isinstance(price_change, dict) or price_change.get('mode') not in PRICE_CHANGE_MODES:
+        raise InventoryError("price_change.mode باید percent یا fixed باشد")
+    try:
+        value = Decimal(str(price_change.get('value')))
+    except InvalidOperation:
+        raise InventoryError("price_change.value باید عدد باشد")
+    if not value.is_finite() or value == 0:
+        raise InventoryError("price_change.value نامعتبر است")
+    if price_change['mode'] == 'percent' and not (-90 <= value <= 500):
+        raise InventoryError("تغییر درصدی قیمت باید بین -90 و 500 باشد")
+    if price_change['mode'] == 'fixed' and abs(value) > MAX_PRICE_ADJUSTMENT:
+        raise InventoryError("price_change.value بیش از حد مجاز است")
+    return price_change['mode'], value
+
+
+def apply_price_change(shop, mode, value, now):
+    """تغییر قیمت پایه همه محصولات فروشگاه با یک UPDATE (بین 0 و سقف ستون numeric(12,0))"""
+    output_field = DecimalField(max_digits=12, decimal_places=0)
+    if mode == 'percent':
+        new_price = Round(F('base_price') * Value(1 + value / 100, output_field=DecimalField()))
+    else:
+        new_price = F('base_price') + Value(value, output_field=output_field)
+
+    products = Product.objects.filter(shop=shop)
+    product_ids = list(products.values_list('id', flat=True))
+    products.update(
+        base_price=Least(
+            Greatest(new_price, Value(0, output_field=output_field), output_field=output_field),
+            Value(MAX_PRICE, output_field=output_field),
+            output_field=output_field,
+        ),
+        updated_at=now,
+    )
+    return product_ids
+
+
+def sync_inventory(shop, rows=(), price_change=None, user=None, request=None):
+    """
+    به‌روزرسانی موجودی/افزایش قیمت واریانت‌ها و در صورت نیاز قیمت پایه محصولات
+    خروجی: شمارش‌ها و خطاهای سطرها (سطرهای معتبر اعمال می‌شوند)
+    """
+    from logs.models import ShopActivityLog
+
+    rows = list(rows or [])
+    if len(rows) > MAX_ROWS:
+        raise InventoryError(f"حداکثر {MAX_ROWS} سطر در هر درخواست")
+    change = parse_price_change(price_change)
+    if not rows and change is None:
+        raise InventoryError("rows یا price_change لازم است")
+
+    errors = []
+    parsed = {}
+    for index, row in enumerate(rows):
+        try:
+            key, stock, price_adjustment = _parse_row(row)
+        except ValueError as e:
+            errors.append({'index': index, 'message': str(e)})
+            continue
+        if key in parsed:
+            errors.append({'index': index, 'message': "این تنوع در درخواست تکراری است"})
+            continue
+        parsed[key] = (index, stock, price_adjustment)
+
+    resolved = _resolve_variants(shop, list(parsed))
+
+    changed, unchanged = {}, 0
+    for key, (index, stock, price_adjustment) in parsed.items():
+        variant = resolved.get(key)
+        if variant is None:
+            errors.append({'index': index, 'message': "تنوع در محصولات این فروشگاه پیدا نشد"})
+            continue
+        if variant.id in changed:
+            errors.append({'index': index, 'message': "این تنوع در درخواست تکراری است"})
+            continue
+        before = (variant.stock, variant.price_adjustment)
+        if stock is not None:
+            variant.stock = int(stock)
+        if price_adjustment is not None:
+            variant.price_adjustment = price_adjustment
+        if (variant.stock, variant.price_adjustment) != before:
+            changed[variant.id] = variant
+        else:
+            unchanged += 1
+
+    now = timezone.now()
+    product_ids = {variant.product_id for variant in changed.values()}
+    with transaction.atomic():
+        write_variants(list(changed.values()))
+        if change is not None:
+            product_ids.update(apply_price_change(shop, *change, now))
+
+        # bulk_update و UPDATE سیگنال ندارند؛ ایندکس و کش یک بار برای کل درخواست
+        for chunk in _chunks(product_ids, LOOKUP_BATCH_SIZE):
+            refresh_product_facets(chunk)
+        if product_ids:
+            shop_id = shop.id
+            transaction.on_commit(lambda: bump_catalog_version(shop_id))
+
+        result = {
+            'updated': len(changed),
+            'unchanged': unchanged,
+            'products_affected': len(product_ids),
+            'price_change': {'mode': change[0], 'value': str(change[1])} if change else None,
+            'error_count': len(errors),
+        }
+        ShopActivityLog.log_activity(
+            shop=shop,
+            action='INVENTORY_SYNCED',
+            category='PRODUCT',
+            user=user,
+            details=result,
+            request=request,
+        )
+
+    result['errors'] = sorted(errors, key=lambda error: error['index'])
+    return result
@@ -0,0 +1,67 @@
+from concurrent.futures import as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from instastore.images import get_pipeline_config, get_process_pool, render_renditions, save_renditions
+from orders.models import OrderItem
+from products.models import ProductImage, ImageRendition
+from shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = 'ساخت نسخه‌های کوچک‌شده (WebP/JPEG + placeholder) برای تصاویر موجود'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='ساخت دوباره حتی اگر نسخه‌ها موجودند')
+        parser.add_argument('--batch', type=int, default=50, help='تعداد فایل در هر دسته (محدودیت حافظه)')
+
+    def handle(self, *args, **options):
+        names = set()
+        names.update(ProductImage.objects.exclude(image='').values_list('image', flat=True))
+        names.update(Shop.objects.exclude(logo='').exclude(logo__isnull=True).values_list('logo', flat=True))
+        names.update(
+            OrderItem.objects.exclude(product_image='').exclude(product_image__isnull=True)
+            .values_list('product_image', flat=True)
+        )
+
+        if not options['force']:
+            names -= set(ImageRendition.objects.filter(source__in=names).values_list('source', flat=True))
+
+        names = sorted(names)
+        self.stdout.write(f"{len(names)} فایل برای پردازش")
+
+        config = get_pipeline_config()
+        executor = get_process_pool()
+        done = failed = 0
+
+        for start in range(0, len(names), options['batch']):
+            futures = {}
+            for name in names[start:start + options['batch']]:
+                try:
+                    with default_storage.open(name, 'rb') as source:
+                        data = source.read()
+                except (FileNotFoundError, OSError) as e:
+                    self.stderr.write(f"{name}: {e}")
+                    failed += 1
+                    continue
+
+                future = executor.submit(
+                    render_renditions, data, config['WIDTHS'], config['FORMATS'],
+                    config['QUALITY'], config['PLACEHOLDER_WIDTH']
+                )
+                futures[future] = name
+
+            # پردازش موازی در process pool، ذخیره در همین پروسه
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    save_renditions(name, future.result())
+                    done += 1
+                except Exception as e:
+                    self.stderr.write(f"{name}: {e}")
+                    failed += 1
+
+            self.stdout.write(f"{done + failed}/{len(names)}")
+
+        self.stdout.write(self.style.SUCCESS(f"نسخه‌های تصاویر ساخته شد: {done} موفق، {failed} ناموفق."))
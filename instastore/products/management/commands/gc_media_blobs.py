@@ -0,0 +1,174 @@
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from instastore.storage import BLOB_PREFIX, is_blob
+from orders.models import OrderItem
+from products.models import ProductImage, ImageRendition, MediaBlob
+from shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = 'حذف فایل‌های محتوامحور بی‌ارجاع (اسکن موازی پوشه‌های blobs/)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='تعداد thread اسکن')
+        parser.add_argument('--grace-minutes', type=int, default=60,
+                            help='فایل‌هایی که در این مدت تغییر کرده‌اند حذف نمی‌شوند (آپلودهای در جریان)')
+        parser.add_argument('--recount', action='store_true', help='محاسبه دوباره شمارش ارجاع‌ها از جداول')
+        parser.add_argument('--dry-run', action='store_true', help='فقط گزارش، بدون حذف')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.cutoff = timezone.now() - timedelta(minutes=options['grace_minutes'])
+
+        if options['recount']:
+            self.recount()
+
+        self.release_orphan_renditions()
+
+        root = default_storage.path(BLOB_PREFIX)
+        if not os.path.isdir(root):
+            self.stdout.write('پوشه blobs وجود ندارد.')
+            return
+
+        shards = sorted(
+            entry.name for entry in os.scandir(root)
+            if entry.is_dir() and len(entry.name) == 2
+        )
+
+        deleted = freed = scanned = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for shard_scanned, shard_deleted, shard_freed in executor.map(self.collect_shard, shards):
+                scanned += shard_scanned
+                deleted += shard_deleted
+                freed += shard_freed
+
+        self.clean_temp_files(os.path.join(root, 'tmp'))
+
+        action = 'قابل حذف' if self.dry_run else 'حذف شد'
+        self.stdout.write(self.style.SUCCESS(
+            f"{scanned} فایل بررسی شد - {deleted} فایل {action} ({freed / 1024 / 1024:.1f} MB)"
+        ))
+
+    # ------------------------------------------------------------
+    # شمارش دوباره ارجاع‌ها
+    # ------------------------------------------------------------
+
+    def recount(self):
+        counts = Counter()
+        for queryset, field in (
+            (ProductImage.objects.all(), 'image'),
+            (Shop.objects.all(), 'logo'),
+            (OrderItem.objects.all(), 'product_image'),
+        ):
+            for name in queryset.values_list(field, flat=True).iterator(chunk_size=2000):
+                if is_blob(name):
+                    counts[name] += 1
+
+        for variants in ImageRendition.objects.values_list('variants', flat=True).iterator(chunk_size=2000):
+            for files in (variants or {}).values():
+                for _, name in files:
+                    if is_blob(name):
+                        counts[name] += 1
+
+        existing = {blob.name: blob for blob in MediaBlob.objects.all()}
+        to_update = []
+        for name, blob in existing.items():
+            refcount = counts.pop(name, 0)
+            if blob.refcount != refcount:
+                blob.refcount = refcount
+                blob.updated_at = timezone.now()
+                to_update.append(blob)
+
+        to_create = [MediaBlob(name=name, refcount=refcount) for name, refcount in counts.items()]
+
+        if not self.dry_run:
+            MediaBlob.objects.bulk_update(to_update, ['refcount', 'updated_at'], batch_size=500)
+            MediaBlob.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+
+        self.stdout.write(f"شمارش ارجاع: {len(to_update)} اصلاح، {len(to_create)} ردیف جدید")
+
+    # ------------------------------------------------------------
+    # نسخه‌های کوچک‌شده فایل‌های حذف‌شده
+    # ------------------------------------------------------------
+
+    def release_orphan_renditions(self):
+        """نسخه‌های تصویری که فایل اصلی‌اش دیگر ارجاعی ندارد؛ حذف آن ارجاع نسخه‌ها را آزاد می‌کند"""
+        dead_sources = MediaBlob.objects.filter(
+            refcount=0,
+            updated_at__lt=self.cutoff
+        ).values_list('name', flat=True)
+
+        renditions = ImageRendition.objects.filter(source__in=dead_sources)
+        count = renditions.count()
+        if count and not self.dry_run:
+            for rendition in renditions.iterator():
+                rendition.delete()  # سیگنال post_delete ارجاع نسخه‌ها را کم می‌کند
+        self.stdout.write(f"{count} نسخه تصویر بدون فایل اصلی")
+
+    # ------------------------------------------------------------
+    # اسکن یک shard
+    # ------------------------------------------------------------
+
+    def collect_shard(self, shard):
+        prefix = f"{BLOB_PREFIX}{shard}/"
+        scanned = deleted = freed = 0
+
+        try:
+            # فایل‌های زنده این shard با یک کوئری
+            live = set(
+                MediaBlob.objects.filter(name__startswith=prefix)
+                .exclude(refcount=0, updated_at__lt=self.cutoff)
+                .values_list('name', flat=True)
+            )
+            cutoff_ts = self.cutoff.timestamp()
+
+            for dirpath, _, filenames in os.walk(default_storage.path(prefix)):
+                for filename in filenames:
+                    scanned += 1
+                    path = os.path.join(dirpath, filename)
+                    name = prefix + os.path.relpath(path, default_storage.path(prefix)).replace(os.sep, '/')
+                    if name in live:
+                        continue
+
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if stat.st_mtime >= cutoff_ts:
+                        continue
+
+                    if self.dry_run:
+                        deleted += 1
+                        freed += stat.st_size
+                        continue
+
+                    # حذف ردیف فقط اگر هنوز بی‌ارجاع است (ارجاع جدید در این فاصله را از دست نده)
+                    MediaBlob.objects.filter(name=name, refcount=0, updated_at__lt=self.cutoff).delete()
+                    if MediaBlob.objects.filter(name=name).exists():
+                        continue
+
+                    os.remove(path)
+                    deleted += 1
+                    freed += stat.st_size
+        finally:
+            connection.close()
+
+        return scanned, deleted, freed
+
+    def clean_temp_files(self, temp_dir):
+        """فایل‌های موقت آپلودهای نیمه‌کاره"""
+        if not os.path.isdir(temp_dir) or self.dry_run:
+            return
+        cutoff_ts = time.time() - (timezone.now() - self.cutoff).total_seconds()
+        for entry in os.scandir(temp_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff_ts:
+                os.remove(entry.path)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from shops.models import Shop
+from products.facets import rebuild_shop_facets
+
+
+class Command(BaseCommand):
+    help = 'بازسازی ایندکس فیلتر رنگ/سایز/قیمت محصولات'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', help='slug فروشگاه (پیش‌فرض: همه فروشگاه‌ها)')
+
+    def handle(self, *args, **options):
+        shops = Shop.objects.all()
+        if options.get('shop'):
+            shops = shops.filter(slug=options['shop'])
+
+        total = 0
+        for shop in shops.iterator():
+            count = rebuild_shop_facets(shop)
+            total += count
+            self.stdout.write(f"{shop.slug}: {count} ردیف")
+
+        self.stdout.write(self.style.SUCCESS(f"ایندکس فیلترها بازسازی شد ({total} ردیف)."))
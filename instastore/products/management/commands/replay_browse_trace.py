@@ -0,0 +1,137 @@
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from shops.models import Shop
+
+# خط لاگ دسترسی nginx: ... "GET /shop/x/ HTTP/1.1" ...
+ACCESS_LOG_RE = re.compile(r'"GET (\S+) HTTP/[\d.]+"')
+
+
+class Command(BaseCommand):
+    help = (
+        'بازپخش یک مسیر مرور (لیست آدرس‌ها یا لاگ nginx) و اندازه‌گیری حجم و زمان CPU '
+        'صرفه‌جویی‌شده با درخواست‌های شرطی (ETag / Last-Modified)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trace', help='فایل مسیر: هر خط یک آدرس یا یک خط لاگ دسترسی nginx')
+        parser.add_argument('--shop', help='slug فروشگاه برای ساخت مسیر نمونه (بدون --trace)')
+        parser.add_argument('--rounds', type=int, default=5, help='تعداد دور مرور در مسیر نمونه')
+
+    def handle(self, *args, **options):
+        paths = self.load_trace(options)
+        if not paths:
+            raise CommandError('مسیر مرور خالی است.')
+
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+
+        # دور گرم کردن تا کش قطعه‌ها در هر دو حالت یکسان باشد
+        self.replay(paths, host, conditional=False)
+
+        baseline = self.replay(paths, host, conditional=False)
+        conditional = self.replay(paths, host, conditional=True)
+
+        self.stdout.write(f"تعداد درخواست: {len(paths)}")
+        self.report('بدون اعتبارسنجی', baseline)
+        self.report('با ETag', conditional)
+
+        saved_bytes = baseline['bytes'] - conditional['bytes']
+        saved_cpu = baseline['cpu'] - conditional['cpu']
+        self.stdout.write(self.style.SUCCESS(
+            f"صرفه‌جویی: {saved_bytes:,} بایت "
+            f"({self.percent(saved_bytes, baseline['bytes'])}) - "
+            f"{saved_cpu * 1000:.1f} میلی‌ثانیه CPU "
+            f"({self.percent(saved_cpu, baseline['cpu'])})"
+        ))
+
+    # ------------------------------------------------------------
+    # ساخت مسیر
+    # ------------------------------------------------------------
+
+    def load_trace(self, options):
+        if options.get('trace'):
+            paths = []
+            with open(options['trace'], encoding='utf-8') as trace_file:
+                for line in trace_file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    match = ACCESS_LOG_RE.search(line)
+                    if match:
+                        paths.append(match.group(1))
+                    elif line.startswith('/'):
+                        paths.append(line)
+            return paths
+
+        if not options.get('shop'):
+            raise CommandError('یکی از --trace یا --shop لازم است.')
+
+        try:
+            shop = Shop.objects.get(slug=options['shop'], is_active=True)
+        except Shop.DoesNotExist:
+            raise CommandError(f"فروشگاه '{options['shop']}' یافت نشد.")
+
+        # الگوی مرور داخل مرورگر اینستاگرام: صفحه فروشگاه -> محصول -> برگشت
+        store_url = reverse('frontend:shop-store', kwargs={'shop_slug': shop.slug})
+        product_ids = list(
+            shop.products.filter(is_active=True).values_list('id', flat=True)[:10]
+        )
+
+        paths = []
+        for _ in range(options['rounds']):
+            paths.append(store_url)
+            for product_id in product_ids:
+                paths.append(reverse('frontend:product-detail', kwargs={
+                    'shop_slug': shop.slug,
+                    'product_id': product_id,
+                }))
+                paths.append(store_url)
+        return paths
+
+    # ------------------------------------------------------------
+    # بازپخش
+    # ------------------------------------------------------------
+
+    def replay(self, paths, host, conditional):
+        client = Client(HTTP_HOST=host)
+        validators = {}
+        stats = {'bytes': 0, 'cpu': 0.0, 'not_modified': 0, 'errors': 0}
+
+        for path in paths:
+            headers = {}
+            if conditional and path in validators:
+                etag, last_modified = validators[path]
+                if etag:
+                    headers['HTTP_IF_NONE_MATCH'] = etag
+                if last_modified:
+                    headers['HTTP_IF_MODIFIED_SINCE'] = last_modified
+
+            started = time.process_time()
+            response = client.get(path, secure=True, **headers)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            stats['cpu'] += time.process_time() - started
+            stats['bytes'] += len(body)
+
+            if response.status_code == 304:
+                stats['not_modified'] += 1
+            elif response.status_code == 200:
+                validators[path] = (response.get('ETag'), response.get('Last-Modified'))
+            else:
+                stats['errors'] += 1
+
+        return stats
+
+    def report(self, label, stats):
+        self.stdout.write(
+            f"{label}: {stats['bytes']:,} بایت، CPU {stats['cpu'] * 1000:.1f} میلی‌ثانیه، "
+            f"304: {stats['not_modified']}، خطا: {stats['errors']}"
+        )
+
+    @staticmethod
+    def percent(part, whole):
+        return f"{(part / whole * 100):.0f}%" if whole else '-'
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-19 00:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('shops', '0002_alter_plan_options_alter_shop_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('color', models.CharField(blank=True, max_length=50, verbose_name='رنگ')),
+                ('size', models.CharField(blank=True, max_length=50, verbose_name='سایز')),
+                ('price', models.DecimalField(decimal_places=0, max_digits=12, verbose_name='قیمت مؤثر')),
+                ('price_bucket', models.PositiveSmallIntegerField(default=0, verbose_name='بازه قیمت')),
+                ('in_stock', models.BooleanField(default=False, verbose_name='موجود')),
+                ('is_active', models.BooleanField(default=True, verbose_name='محصول فعال')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='products.product', verbose_name='محصول')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_facets', to='shops.shop', verbose_name='فروشگاه')),
+                ('variant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='facet', to='products.productvariant', verbose_name='تنوع')),
+            ],
+            options={
+                'verbose_name': 'ایندکس فیلتر محصول',
+                'verbose_name_plural': 'ایندکس فیلتر محصولات',
+                'indexes': [models.Index(fields=['shop', 'is_active', 'in_stock'], name='products_pr_shop_id_69e0a8_idx'), models.Index(fields=['shop', 'color'], name='products_pr_shop_id_dfb1ff_idx'), models.Index(fields=['shop', 'size'], name='products_pr_shop_id_5c5075_idx'), models.Index(fields=['shop', 'price_bucket'], name='products_pr_shop_id_7d81e7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-19 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_productfacet'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='فایل اصلی')),
+                ('source_hash', models.CharField(max_length=64, verbose_name='هش فایل اصلی')),
+                ('width', models.PositiveIntegerField(verbose_name='عرض')),
+                ('height', models.PositiveIntegerField(verbose_name='ارتفاع')),
+                ('placeholder', models.TextField(blank=True, verbose_name='placeholder تار (data URI)')),
+                ('variants', models.JSONField(default=dict, verbose_name='نسخه\u200cها')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'نسخه تصویر',
+                'verbose_name_plural': 'نسخه\u200cهای تصاویر',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-19 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_imagerendition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='نام فایل')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='تعداد ارجاع')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'فایل مدیا',
+                'verbose_name_plural': 'فایل\u200cهای مدیا',
+                'indexes': [models.Index(fields=['refcount', 'updated_at'], name='products_me_refcoun_4b5c87_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-19 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_mediablob'),
+        ('shops', '0002_alter_plan_options_alter_shop_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='کد کالا (SKU)'),
+        ),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(condition=models.Q(('sku', ''), _negated=True), fields=('shop', 'sku'), name='unique_product_sku_per_shop'),
+        ),
+    ]
@@ -1,12 +1,18 @@
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Q, Sum
+from django.core.files.storage import default_storage
+from django.utils.functional import cached_property
 from shops.models import Shop
+from instastore.images import responsive_image
+from instastore.tracking import TrackedFieldsMixin
 
 class Category(models.Model):
     name = models.CharField(max_length=100, verbose_name='نام دسته‌بندی')
     slug = models.SlugField(max_length=100, unique=True, verbose_name='شناسه در URL')
     description = models.TextField(blank=True, verbose_name='توضیحات')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')
+    # نسخه داده‌های مرجع در حافظه (instastore/refdata.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='آخرین بروزرسانی')
     
     class Meta:
         verbose_name = 'دسته‌بندی'
@@ -21,6 +27,8 @@ class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='products', verbose_name='دسته‌بندی')
     
     name = models.CharField(max_length=200, verbose_name='نام محصول')
+    # کد کالای فروشنده؛ کلید به‌روزرسانی محصولات در ورود گروهی (یکتا در هر فروشگاه)
+    sku = models.CharField(max_length=64, blank=True, default='', verbose_name='کد کالا (SKU)')
     description = models.TextField(verbose_name='توضیحات محصول')
     
     # قیمت پایه (ممکن است بسته به سایز کمی تغییر کند، اما این قیمت مبنا است)
@@ -47,6 +55,13 @@ class Product(models.Model):
             models.Index(fields=['shop', 'is_active']),
             models.Index(fields=['category']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['shop', 'sku'],
+                condition=~Q(sku=''),
+                name='unique_product_sku_per_shop'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.shop.shop_name}"
@@ -83,10 +98,12 @@ class Product(models.Model):
         return self.variants.filter(stock__gt=0).values_list('color', flat=True).distinct()
 
 
-class ProductVariant(models.Model):
+class ProductVariant(TrackedFieldsMixin, models.Model):
     """
     مدل تنوع محصول: هر ردیف مشخص می‌کند از یک رنگ و سایز خاص چقدر داریم.
     """
+    tracked_fields = ('product', 'size', 'color', 'stock', 'price_adjustment')
+
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='variants', verbose_name='محصول')
     
     size = models.CharField(max_length=50, verbose_name='سایز')     # مثال: XL, 42
@@ -131,4 +148,95 @@ class ProductImage(models.Model):
 
     class Meta:
         verbose_name = 'تصویر محصول'
-        verbose_name_plural = 'تصاویر محصول'
\ No newline at end of file
+        verbose_name_plural = 'تصاویر محصول'
+
+    @cached_property
+    def responsive(self):
+        """آدرس‌های srcset نسخه‌های کوچک‌شده (یا آدرس اصلی اگر هنوز ساخته نشده‌اند)"""
+        return responsive_image(self.image)
+
+class ProductFacet(models.Model):
+    """
+    ایندکس فیلتر ویترین: هر ردیف یک واریانت با رنگ، سایز و قیمت مؤثرش
+    (به صورت denormalized تا فیلتر و شمارش‌ها با یک کوئری ایندکس‌شده انجام شود)
+    """
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='product_facets', verbose_name='فروشگاه')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='facets', verbose_name='محصول')
+    variant = models.OneToOneField(ProductVariant, on_delete=models.CASCADE, related_name='facet', verbose_name='تنوع')
+
+    color = models.CharField(max_length=50, blank=True, verbose_name='رنگ')
+    size = models.CharField(max_length=50, blank=True, verbose_name='سایز')
+
+    # قیمت پایه محصول + افزایش قیمت واریانت
+    price = models.DecimalField(max_digits=12, decimal_places=0, verbose_name='قیمت مؤثر')
+    price_bucket = models.PositiveSmallIntegerField(default=0, verbose_name='بازه قیمت')
+
+    in_stock = models.BooleanField(default=False, verbose_name='موجود')
+    is_active = models.BooleanField(default=True, verbose_name='محصول فعال')
+
+    class Meta:
+        verbose_name = 'ایندکس فیلتر محصول'
+        verbose_name_plural = 'ایندکس فیلتر محصولات'
+        indexes = [
+            models.Index(fields=['shop', 'is_active', 'in_stock']),
+            models.Index(fields=['shop', 'color']),
+            models.Index(fields=['shop', 'size']),
+            models.Index(fields=['shop', 'price_bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.color}/{self.size} - {self.price}"
+
+
+class ImageRendition(models.Model):
+    """
+    نسخه‌های کوچک‌شده یک فایل تصویر (WebP/JPEG در چند عرض + placeholder تار)
+    کلید، نام فایل اصلی در storage است تا بین ProductImage، لوگو و OrderItem مشترک باشد
+    """
+    source = models.CharField(max_length=255, unique=True, verbose_name='فایل اصلی')
+    source_hash = models.CharField(max_length=64, verbose_name='هش فایل اصلی')
+    width = models.PositiveIntegerField(verbose_name='عرض')
+    height = models.PositiveIntegerField(verbose_name='ارتفاع')
+    placeholder = models.TextField(blank=True, verbose_name='placeholder تار (data URI)')
+
+    # {"webp": [[320, "renditions/ab/...-320w.webp"], ...], "jpeg": [...]}
+    variants = models.JSONField(default=dict, verbose_name='نسخه‌ها')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'نسخه تصویر'
+        verbose_name_plural = 'نسخه‌های تصاویر'
+
+    def __str__(self):
+        return self.source
+
+    def urls(self, fmt):
+        """[(عرض، آدرس)] به ترتیب عرض"""
+        return [(width, default_storage.url(name)) for width, name in sorted(self.variants.get(fmt, []))]
+
+    def srcset(self, fmt):
+        return ', '.join(f"{url} {width}w" for width, url in self.urls(fmt))
+
+
+class MediaBlob(models.Model):
+    """
+    شمارش ارجاع‌ها به یک فایل محتوامحور (instastore/storage.py)
+    blob با refcount صفر بعد از مهلت مشخص توسط gc_media_blobs حذف می‌شود
+    """
+    name = models.CharField(max_length=255, unique=True, verbose_name='نام فایل')
+    refcount = models.PositiveIntegerField(default=0, verbose_name='تعداد ارجاع')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'فایل مدیا'
+        verbose_name_plural = 'فایل‌های مدیا'
+        indexes = [
+            models.Index(fields=['refcount', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount})"
@@ -0,0 +1,45 @@
+# products/numbers.py
+"""
+اعتبارسنجی عددهای صحیح ورودی‌ها (ورود گروهی کاتالوگ، ماتریس تنوع، همگام‌سازی موجودی)
+
+    parse_integer(value, 'موجودی', maximum=MAX_STOCK, error=RowError)
+
+- Infinity/NaN/sNaN و عددهای بیرون از بازه ستون رد می‌شوند تا در int() یا هنگام نوشتن
+  (OverflowError یا سرریز numeric) به خطای 500 نرسند
+- خطا با کلاس داده‌شده (error) ساخته می‌شود تا هر فراخوان آن را در گزارش خودش بیاورد
+"""
+
+from decimal import Decimal, InvalidOperation
+
+# بازه ستون‌ها: PositiveIntegerField، DecimalField(max_digits=12, decimal_places=0) و BigAutoField
+MAX_STOCK = 2147483647
+MAX_PRICE = 10 ** 12 - 1
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_integer(value, label, allow_negative=False, maximum=None, error=ValueError):
+    """عدد صحیح به صورت Decimal؛ خالی: None"""
+    if value in (None, ''):
+        return None
+    try:
+        number = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        raise error(f"{label} باید عدد باشد")
+    if not number.is_finite():
+        raise error(f"{label} نامعتبر است")
+    if maximum is not None and abs(number) > maximum:
+        raise error(f"{label} بیش از حد مجاز است")
+    if number != number.to_integral_value():
+        raise error(f"{label} باید عدد صحیح باشد")
+    if number < 0 and not allow_negative:
+        raise error(f"{label} نمی‌تواند منفی باشد")
+    return number
+
+
+def parse_id(value):
+    """شناسه عددی (فقط ارقام ASCII و در بازه BigAutoField)؛ وگرنه None"""
+    value = str(value)
+    if not (value.isascii() and value.isdigit()):
+        return None
+    number = int(value)
+    return number if 0 < number <= MAX_ID else None
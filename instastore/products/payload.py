@@ -0,0 +1,70 @@
+# products/payload.py
+"""
+داده آماده صفحه جزئیات محصول
+
+همه چیزهایی که صفحه محصول و API جزئیات لازم دارند (ماتریس واریانت‌ها، لیست رنگ/سایز،
+افزایش قیمت‌ها، آدرس تصاویر و خروجی serializer) یک بار ساخته و در کش نگه داشته می‌شود.
+کلید شامل نسخه کاتالوگ فروشگاه است؛ بعد از هر تغییر، اولین خواندن دوباره آن را می‌سازد.
+"""
+
+from instastore.images import responsive_images
+
+from .cache import catalog_cache_key, cache_get, cache_set
+from .models import Product
+
+
+def build_product_payload(shop_id, product_id):
+    """ساخت داده محصول با سه کوئری (محصول، تصاویر، واریانت‌ها) - None اگر محصول فعال نباشد"""
+    from .serializers import ProductDetailSerializer
+
+    product = Product.objects.filter(
+        id=product_id,
+        shop_id=shop_id,
+        is_active=True
+    ).select_related(
+        'category', 'shop__user', 'shop__current_plan'
+    ).prefetch_related('images', 'variants').first()
+
+    if product is None:
+        return None
+
+    images = sorted(product.images.all(), key=lambda img: img.id)
+    variants = sorted(product.variants.all(), key=lambda v: v.id)
+
+    in_stock = [v for v in variants if v.stock > 0]
+    responsive = responsive_images(img.image for img in images)
+
+    return {
+        'id': product.id,
+        'shop_id': product.shop_id,
+        'name': product.name,
+        'description': product.description,
+        'base_price': product.base_price,
+        # آدرس نسخه‌های کوچک‌شده برای srcset (تا ساخته شدن نسخه‌ها، فایل اصلی)
+        'images': responsive,
+        'main_image': responsive[0] if responsive else None,
+        'colors': sorted({v.color for v in in_stock if v.color}),
+        'sizes': sorted({v.size for v in in_stock if v.size}),
+        # ماتریس واریانت‌های موجود برای انتخاب رنگ/سایز در صفحه
+        'variants': [{
+            'id': v.id,
+            'color': v.color,
+            'size': v.size,
+            'stock': v.stock,
+            'price_adj': float(v.price_adjustment),
+        } for v in in_stock],
+        # خروجی کامل API (آدرس تصاویر نسبی است و در ویو absolute می‌شود)
+        'api': dict(ProductDetailSerializer(product).data),
+    }
+
+
+def get_product_payload(shop_id, product_id):
+    """خواندن داده محصول از کش یا ساخت آن بعد از تغییر کاتالوگ"""
+    key = catalog_cache_key('product-payload', shop_id, product_id)
+
+    payload = cache_get(key, 'payload')
+    if payload is None:
+        payload = build_product_payload(shop_id, product_id)
+        if payload is not None:
+            cache_set(key, payload)
+    return payload
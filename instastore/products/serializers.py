@@ -1,5 +1,6 @@
 # products/serializers.py
 from rest_framework import serializers
+from instastore.refdata import get_category
 from .models import Category, Product, ProductVariant, ProductImage
 from shops.serializers import ShopSerializer
 
@@ -10,6 +11,14 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'description', 'created_at']
         read_only_fields = ['slug', 'created_at']
 
+    def to_representation(self, instance):
+        # فیلد تو در تو با source='category_id': دسته‌بندی از داده‌های مرجع در حافظه (بدون کوئری)
+        if not isinstance(instance, Category):
+            instance = get_category(instance)
+            if instance is None:
+                return None
+        return super().to_representation(instance)
+
 class ProductImageSerializer(serializers.ModelSerializer):
     """Serializer برای تصاویر محصول"""
     class Meta:
@@ -29,7 +38,7 @@ class ProductVariantSerializer(serializers.ModelSerializer):
 class ProductListSerializer(serializers.ModelSerializer):
     """Serializer برای لیست محصولات (ساده‌تر)"""
     shop = ShopSerializer(read_only=True)
-    category = CategorySerializer(read_only=True)
+    category = CategorySerializer(source='category_id', read_only=True)
     total_stock = serializers.IntegerField(read_only=True)
     main_image = serializers.SerializerMethodField()
     
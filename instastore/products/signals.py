@@ -0,0 +1,228 @@
+# products/signals.py
+"""
+سیگنال‌های محصولات
+- نگهداری افزایشی ایندکس فیلترها
+- بالا بردن نسخه کاتالوگ برای باطل شدن کش ویترین
+- ساخت نسخه‌های کوچک‌شده تصاویر آپلودی
+- شمارش ارجاع به فایل‌های محتوامحور (MediaBlob)
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from shops.models import Shop
+from instastore.images import schedule_renditions
+from instastore.storage import (
+    acquire_blob, release_blob, remember_blob_reference, sync_blob_reference
+)
+
+from .models import Category, Product, ProductVariant, ProductImage, ImageRendition
+from .facets import sync_variant_facet, refresh_product_facets
+from .cache import bump_catalog_version, bump_global_catalog_version
+
+# فیلدهایی که روی ایندکس فیلتر و محتوای ویترین اثری ندارند
+FACET_NEUTRAL_FIELDS = {'views'}
+CATALOG_NEUTRAL_FIELDS = {'views'}
+
+
+_muted = threading.local()
+
+
+@contextmanager
+def mute_catalog_signals():
+    """
+    خاموش کردن به‌روزرسانی ایندکس و نسخه کاتالوگ برای تک‌تک ردیف‌ها
+    (عملیات گروهی خودش در پایان یک بار refresh_product_facets و bump_catalog_version را صدا می‌زند)
+    """
+    _muted.depth = getattr(_muted, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _muted.depth -= 1
+
+
+def catalog_signals_muted():
+    return getattr(_muted, 'depth', 0) > 0
+
+
+def _is_neutral_save(update_fields, neutral_fields):
+    return bool(update_fields) and set(update_fields) <= neutral_fields
+
+
+def _bump_on_commit(shop_id):
+    # بعد از commit تا درخواست همزمان نسخه جدید را با داده قدیمی پر نکند
+    transaction.on_commit(lambda: bump_catalog_version(shop_id))
+
+
+# ------------------------------------------------------------
+# 1. ایندکس فیلترها
+# ------------------------------------------------------------
+
+def _variant_facet_changed(variant):
+    """تغییر موجودی فقط وقتی روی ایندکس اثر دارد که موجود/ناموجود شدن را عوض کند"""
+    if variant.has_changed('product', 'size', 'color', 'price_adjustment'):
+        return True
+    if not variant.has_changed('stock'):
+        return False
+    if not isinstance(variant.stock, int):
+        return True
+    return ((variant.loaded_value('stock') or 0) > 0) != (variant.stock > 0)
+
+
+@receiver(post_save, sender=ProductVariant)
+def update_variant_facet(sender, instance, created, **kwargs):
+    """به‌روزرسانی ردیف ایندکس واریانت (حذف با CASCADE انجام می‌شود)"""
+    if catalog_signals_muted():
+        return
+    if not created and not _variant_facet_changed(instance):
+        return
+    sync_variant_facet(instance)
+
+
+@receiver(post_save, sender=Product)
+def update_product_facets(sender, instance, created, update_fields=None, **kwargs):
+    """تغییر قیمت پایه یا وضعیت محصول روی همه واریانت‌ها اثر دارد"""
+    if created or catalog_signals_muted():
+        return
+    if _is_neutral_save(update_fields, FACET_NEUTRAL_FIELDS):
+        return
+    refresh_product_facets([instance.id])
+
+
+# ------------------------------------------------------------
+# 2. نسخه کاتالوگ
+# ------------------------------------------------------------
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_product_catalog(sender, instance, update_fields=None, **kwargs):
+    if catalog_signals_muted() or _is_neutral_save(update_fields, CATALOG_NEUTRAL_FIELDS):
+        return
+    _bump_on_commit(instance.shop_id)
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def bump_product_child_catalog(sender, instance, **kwargs):
+    if catalog_signals_muted():
+        return
+    shop_id = Product.objects.filter(id=instance.product_id).values_list('shop_id', flat=True).first()
+    if shop_id:
+        _bump_on_commit(shop_id)
+
+
+@receiver(post_save, sender=Shop)
+@receiver(post_delete, sender=Shop)
+def bump_shop_catalog(sender, instance, **kwargs):
+    _bump_on_commit(instance.id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_category_catalog(sender, instance, **kwargs):
+    transaction.on_commit(bump_global_catalog_version)
+
+
+# ------------------------------------------------------------
+# 3. ساخت نسخه‌های کوچک‌شده تصاویر
+# ------------------------------------------------------------
+
+@receiver(post_save, sender=ProductImage)
+def process_product_image(sender, instance, created, **kwargs):
+    if created and instance.image:
+        schedule_renditions(instance.image.name)
+
+
+@receiver(post_save, sender=Shop)
+def process_shop_logo(sender, instance, update_fields=None, **kwargs):
+    if not instance.logo:
+        return
+    if update_fields and 'logo' not in update_fields:
+        return
+    if not ImageRendition.objects.filter(source=instance.logo.name).exists():
+        schedule_renditions(instance.logo.name)
+
+
+@receiver(post_save, sender=ImageRendition)
+def bump_rendition_catalog(sender, instance, **kwargs):
+    """نسخه‌های جدید در payload و قطعه‌های کش‌شده ویترین دیده شوند"""
+    shop_ids = set(
+        ProductImage.objects.filter(image=instance.source).values_list('product__shop_id', flat=True)
+    )
+    shop_ids.update(Shop.objects.filter(logo=instance.source).values_list('id', flat=True))
+    for shop_id in shop_ids:
+        _bump_on_commit(shop_id)
+
+
+# ------------------------------------------------------------
+# 4. شمارش ارجاع به فایل‌ها
+# ------------------------------------------------------------
+
+@receiver(pre_save, sender=ProductImage)
+def remember_product_image_blob(sender, instance, **kwargs):
+    remember_blob_reference(instance, 'image')
+
+
+@receiver(post_save, sender=ProductImage)
+def sync_product_image_blob(sender, instance, **kwargs):
+    sync_blob_reference(instance, 'image')
+
+
+@receiver(post_delete, sender=ProductImage)
+def release_product_image_blob(sender, instance, **kwargs):
+    release_blob(instance.image.name)
+
+
+@receiver(pre_save, sender=Shop)
+def remember_shop_logo_blob(sender, instance, update_fields=None, **kwargs):
+    # ذخیره‌های جزئی (مثلاً فقط تاریخ اشتراک) کوئری اضافه نزنند
+    if update_fields and 'logo' not in update_fields:
+        instance._skip_logo_blob = True
+        return
+    instance._skip_logo_blob = False
+    remember_blob_reference(instance, 'logo')
+
+
+@receiver(post_save, sender=Shop)
+def sync_shop_logo_blob(sender, instance, **kwargs):
+    if not getattr(instance, '_skip_logo_blob', False):
+        sync_blob_reference(instance, 'logo')
+
+
+@receiver(post_delete, sender=Shop)
+def release_shop_logo_blob(sender, instance, **kwargs):
+    release_blob(instance.logo.name)
+
+
+def _rendition_blob_names(variants):
+    return {name for files in (variants or {}).values() for _, name in files}
+
+
+@receiver(pre_save, sender=ImageRendition)
+def remember_rendition_blobs(sender, instance, **kwargs):
+    old_variants = None
+    if instance.pk:
+        old_variants = ImageRendition.objects.filter(pk=instance.pk).values_list('variants', flat=True).first()
+    instance._old_rendition_blobs = _rendition_blob_names(old_variants)
+
+
+@receiver(post_save, sender=ImageRendition)
+def sync_rendition_blobs(sender, instance, **kwargs):
+    old_names = getattr(instance, '_old_rendition_blobs', set())
+    new_names = _rendition_blob_names(instance.variants)
+    for name in new_names - old_names:
+        acquire_blob(name)
+    for name in old_names - new_names:
+        release_blob(name)
+    instance._old_rendition_blobs = new_names
+
+
+@receiver(post_delete, sender=ImageRendition)
+def release_rendition_blobs(sender, instance, **kwargs):
+    for name in _rendition_blob_names(instance.variants):
+        release_blob(name)
@@ -5,5 +5,7 @@ from . import views
 urlpatterns = [
     path('', views.ProductListAPIView.as_view(), name='product-list'),
     path('categories/', views.CategoryListAPIView.as_view(), name='category-list'),
+    path('inventory/', views.InventorySyncAPIView.as_view(), name='inventory-sync'),
     path('<int:product_id>/', views.ProductDetailAPIView.as_view(), name='product-detail'),
+    path('<int:product_id>/variants/', views.ProductVariantMatrixAPIView.as_view(), name='product-variant-matrix'),
 ]
\ No newline at end of file
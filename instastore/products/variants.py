@@ -0,0 +1,131 @@
+# products/variants.py
+"""
+ویرایش ماتریس تنوع‌های یک محصول (رنگ × سایز × موجودی × افزایش قیمت)
+
+ردیف‌های ارسالی با واریانت‌های فعلی مقایسه می‌شوند و فقط تفاوت‌ها نوشته می‌شوند:
+
+    apply_variant_matrix(product, [
+        {'color': 'قرمز', 'size': 'XL', 'stock': 5, 'price_adjustment': 0},
+        ...
+    ])
+
+ساخت با یک bulk_create، تغییر با یک bulk_update و حذف با یک DELETE، همه در یک
+تراکنش. کلید هر ردیف (سایز، رنگ) است؛ پس unique_together(product, size, color) با
+ردیف‌های تکراری نقض نمی‌شود. سیگنال‌های تک‌تک واریانت‌ها خاموش است و ایندکس فیلترها و
+نسخه کاتالوگ در پایان یک بار به‌روز می‌شوند.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+
+from .cache import bump_catalog_version
+from .facets import refresh_product_facets
+from .models import ProductVariant
+from .numbers import MAX_PRICE, MAX_STOCK, parse_integer
+from .signals import mute_catalog_signals
+
+MATRIX_FIELDS = ['stock', 'price_adjustment']
+
+
+class VariantMatrixError(ValueError):
+    """ردیف‌های نامعتبر ماتریس (همه خطاها با هم)"""
+
+    def __init__(self, errors):
+        super().__init__('؛ '.join(errors))
+        self.errors = errors
+
+
+def _label(size, color):
+    return f"«{color or '-'} / {size or '-'}»"
+
+
+def normalize_matrix(rows):
+    """
+    اعتبارسنجی ردیف‌ها
+    خروجی: {(size, color): {'stock': int, 'price_adjustment': Decimal}}
+    """
+    size_length = ProductVariant._meta.get_field('size').max_length
+    color_length = ProductVariant._meta.get_field('color').max_length
+
+    matrix = {}
+    errors = []
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append(f"ردیف {index}: هر ردیف باید یک شیء باشد")
+            continue
+        size = str(row.get('size') or '').strip()
+        color = str(row.get('color') or '').strip()
+        if len(size) > size_length or len(color) > color_length:
+            errors.append(f"ردیف {index}: رنگ یا سایز بیش از حد طولانی است")
+            continue
+
+        try:
+            stock = int(parse_integer(row.get('stock'), 'موجودی', maximum=MAX_STOCK) or 0)
+            price_adjustment = parse_integer(
+                row.get('price_adjustment'), 'افزایش قیمت', allow_negative=True, maximum=MAX_PRICE
+            ) or Decimal(0)
+        except ValueError as e:
+            errors.append(f"ردیف {index} {_label(size, color)}: {e}")
+            continue
+
+        key = (size, color)
+        if key in matrix:
+            errors.append(f"ردیف {index}: تنوع {_label(size, color)} تکراری است")
+            continue
+        matrix[key] = {'stock': stock, 'price_adjustment': price_adjustment}
+
+    if not matrix and not errors:
+        errors.append("حداقل یک تنوع لازم است")
+    if errors:
+        raise VariantMatrixError(errors)
+    return matrix
+
+
+def apply_variant_matrix(product, rows):
+    """
+    جایگزینی تنوع‌های محصول با ردیف‌های ارسالی (واریانت‌های حذف‌شده از ماتریس پاک می‌شوند)
+    خروجی: تعداد ساخته، تغییر، حذف و بدون تغییر
+    """
+    matrix = normalize_matrix(rows)
+
+    with transaction.atomic(), mute_catalog_signals():
+        # قفل ردیف‌های فعلی تا دو ویرایش همزمان روی هم نوشته نشوند
+        current = {
+            (variant.size, variant.color): variant
+            for variant in ProductVariant.objects.select_for_update().filter(product=product)
+        }
+
+        created, updated, unchanged = [], [], 0
+        for key, values in matrix.items():
+            variant = current.get(key)
+            if variant is None:
+                created.append(ProductVariant(product=product, size=key[0], color=key[1], **values))
+            elif any(getattr(variant, field) != values[field] for field in MATRIX_FIELDS):
+                for field in MATRIX_FIELDS:
+                    setattr(variant, field, values[field])
+                updated.append(variant)
+            else:
+                unchanged += 1
+
+        deleted = [variant.id for key, variant in current.items() if key not in matrix]
+
+        # ترتیب: حذف، تغییر، ساخت (کلید واریانت‌های موجود عوض نمی‌شود)
+        if deleted:
+            ProductVariant.objects.filter(id__in=deleted).delete()
+        if updated:
+            ProductVariant.objects.bulk_update(updated, MATRIX_FIELDS)
+        if created:
+            ProductVariant.objects.bulk_create(created)
+
+        if created or updated or deleted:
+            refresh_product_facets([product.id])
+            shop_id = product.shop_id
+            transaction.on_commit(lambda: bump_catalog_version(shop_id))
+
+    return {
+        'created': len(created),
+        'updated': len(updated),
+        'deleted': len(deleted),
+        'unchanged': unchanged,
+    }
@@ -1,11 +1,24 @@
 # products/views.py
-from rest_framework import generics, filters
+from rest_framework import generics, filters, status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum
+from django.db.models import Sum, F
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from instastore.refdata import categories_for_ids
 from .models import Product, Category, ProductVariant
-from .serializers import ProductListSerializer, ProductDetailSerializer, CategorySerializer
+from .serializers import (
+    ProductListSerializer, ProductDetailSerializer, CategorySerializer, ProductVariantSerializer
+)
+from .facets import parse_facet_params, has_active_filters, search_facets
+from .cache import cache_catalog_response
+from .conditional import catalog_condition
+from .payload import get_product_payload
+from .variants import apply_variant_matrix, VariantMatrixError
+from .inventory import sync_inventory, InventoryError
 
+@method_decorator(catalog_condition(), name='get')
 class ProductListAPIView(generics.ListAPIView):
     """لیست محصولات یک فروشگاه"""
     serializer_class = ProductListSerializer
@@ -24,10 +37,37 @@ class ProductListAPIView(generics.ListAPIView):
         return Product.objects.filter(
             shop=shop,
             is_active=True
-        ).select_related('category', 'shop').annotate(
+        ).select_related('shop').annotate(
             total_stock=Sum('variants__stock')
         )
+    
+    def filter_queryset(self, queryset):
+        """فیلتر رنگ/سایز/قیمت: ?color=...&size=...&price_min=...&price_max=..."""
+        queryset = super().filter_queryset(queryset)
+        
+        shop = getattr(self.request, 'shop', None)
+        if not shop:
+            return queryset
+        
+        facet_filters = parse_facet_params(self.request.query_params)
+        self.facets = search_facets(shop, **facet_filters)
+        if has_active_filters(facet_filters):
+            queryset = queryset.filter(id__in=self.facets['product_ids'])
+        return queryset
+    
+    @cache_catalog_response('api-products')
+    def list(self, request, *args, **kwargs):
+        """افزودن شمارش فیلترها به پاسخ لیست"""
+        self.facets = None
+        response = super().list(request, *args, **kwargs)
+        
+        if self.facets is not None and isinstance(response.data, dict):
+            response.data['facets'] = {
+                key: value for key, value in self.facets.items() if key != 'product_ids'
+            }
+        return response
 
+@method_decorator(catalog_condition(), name='get')
 class ProductDetailAPIView(generics.RetrieveAPIView):
     """نمایش جزئیات یک محصول"""
     serializer_class = ProductDetailSerializer
@@ -42,22 +82,49 @@ class ProductDetailAPIView(generics.RetrieveAPIView):
         return Product.objects.filter(
             shop=shop,
             is_active=True
-        ).select_related('category', 'shop').prefetch_related(
+        ).select_related('shop').prefetch_related(
             'images', 'variants'
         ).annotate(
             total_stock=Sum('variants__stock')
         )
     
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
+        shop = getattr(request, 'shop', None)
+        
+        # داده آماده محصول از کش (همان خروجی ProductDetailSerializer)
+        payload = get_product_payload(shop.id, kwargs.get(self.lookup_url_kwarg)) if shop else None
+        if payload is None:
+            raise Http404
         
-        # افزایش تعداد بازدید
-        instance.views += 1
-        instance.save(update_fields=['views'])
+        # افزایش تعداد بازدید با یک UPDATE (روی کش کاتالوگ اثری ندارد)
+        product = Product.objects.filter(id=payload['id'])
+        product.update(views=F('views') + 1)
         
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        data = dict(payload['api'])
+        data['views'] = product.values_list('views', flat=True).first()
+        data['images'] = [
+            {**image, 'image': self._absolute_url(request, image['image'])}
+            for image in data['images']
+        ]
+        if data.get('shop'):
+            data['shop'] = {**data['shop'], 'logo': self._absolute_url(request, data['shop'].get('logo'))}
+        return Response(data)
+    
+    @staticmethod
+    def _absolute_url(request, url):
+        """آدرس تصاویر در داده کش‌شده نسبی است (مثل خروجی serializer با request)"""
+        return request.build_absolute_uri(url) if url else url
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        # پاسخ 304 از retrieve عبور نمی‌کند؛ بازدید را با یک UPDATE ساده ثبت کن
+        if response.status_code == 304 and getattr(request, 'shop', None):
+            Product.objects.filter(
+                id=kwargs.get('product_id'),
+                shop=request.shop
+            ).update(views=F('views') + 1)
+        return super().finalize_response(request, response, *args, **kwargs)
 
+@method_decorator(catalog_condition(), name='get')
 class CategoryListAPIView(generics.ListAPIView):
     """لیست دسته‌بندی‌های یک فروشگاه"""
     serializer_class = CategorySerializer
@@ -67,8 +134,83 @@ class CategoryListAPIView(generics.ListAPIView):
         if not shop:
             return Category.objects.none()
             
-        # دسته‌بندی‌هایی که محصول فعال در این فروشگاه دارند
-        return Category.objects.filter(
-            products__shop=shop,
-            products__is_active=True
-        ).distinct()
\ No newline at end of file
+        # دسته‌بندی‌هایی که محصول فعال در این فروشگاه دارند: شناسه‌ها از جدول محصول و
+        # ردیف‌ها از داده‌های مرجع در حافظه (instastore/refdata.py) - بدون join و distinct روی دسته‌بندی
+        return categories_for_ids(
+            Product.objects.filter(shop=shop, is_active=True, category__isnull=False)
+            .values_list('category_id', flat=True).order_by().distinct()
+        )
+    
+    @cache_catalog_response('api-categories')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+class ProductVariantMatrixAPIView(generics.GenericAPIView):
+    """
+    ماتریس تنوع‌های یک محصول برای فروشنده
+    GET: لیست تنوع‌ها | PUT: جایگزینی کامل با {"variants": [{color, size, stock, price_adjustment}, ...]}
+    """
+    serializer_class = ProductVariantSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'id'
+    lookup_url_kwarg = 'product_id'
+
+    def get_queryset(self):
+        shop = getattr(self.request.user, 'shop', None)
+        if not shop:
+            return Product.objects.none()
+        return Product.objects.filter(shop=shop).select_related('shop')
+
+    def _variants_response(self, product, **extra):
+        variants = ProductVariant.objects.filter(product=product).select_related('product').order_by('color', 'size')
+        return Response({
+            'product': product.id,
+            'variants': self.get_serializer(variants, many=True).data,
+            **extra
+        })
+
+    def get(self, request, *args, **kwargs):
+        return self._variants_response(self.get_object())
+
+    def put(self, request, *args, **kwargs):
+        product = self.get_object()
+        rows = request.data.get('variants') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return Response(
+                {'errors': ['variants باید لیستی از ردیف‌ها باشد']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            changes = apply_variant_matrix(product, rows)
+        except VariantMatrixError as e:
+            return Response({'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        return self._variants_response(product, changes=changes)
+
+class InventorySyncAPIView(generics.GenericAPIView):
+    """
+    همگام‌سازی گروهی موجودی و قیمت فروشگاه کاربر
+    POST {"rows": [{variant_id | product+color+size, stock, price_adjustment}, ...],
+          "price_change": {"mode": "percent" | "fixed", "value": 10}}
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        shop = getattr(request.user, 'shop', None)
+        if not shop:
+            return Response({'error': 'فقط فروشندگان به این بخش دسترسی دارند'}, status=status.HTTP_403_FORBIDDEN)
+
+        data = request.data if isinstance(request.data, dict) else {'rows': request.data}
+        rows = data.get('rows') or []
+        if not isinstance(rows, list):
+            return Response({'error': 'rows باید لیست باشد'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = sync_inventory(
+                shop, rows, price_change=data.get('price_change'), user=request.user, request=request
+            )
+        except InventoryError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result)
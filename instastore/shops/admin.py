@@ -3,10 +3,14 @@ from django.utils.html import format_html
 from django.utils import timezone
 from django.contrib import messages
 from django.urls import reverse
-from django.http import HttpResponse
-import csv
+from django.db import transaction
+from django.db.models import Count
 from datetime import timedelta
 from .models import Plan, Shop
+from .subscriptions import bulk_extend_subscriptions, bulk_assign_plan
+from instastore.events import publish
+from instastore.exports import export_response
+from instastore.refdata import bump_reference_data
 from logs.models import AdminLog
 
 
@@ -120,11 +124,15 @@ class PlanAdmin(admin.ModelAdmin):
         return f"{obj.days} روز"
     get_display_days.short_description = 'مدت زمان'
     
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.annotate(shops_total=Count('shops'))
+    
     def shop_count(self, obj):
         """تعداد فروشگاه‌های استفاده کننده"""
-        count = obj.shops.count()
-        return format_html('<span class="badge bg-info">{}</span>', count)
+        return format_html('<span class="badge bg-info">{}</span>', obj.shops_total)
     shop_count.short_description = 'تعداد فروشگاه‌ها'
+    shop_count.admin_order_field = 'shops_total'
     
     def created_info(self, obj):
         """اطلاعات ایجاد"""
@@ -134,14 +142,18 @@ class PlanAdmin(admin.ModelAdmin):
     # Custom Actions
     def activate_plans(self, request, queryset):
         """فعال کردن پلن‌های انتخاب شده"""
-        updated = queryset.update(is_active=True)
+        # update() سیگنال ندارد؛ updated_at نسخه داده‌های مرجع است (instastore/refdata.py)
+        updated = queryset.update(is_active=True, updated_at=timezone.now())
+        bump_reference_data()
         self.log_admin_action(request, f"فعال کردن {updated} پلن")
         messages.success(request, f'{updated} پلن فعال شدند')
     activate_plans.short_description = "فعال کردن پلن‌های انتخاب شده"
     
     def deactivate_plans(self, request, queryset):
         """غیرفعال کردن پلن‌های انتخاب شده"""
-        updated = queryset.update(is_active=False)
+        # update() سیگنال ندارد؛ updated_at نسخه داده‌های مرجع است (instastore/refdata.py)
+        updated = queryset.update(is_active=False, updated_at=timezone.now())
+        bump_reference_data()
         self.log_admin_action(request, f"غیرفعال کردن {updated} پلن")
         messages.success(request, f'{updated} پلن غیرفعال شدند')
     deactivate_plans.short_description = "غیرفعال کردن پلن‌های انتخاب شده"
@@ -149,7 +161,9 @@ class PlanAdmin(admin.ModelAdmin):
     def set_as_default(self, request, queryset):
         """تنظیم به عنوان پیش‌فرض"""
         # اول همه را غیرپیش‌فرض کن
-        Plan.objects.update(is_default=False)
+        # update() سیگنال ندارد؛ updated_at نسخه داده‌های مرجع است (instastore/refdata.py)
+        Plan.objects.update(is_default=False, updated_at=timezone.now())
+        bump_reference_data()
         
         # فقط اولی را پیش‌فرض کن
         if queryset.exists():
@@ -163,36 +177,18 @@ class PlanAdmin(admin.ModelAdmin):
     
     def export_plans_csv(self, request, queryset):
         """اکسپورت به CSV"""
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="plans.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['نام', 'کد', 'قیمت', 'روزها', 'حداکثر محصول', 'حداکثر سفارش', 'وضعیت'])
-        
-        for plan in queryset:
-            writer.writerow([
-                plan.name,
-                plan.code,
-                plan.price,
-                plan.days,
-                plan.max_products,
-                plan.max_orders_per_month,
-                'فعال' if plan.is_active else 'غیرفعال'
-            ])
-        
         self.log_admin_action(request, f"اکسپورت {queryset.count()} پلن به CSV")
-        return response
+        return export_response('plans', queryset, 'csv', filename='plans.csv')
     export_plans_csv.short_description = "اکسپورت به CSV"
     
     def log_admin_action(self, request, action):
         """ثبت لاگ فعالیت ادمین"""
         if hasattr(request, 'user'):
-            AdminLog.objects.create(
+            AdminLog.log_action(
                 admin=request.user,
                 action=action,
                 model='Plan',
-                ip_address=self.get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')
+                request=request,
             )
     
     def get_client_ip(self, request):
@@ -378,19 +374,13 @@ class ShopAdmin(admin.ModelAdmin):
     
     def product_count(self, obj):
         """تعداد محصولات"""
-        count = obj.products.filter(is_active=True).count()
-        return format_html('<span class="badge bg-info">{}</span>', count)
+        return format_html('<span class="badge bg-info">{}</span>', obj.active_product_count)
     product_count.short_description = 'محصولات'
+    product_count.admin_order_field = 'active_product_count'
     
     def order_count_month(self, obj):
         """تعداد سفارشات در ماه جاری"""
-        from datetime import datetime
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        count = obj.orders.filter(
-            created_at__month=current_month,
-            created_at__year=current_year
-        ).count()
+        count = obj.orders_this_month
         
         if obj.current_plan:
             max_orders = obj.current_plan.max_orders_per_month
@@ -405,6 +395,7 @@ class ShopAdmin(admin.ModelAdmin):
         
         return format_html('<span class="badge bg-secondary">{}</span>', count)
     order_count_month.short_description = 'سفارشات (ماه)'
+    order_count_month.admin_order_field = 'orders_this_month'
     
     def is_active_badge(self, obj):
         """نمایش وضعیت فعال/غیرفعال"""
@@ -468,26 +459,36 @@ class ShopAdmin(admin.ModelAdmin):
     stats_info.short_description = 'آمار'
     
     # Custom Actions
+    def _set_shops_active(self, request, queryset, is_active):
+        """update گروهی سیگنال ندارد: رویداد گروهی تا وضعیت اشتراک کش‌شده هم پاک شود"""
+        shop_ids = list(queryset.values_list('pk', flat=True))
+        with transaction.atomic():
+            updated = Shop.objects.filter(pk__in=shop_ids).update(is_active=is_active)
+            publish(
+                'shop.subscriptions_changed',
+                action='SHOP_ACTIVATED' if is_active else 'SHOP_DEACTIVATED',
+                shop_ids=shop_ids,
+                user=request.user,
+            )
+        return updated
+
     def activate_shops(self, request, queryset):
         """فعال کردن فروشگاه‌های انتخاب شده"""
-        updated = queryset.update(is_active=True)
+        updated = self._set_shops_active(request, queryset, True)
         self.log_admin_action(request, f"فعال کردن {updated} فروشگاه")
         messages.success(request, f'{updated} فروشگاه فعال شدند')
     activate_shops.short_description = "فعال کردن فروشگاه‌ها"
     
     def deactivate_shops(self, request, queryset):
         """غیرفعال کردن فروشگاه‌های انتخاب شده"""
-        updated = queryset.update(is_active=False)
+        updated = self._set_shops_active(request, queryset, False)
         self.log_admin_action(request, f"غیرفعال کردن {updated} فروشگاه")
         messages.success(request, f'{updated} فروشگاه غیرفعال شدند')
     deactivate_shops.short_description = "غیرفعال کردن فروشگاه‌ها"
     
     def extend_subscription_30_days(self, request, queryset):
         """تمدید 30 روزه اشتراک"""
-        updated = 0
-        for shop in queryset:
-            if shop.extend_subscription(30):
-                updated += 1
+        updated = bulk_extend_subscriptions(queryset, 30, user=request.user, request=request)
         
         self.log_admin_action(request, f"تمدید 30 روزه {updated} فروشگاه")
         messages.success(request, f'{updated} فروشگاه به مدت 30 روز تمدید شدند')
@@ -495,10 +496,7 @@ class ShopAdmin(admin.ModelAdmin):
     
     def extend_subscription_90_days(self, request, queryset):
         """تمدید 90 روزه اشتراک"""
-        updated = 0
-        for shop in queryset:
-            if shop.extend_subscription(90):
-                updated += 1
+        updated = bulk_extend_subscriptions(queryset, 90, user=request.user, request=request)
         
         self.log_admin_action(request, f"تمدید 90 روزه {updated} فروشگاه")
         messages.success(request, f'{updated} فروشگاه به مدت 90 روز تمدید شدند')
@@ -511,10 +509,7 @@ class ShopAdmin(admin.ModelAdmin):
             messages.error(request, "پلن رایگان یافت نشد")
             return
         
-        updated = 0
-        for shop in queryset:
-            shop.renew_subscription(free_plan, start_from_now=True)
-            updated += 1
+        updated = bulk_assign_plan(queryset, free_plan, start_from_now=True, user=request.user, request=request)
         
         self.log_admin_action(request, f"اختصاص پلن رایگان به {updated} فروشگاه")
         messages.success(request, f'پلن رایگان به {updated} فروشگاه اختصاص یافت')
@@ -527,10 +522,7 @@ class ShopAdmin(admin.ModelAdmin):
             messages.error(request, "پلن پایه یافت نشد")
             return
         
-        updated = 0
-        for shop in queryset:
-            shop.renew_subscription(basic_plan, start_from_now=True)
-            updated += 1
+        updated = bulk_assign_plan(queryset, basic_plan, start_from_now=True, user=request.user, request=request)
         
         self.log_admin_action(request, f"اختصاص پلن پایه به {updated} فروشگاه")
         messages.success(request, f'پلن پایه به {updated} فروشگاه اختصاص یافت')
@@ -543,43 +535,16 @@ class ShopAdmin(admin.ModelAdmin):
             messages.error(request, "پلن حرفه‌ای یافت نشد")
             return
         
-        updated = 0
-        for shop in queryset:
-            shop.renew_subscription(pro_plan, start_from_now=True)
-            updated += 1
+        updated = bulk_assign_plan(queryset, pro_plan, start_from_now=True, user=request.user, request=request)
         
         self.log_admin_action(request, f"اختصاص پلن حرفه‌ای به {updated} فروشگاه")
         messages.success(request, f'پلن حرفه‌ای به {updated} فروشگاه اختصاص یافت')
     assign_pro_plan.short_description = "اختصاص پلن حرفه‌ای"
     
     def export_shops_csv(self, request, queryset):
-        """اکسپورت فروشگاه‌ها به CSV"""
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="shops.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow([
-            'نام فروشگاه', 'آدرس اینستاگرام', 'ایمیل', 'پلن',
-            'شروع اشتراک', 'انقضای اشتراک', 'روزهای باقی‌مانده',
-            'وضعیت', 'تاریخ ایجاد', 'تلفن'
-        ])
-        
-        for shop in queryset.select_related('user', 'current_plan'):
-            writer.writerow([
-                shop.shop_name,
-                shop.instagram_username,
-                shop.user.email if shop.user else '',
-                shop.current_plan.name if shop.current_plan else '',
-                shop.plan_started_at.strftime('%Y/%m/%d') if shop.plan_started_at else '',
-                shop.plan_expires_at.strftime('%Y/%m/%d') if shop.plan_expires_at else '',
-                shop.remaining_days,
-                'فعال' if shop.is_active else 'غیرفعال',
-                shop.created_at.strftime('%Y/%m/%d'),
-                shop.phone_number
-            ])
-        
+        """اکسپورت فروشگاه‌ها به CSV (stream؛ بدون بارگذاری همه ردیف‌ها در حافظه)"""
         self.log_admin_action(request, f"اکسپورت {queryset.count()} فروشگاه به CSV")
-        return response
+        return export_response('shops', queryset, 'csv', filename='shops.csv')
     export_shops_csv.short_description = "اکسپورت به CSV"
     
     def send_welcome_email(self, request, queryset):
@@ -614,17 +579,19 @@ class ShopAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """بهینه‌سازی کوئری‌ست"""
         qs = super().get_queryset(request)
-        return qs.select_related('user', 'current_plan').prefetch_related('products', 'orders')
+        # شمارش‌ها با Subquery در همان کوئری لیست؛ محصولات و سفارش‌ها در حافظه بارگذاری نمی‌شوند
+        return qs.select_related('user', 'current_plan').with_stats(
+            'active_product_count', 'orders_this_month'
+        )
     
     def log_admin_action(self, request, action):
         """ثبت لاگ فعالیت ادمین"""
         if hasattr(request, 'user'):
-            AdminLog.objects.create(
+            AdminLog.log_action(
                 admin=request.user,
                 action=action,
                 model='Shop',
-                ip_address=self.get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')
+                request=request,
             )
     
     def get_client_ip(self, request):
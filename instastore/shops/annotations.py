@@ -0,0 +1,115 @@
+# shops/annotations.py
+"""
+annotationهای آماری فروشگاه‌ها
+
+هر annotation یک Subquery همبسته (یا خواندن از جدول فروش روزانه) است؛ پس چند آمار
+را می‌توان در یک queryset کنار هم گذاشت بدون اینکه join محصولات × سفارش‌ها ردیف‌ها
+را چند برابر کند:
+
+    Shop.objects.with_stats('active_product_count', 'orders_this_month')
+    annotate_shops(queryset, 'revenue_30d', 'customer_count')
+    get_shop_stat(shop, 'active_product_count')   # از annotation یا یک کوئری
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def month_start():
+    """ابتدای ماه جاری به وقت محلی"""
+    return timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _count_subquery(queryset):
+    """تعداد ردیف‌های یک queryset همبسته با فروشگاه (فیلد shop)"""
+    counted = queryset.order_by().values('shop').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+# ------------------------------------------------------------
+# 1. annotationها
+# ------------------------------------------------------------
+
+def active_product_count():
+    """تعداد محصولات فعال"""
+    from products.models import Product
+
+    return _count_subquery(Product.objects.filter(shop=OuterRef('pk'), is_active=True))
+
+
+def orders_since(since):
+    """تعداد سفارش‌های ثبت‌شده از یک زمان"""
+    from orders.models import Order
+
+    return _count_subquery(Order.objects.filter(shop=OuterRef('pk'), created_at__gte=since))
+
+
+def orders_this_month():
+    """تعداد سفارش‌های ماه جاری (برای سقف سفارش پلن)"""
+    return orders_since(month_start())
+
+
+def recent_sales(field, days):
+    """جمع یک ستون جدول فروش روزانه در چند روز اخیر (امروز هم حساب است)"""
+    from orders.models import ShopDailySales
+
+    rows = ShopDailySales.objects.filter(
+        shop=OuterRef('pk'),
+        date__gt=timezone.localdate() - timedelta(days=days)
+    ).order_by().values('shop').annotate(total=Sum(field)).values('total')
+
+    if field == 'revenue':
+        output_field = DecimalField(max_digits=14, decimal_places=0)
+        return Coalesce(Subquery(rows, output_field=output_field), Decimal('0'), output_field=output_field)
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def customer_count():
+    """تعداد مشتری‌های فروشگاه"""
+    from customers.models import Customer
+
+    return _count_subquery(Customer.objects.filter(shop=OuterRef('pk')))
+
+
+SHOP_ANNOTATIONS = {
+    'active_product_count': active_product_count,
+    'orders_this_month': orders_this_month,
+    'orders_30d': lambda: recent_sales('orders', 30),
+    'revenue_30d': lambda: recent_sales('revenue', 30),
+    'customer_count': customer_count,
+}
+
+
+# ------------------------------------------------------------
+# 2. استفاده روی queryset و نمونه
+# ------------------------------------------------------------
+
+def annotate_shops(queryset, *names):
+    """افزودن annotationهای نام‌برده به queryset فروشگاه‌ها"""
+    unknown = set(names) - set(SHOP_ANNOTATIONS)
+    if unknown:
+        raise ValueError(f"annotation ناشناخته: {', '.join(sorted(unknown))}")
+    return queryset.annotate(**{name: SHOP_ANNOTATIONS[name]() for name in names})
+
+
+def get_shop_stats(shop, *names):
+    """
+    مقدار چند آمار یک فروشگاه؛ مقدارهای annotate‌شده دوباره کوئری نمی‌زنند
+    بقیه با یک کوئری خوانده و روی نمونه نگه داشته می‌شوند
+    """
+    missing = [name for name in names if not hasattr(shop, name)]
+    if missing:
+        values = annotate_shops(
+            type(shop).objects.filter(pk=shop.pk), *missing
+        ).values(*missing).first() or {}
+        for name in missing:
+            setattr(shop, name, values.get(name, 0))
+    return {name: getattr(shop, name) for name in names}
+
+
+def get_shop_stat(shop, name):
+    return get_shop_stats(shop, name)[name]
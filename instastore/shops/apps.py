@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ShopsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shops'
+
+    def ready(self):
+        # subscriberهای رویدادهای دامنه (instastore/events.py)
+        import shops.subscribers  # noqa: F401
+
+        # داده‌های مرجع پلن و دسته‌بندی در حافظه (instastore/refdata.py)
+        from instastore.refdata import connect_reference_data
+        connect_reference_data()
@@ -11,6 +11,8 @@ from functools import wraps
 from datetime import timedelta
 import logging
 
+from .subscription_state import get_subscription_state
+
 logger = logging.getLogger('instastore')
 
 # ------------------------------------------------------------
@@ -80,12 +82,13 @@ def shop_subscription_required(view_func):
                 request.user.shop == shop
             )
             
-            if is_owner and not shop.is_subscription_active:
+            state = get_subscription_state(shop) if is_owner else None
+            if state is not None and not state.is_subscription_active:
                 # اگر مالک است و اشتراک منقضی شده
                 messages.error(
                     request,
                     f"برای انجام این عملیات نیاز به اشتراک فعال دارید. "
-                    f"({shop.remaining_days} روز باقی مانده)"
+                    f"({state.remaining_days} روز باقی مانده)"
                 )
                 
                 # اگر درخواست AJAX است
@@ -198,8 +201,9 @@ def require_active_subscription(view_func):
             raise Http404("فروشگاه مشخص نیست")
         
         shop = request.shop
+        state = get_subscription_state(shop)
         
-        if not shop.is_subscription_active:
+        if not state.is_subscription_active:
             logger.warning(
                 f"Expired subscription attempt: shop {shop.slug}, "
                 f"user {request.user.username if request.user.is_authenticated else 'anonymous'}"
@@ -210,7 +214,7 @@ def require_active_subscription(view_func):
                     'error': True,
                     'code': 'SUBSCRIPTION_EXPIRED',
                     'message': 'اشتراک فروشگاه منقضی شده است',
-                    'remaining_days': shop.remaining_days,
+                    'remaining_days': state.remaining_days,
                     'expires_at': shop.plan_expires_at.isoformat() if shop.plan_expires_at else None
                 }, status=402)  # 402 Payment Required
             
@@ -218,7 +222,7 @@ def require_active_subscription(view_func):
             from django.shortcuts import render
             return render(request, 'frontend/subscription_expired.html', {
                 'shop': shop,
-                'remaining_days': shop.remaining_days
+                'remaining_days': state.remaining_days
             })
         
         return view_func(request, *args, **kwargs)
@@ -236,9 +240,11 @@ def check_plan_limits(view_func):
             raise Http404("فروشگاه مشخص نیست")
         
         shop = request.shop
+        # سقف‌های پلن از وضعیت کش‌شده (بدون کوئری روی Plan)
+        state = get_subscription_state(shop)
         
         # بررسی اشتراک
-        if not shop.is_subscription_active:
+        if not state.is_subscription_active:
             messages.error(request, "اشتراک شما منقضی شده است. لطفاً تمدید کنید.")
             return redirect('frontend:seller-plans')
         
@@ -247,7 +253,7 @@ def check_plan_limits(view_func):
             if not shop.can_add_product():
                 messages.error(
                     request,
-                    f"به حد مجاز محصولات ({shop.current_plan.max_products}) رسیده‌اید. "
+                    f"به حد مجاز محصولات ({state.max_products}) رسیده‌اید. "
                     f"لطفاً پلن خود را ارتقا دهید."
                 )
                 return redirect('frontend:seller-plans')
@@ -257,7 +263,7 @@ def check_plan_limits(view_func):
             if not shop.can_accept_order():
                 messages.error(
                     request,
-                    f"به حد مجاز سفارشات ماهانه ({shop.current_plan.max_orders_per_month}) رسیده‌اید. "
+                    f"به حد مجاز سفارشات ماهانه ({state.max_orders_per_month}) رسیده‌اید. "
                     f"لطفاً پلن خود را ارتقا دهید."
                 )
                 return redirect('frontend:seller-plans')
@@ -400,24 +406,24 @@ def subscription_check_middleware(get_response):
             hasattr(request.user, 'shop') and 
             'seller' in request.path):
             
-            shop = request.user.shop
+            state = get_subscription_state(request.user.shop)
             
             # اگر اشتراک منقضی شده
-            if not shop.is_subscription_active:
+            if not state.is_subscription_active:
                 # فقط یک بار در session علامت بزن که هشدار دادی
                 warning_shown = request.session.get('subscription_warning_shown', False)
                 
-                if not warning_shown and shop.remaining_days == 0:
+                if not warning_shown and state.remaining_days == 0:
                     messages.error(
                         request,
                         "⏰ اشتراک شما منقضی شده است! لطفاً برای ادامه فعالیت تمدید کنید."
                     )
                     request.session['subscription_warning_shown'] = True
                 
-                elif not warning_shown and shop.remaining_days <= 3:
+                elif not warning_shown and state.remaining_days <= 3:
                     messages.warning(
                         request,
-                        f"⚠️ فقط {shop.remaining_days} روز تا انقضای اشتراک شما باقی مانده است."
+                        f"⚠️ فقط {state.remaining_days} روز تا انقضای اشتراک شما باقی مانده است."
                     )
                     request.session['subscription_warning_shown'] = True
             
@@ -0,0 +1,199 @@
+# shops/expiry.py
+"""
+پردازش دسته‌ای انقضای اشتراک‌ها (هشدار قبل از انقضا و اعلان انقضا)
+
+    run_expiry()                 # دستور process_subscription_expiry یا cron روزانه/ساعتی
+
+- فروشگاه‌های فعال با plan_expires_at تا WARNING_DAYS روز آینده روی ایندکس plan_expires_at
+  به صورت keyset (plan_expires_at, id) و در دسته‌های BATCH_SIZE تایی خوانده می‌شوند
+- مرحله هر فروشگاه: کوچک‌ترین عدد WARNING_DAYS که روزهای باقی‌مانده از آن کمتر است، یا 0
+  برای منقضی‌شده. watermark (expiry_notice_for، expiry_notice_stage) نشان می‌دهد برای همین
+  تاریخ انقضا کدام مرحله قبلاً ثبت شده است؛ پس اجرای دوباره کاری تکرار نمی‌کند و تمدید
+  اشتراک (تاریخ انقضای جدید) خودبه‌خود مراحل را از نو شروع می‌کند
+- برای هر مرحله در هر دسته: یک UPDATE برای watermark، یک bulk_create در ShopActivityLog و
+  یک رویداد گروهی (instastore/events.py) بعد از commit:
+
+    shop.subscriptions_expiring   shop_ids, days
+    shop.subscriptions_expired    shop_ids
+
+  ایمیل‌ها و باطل کردن کش وضعیت اشتراک در subscriberهای همین رویدادها انجام می‌شود
+"""
+
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from instastore.events import publish
+
+logger = logging.getLogger('instastore')
+
+DEFAULT_SUBSCRIPTION_EXPIRY = {
+    'WARNING_DAYS': (7, 3, 1),
+    'BATCH_SIZE': 1000,
+}
+
+STAGE_EXPIRED = 0
+
+ACTIVITY_BATCH_SIZE = 1000
+
+
+def get_expiry_config():
+    config = dict(DEFAULT_SUBSCRIPTION_EXPIRY)
+    config.update(getattr(settings, 'SUBSCRIPTION_EXPIRY', {}))
+    return config
+
+
+def notice_stage(expires_at, now, warning_days):
+    """مرحله اعلان برای یک تاریخ انقضا: 0 (منقضی)، روزهای هشدار، یا None (هنوز زود است)"""
+    if expires_at <= now:
+        return STAGE_EXPIRED
+    remaining = expires_at - now
+    for days in sorted(warning_days):
+        if remaining <= timedelta(days=days):
+            return days
+    return None
+
+
+def _already_noticed(row, stage):
+    # همین مرحله یا مرحله بعدتر (روز کمتر) برای همین تاریخ انقضا ثبت شده است
+    return (
+        row['expiry_notice_for'] == row['plan_expires_at']
+        and row['expiry_notice_stage'] is not None
+        and row['expiry_notice_stage'] <= stage
+    )
+
+
+# ------------------------------------------------------------
+# 1. ثبت یک مرحله برای یک دسته
+# ------------------------------------------------------------
+
+def _record_stage(rows, stage, now):
+    """watermark + لاگ فعالیت + رویداد گروهی؛ خروجی: شناسه فروشگاه‌های ثبت‌شده"""
+    from logs.models import ShopActivityLog
+    from .models import Shop
+
+    shop_ids = [row['id'] for row in rows]
+    bound = now if stage == STAGE_EXPIRED else now + timedelta(days=stage)
+
+    with transaction.atomic():
+        # شرط تاریخ: فروشگاهی که بین خواندن و ثبت تمدید شده علامت نمی‌خورد
+        updated = Shop.objects.filter(pk__in=shop_ids, plan_expires_at__lte=bound).update(
+            expiry_notice_for=F('plan_expires_at'),
+            expiry_notice_stage=stage,
+        )
+        if updated != len(shop_ids):
+            marked = set(Shop.objects.filter(
+                pk__in=shop_ids, expiry_notice_for=F('plan_expires_at'), expiry_notice_stage=stage
+            ).values_list('pk', flat=True))
+            rows = [row for row in rows if row['id'] in marked]
+            shop_ids = [row['id'] for row in rows]
+        if not shop_ids:
+            return []
+
+        action = 'SUBSCRIPTION_EXPIRED' if stage == STAGE_EXPIRED else 'SUBSCRIPTION_WARNING'
+        ShopActivityLog.objects.bulk_create(
+            [
+                ShopActivityLog(
+                    shop_id=row['id'],
+                    user_id=row['user_id'],
+                    category='PLAN',
+                    action=action,
+                    details={
+                        'expires_at': row['plan_expires_at'].isoformat(),
+                        'days_left': stage,
+                    },
+                    metadata={'bulk': True, 'count': len(shop_ids)},
+                )
+                for row in rows
+            ],
+            batch_size=ACTIVITY_BATCH_SIZE
+        )
+
+        if stage == STAGE_EXPIRED:
+            publish('shop.subscriptions_expired', shop_ids=shop_ids)
+        else:
+            publish('shop.subscriptions_expiring', shop_ids=shop_ids, days=stage)
+
+    return shop_ids
+
+
+# ------------------------------------------------------------
+# 2. پیمایش keyset
+# ------------------------------------------------------------
+
+def _candidates(now, warning_days):
+    from .models import Shop
+
+    horizon = now + timedelta(days=max(warning_days, default=0))
+    # فروشگاه‌هایی که اعلان انقضای همین تاریخ را گرفته‌اند دیگر خوانده نمی‌شوند
+    return Shop.objects.filter(
+        is_active=True,
+        current_plan__isnull=False,
+        plan_expires_at__lte=horizon,
+    ).exclude(
+        expiry_notice_for=F('plan_expires_at'),
+        expiry_notice_stage=STAGE_EXPIRED,
+    )
+
+
+def run_expiry(now=None, batch_size=None, dry_run=False):
+    """
+    یک دور کامل پردازش انقضا
+    خروجی: {'scanned', 'batches', 'warned': {روز: تعداد}, 'expired', 'duration'}
+    """
+    config = get_expiry_config()
+    now = now or timezone.now()
+    batch_size = batch_size or config['BATCH_SIZE']
+    warning_days = tuple(config['WARNING_DAYS'])
+    started = time.monotonic()
+
+    result = {'scanned': 0, 'batches': 0, 'warned': defaultdict(int), 'expired': 0}
+    queryset = _candidates(now, warning_days).order_by('plan_expires_at', 'pk').values(
+        'id', 'user_id', 'plan_expires_at', 'expiry_notice_for', 'expiry_notice_stage'
+    )
+
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(
+                Q(plan_expires_at__gt=last[0]) | Q(plan_expires_at=last[0], pk__gt=last[1])
+            )
+        rows = list(page[:batch_size])
+        if not rows:
+            break
+
+        last = (rows[-1]['plan_expires_at'], rows[-1]['id'])
+        result['scanned'] += len(rows)
+        result['batches'] += 1
+
+        by_stage = defaultdict(list)
+        for row in rows:
+            stage = notice_stage(row['plan_expires_at'], now, warning_days)
+            if stage is not None and not _already_noticed(row, stage):
+                by_stage[stage].append(row)
+
+        for stage, stage_rows in by_stage.items():
+            count = len(stage_rows) if dry_run else len(_record_stage(stage_rows, stage, now))
+            if stage == STAGE_EXPIRED:
+                result['expired'] += count
+            else:
+                result['warned'][stage] += count
+
+        if len(rows) < batch_size:
+            break
+
+    result['warned'] = dict(result['warned'])
+    result['duration'] = round(time.monotonic() - started, 2)
+    logger.info(
+        f"Subscription expiry: scanned {result['scanned']} shops, "
+        f"{result['expired']} expired, warnings {result['warned']}"
+        f"{' (dry run)' if dry_run else ''}"
+    )
+    return result
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from shops.expiry import run_expiry
+
+
+class Command(BaseCommand):
+    help = 'ارسال هشدار و اعلان انقضای اشتراک فروشگاه‌ها (اجرای دوباره اعلان تکراری نمی‌فرستد)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='تعداد فروشگاه هر دسته')
+        parser.add_argument('--dry-run', action='store_true', help='فقط شمارش، بدون ثبت و ارسال')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('batch-size باید مثبت باشد.')
+
+        result = run_expiry(batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        warned = '، '.join(f"{days} روز: {count}" for days, count in sorted(result['warned'].items())) or '0'
+        prefix = '(آزمایشی) ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{result['scanned']} فروشگاه در {result['batches']} دسته بررسی شد - "
+            f"منقضی: {result['expired']}، هشدار: {warned} ({result['duration']} ثانیه)"
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-19 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0002_alter_plan_options_alter_shop_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shop',
+            name='expiry_notice_for',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='اعلان انقضا برای تاریخ'),
+        ),
+        migrations.AddField(
+            model_name='shop',
+            name='expiry_notice_stage',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='مرحله اعلان انقضا'),
+        ),
+    ]
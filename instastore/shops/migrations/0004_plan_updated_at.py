@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-19 05:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0003_shop_expiry_notice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plan',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, verbose_name='آخرین تغییر'),
+            preserve_default=False,
+        ),
+    ]
@@ -2,15 +2,22 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils.text import slugify
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.core.exceptions import ValidationError
-from django.db.models import Q, Count, Sum, F, ExpressionWrapper, DurationField
 from datetime import timedelta
 import uuid
 
-class Plan(models.Model):
+from instastore.images import responsive_image
+from instastore.refdata import get_plan, signup_plan
+from instastore.tracking import TrackedFieldsMixin
+from .annotations import annotate_shops, get_shop_stat, get_shop_stats
+
+class Plan(TrackedFieldsMixin, models.Model):
     """
     مدل پلن‌های اشتراک (رایگان، ماهانه، سالانه و...)
     """
+    tracked_fields = ('code', 'name', 'is_active', 'is_default', 'price', 'days', 'max_products', 'max_orders_per_month')
+
     PLAN_FREE = 'free'
     PLAN_BASIC = 'basic'
     PLAN_PRO = 'pro'
@@ -38,6 +45,8 @@ class Plan(models.Model):
     is_default = models.BooleanField(default=False, verbose_name="پلن پیش‌فرض ثبت‌نام")
     is_popular = models.BooleanField(default=False, verbose_name="پلن پرطرفدار")
     sort_order = models.PositiveSmallIntegerField(default=0, verbose_name="ترتیب نمایش")
+    # نسخه داده‌های مرجع در حافظه (instastore/refdata.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="آخرین تغییر")
 
     class Meta:
         verbose_name = "پلن اشتراک"
@@ -75,24 +84,16 @@ class Plan(models.Model):
 class ShopQuerySet(models.QuerySet):
     """QuerySet سفارشی برای Shop"""
     
+    def with_stats(self, *names):
+        """افزودن annotationهای آماری (shops/annotations.py) - قابل ترکیب بدون ضرب ردیف‌ها"""
+        return annotate_shops(self, *names)
+
     def with_subscription_info(self):
         """دریافت اطلاعات اشتراک"""
+        # روزهای باقی‌مانده از property مدل خوانده می‌شود (annotation هم‌نام قابل set نیست)
         return self.select_related(
             'current_plan', 'user'
-        ).annotate(
-            remaining_days=ExpressionWrapper(
-                F('plan_expires_at') - timezone.now(),
-                output_field=DurationField()
-            ),
-            product_count=Count('products', filter=Q(products__is_active=True)),
-            order_count=Count('orders', filter=Q(
-                orders__created_at__gte=timezone.now() - timedelta(days=30)
-            )),
-            revenue=Sum('orders__total_price', filter=Q(
-                orders__is_paid=True,
-                orders__created_at__gte=timezone.now() - timedelta(days=30)
-            ))
-        )
+        ).with_stats('active_product_count', 'orders_30d', 'revenue_30d')
     
     def active_subscriptions(self):
         """فروشگاه‌های با اشتراک فعال"""
@@ -126,6 +127,9 @@ class ShopManager(models.Manager):
     def get_queryset(self):
         return ShopQuerySet(self.model, using=self._db)
     
+    def with_stats(self, *names):
+        return self.get_queryset().with_stats(*names)
+
     def with_subscription_info(self):
         return self.get_queryset().with_subscription_info()
     
@@ -139,10 +143,12 @@ class ShopManager(models.Manager):
         return self.get_queryset().expired()
 
 
-class Shop(models.Model):
+class Shop(TrackedFieldsMixin, models.Model):
     """
     مدل اصلی فروشگاه
     """
+    tracked_fields = ('is_active', 'current_plan', 'plan_started_at', 'plan_expires_at', 'logo')
+
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='shop', verbose_name="صاحب فروشگاه")
     shop_name = models.CharField(max_length=200, verbose_name="نام فروشگاه")
     slug = models.SlugField(unique=True, blank=True, allow_unicode=True, verbose_name="شناسه در URL")
@@ -173,6 +179,10 @@ class Shop(models.Model):
     plan_started_at = models.DateTimeField(null=True, blank=True, verbose_name="تاریخ شروع اشتراک")
     plan_expires_at = models.DateTimeField(null=True, blank=True, verbose_name="تاریخ انقضای اشتراک")
 
+    # آخرین اعلان انقضا (shops/expiry.py): برای کدام تاریخ انقضا و کدام مرحله (روز مانده، 0 = منقضی)
+    expiry_notice_for = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="اعلان انقضا برای تاریخ")
+    expiry_notice_stage = models.PositiveSmallIntegerField(null=True, blank=True, editable=False, verbose_name="مرحله اعلان انقضا")
+
     # اطلاعات سیستمی
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ تاسیس")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="آخرین تغییر")
@@ -195,6 +205,11 @@ class Shop(models.Model):
     def __str__(self):
         return f"{self.shop_name} (@{self.instagram_username})"
 
+    @cached_property
+    def logo_responsive(self):
+        """آدرس‌های srcset لوگو (نسخه‌های کوچک‌شده یا فایل اصلی)"""
+        return responsive_image(self.logo)
+
     def save(self, *args, **kwargs):
         """ذخیره با منطق اختصاص خودکار پلن"""
         from django.db import transaction
@@ -221,30 +236,13 @@ class Shop(models.Model):
             # 🔧 اختصاص خودکار پلن برای فروشگاه‌های جدید
             is_new = self._state.adding
             
-            if is_new and not self.current_plan:
+            if is_new and self.current_plan_id is None:
                 # 🎯 اولویت‌بندی برای یافتن پلن مناسب:
                 # 1. پلن free فعال با حداقل 5 روز
                 # 2. پلن پیش‌فرض فعال
-                # 3. اولین پلن فعال
-                
-                free_plan = Plan.objects.select_for_update().filter(
-                    code=Plan.PLAN_FREE,
-                    is_active=True,
-                    days__gte=5  # حداقل 5 روز
-                ).first()
-                
-                if not free_plan:
-                    free_plan = Plan.objects.select_for_update().filter(
-                        is_default=True,
-                        is_active=True,
-                        days__gte=1
-                    ).first()
-                
-                if not free_plan:
-                    free_plan = Plan.objects.select_for_update().filter(
-                        is_active=True,
-                        days__gte=1
-                    ).order_by('price').first()
+                # 3. ارزان‌ترین پلن فعال
+                # از داده‌های مرجع در حافظه (instastore/refdata.py) - بدون کوئری
+                free_plan = signup_plan()
                 
                 if free_plan:
                     self.current_plan = free_plan
@@ -255,17 +253,16 @@ class Shop(models.Model):
                     print(f"🎯 فروشگاه جدید '{self.shop_name}' - پلن: {free_plan.name} ({free_plan.days} روز)")
             
             # 🔧 اگر پلن تغییر کرده، تاریخ‌ها را ریست کن
-            elif not is_new and self.current_plan and self.pk:
-                try:
-                    old_shop = Shop.objects.get(pk=self.pk)
-                    if old_shop.current_plan != self.current_plan:
-                        # پلن تغییر کرده - تاریخ‌ها را به روز کن
-                        self.plan_started_at = timezone.now()
-                        self.plan_expires_at = self.plan_started_at + timedelta(days=self.current_plan.days)
-                except Shop.DoesNotExist:
-                    pass
+            elif not is_new and self.current_plan_id and self.pk:
+                # مقایسه با مقدار بارگذاری‌شده (instastore/tracking.py) به جای خواندن دوباره ردیف
+                if self.has_changed('current_plan'):
+                    # پلن تغییر کرده - تاریخ‌ها را به روز کن
+                    self.plan_started_at = timezone.now()
+                    self.plan_expires_at = self.plan_started_at + timedelta(days=get_plan(self.current_plan_id).days)
             
             super().save(*args, **kwargs)
+            # وضعیت اشتراک نگه‌داشته‌شده روی همین شیء (کش مشترک با رویداد shop.updated پاک می‌شود)
+            self.__dict__.pop('_subscription_state', None)
 
     def clean(self):
         """اعتبارسنجی فروشگاه"""
@@ -318,14 +315,15 @@ class Shop(models.Model):
         """آیا اشتراک فروشگاه معتبر است؟"""
         if not self.is_active:
             return False
-        if not self.current_plan or not self.plan_expires_at:
+        # current_plan_id: بدون کوئری روی جدول Plan
+        if not self.current_plan_id or not self.plan_expires_at:
             return False
         return timezone.now() < self.plan_expires_at
     
     @property 
     def subscription_status(self):
         """وضعیت اشتراک به صورت متن"""
-        if not self.current_plan:
+        if not self.current_plan_id:
             return 'بدون پلن'
         elif self.is_subscription_active:
             return 'فعال'
@@ -335,7 +333,7 @@ class Shop(models.Model):
     @property
     def subscription_status_color(self):
         """رنگ وضعیت اشتراک برای نمایش"""
-        if not self.current_plan:
+        if not self.current_plan_id:
             return 'secondary'
         elif self.is_subscription_active:
             if self.remaining_days > 30:
@@ -351,28 +349,30 @@ class Shop(models.Model):
     # متدهای منطقی
     # ----------------------------------------
     
+    @property
+    def subscription_state(self):
+        """وضعیت کش‌شده اشتراک (shops/subscription_state.py) - سقف‌های پلن بدون کوئری روی Plan"""
+        from .subscription_state import get_subscription_state
+        return get_subscription_state(self)
+
     def can_add_product(self):
         """آیا مجاز به افزودن محصول جدید است؟"""
         if not self.is_subscription_active:
             return False
         
-        # استفاده از annotate برای کارایی بهتر
-        from django.db.models import Count
-        product_count = self.products.filter(is_active=True).count()
+        # از annotation (with_stats) یا یک Subquery
+        product_count = get_shop_stat(self, 'active_product_count')
         
-        return product_count < self.current_plan.max_products
+        return product_count < self.subscription_state.max_products
 
     def can_accept_order(self):
         """آیا سقف سفارش ماهانه پر نشده است؟"""
         if not self.is_subscription_active:
             return False
         
-        current_month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        order_count = self.orders.filter(
-            created_at__gte=current_month_start
-        ).count()
+        order_count = get_shop_stat(self, 'orders_this_month')
         
-        return order_count < self.current_plan.max_orders_per_month
+        return order_count < self.subscription_state.max_orders_per_month
 
     def renew_subscription(self, new_plan, start_from_now=True):
         """
@@ -413,20 +413,20 @@ class Shop(models.Model):
 
     def get_usage_stats(self):
         """دریافت آمار استفاده از پلن"""
-        current_month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0)
+        stats = get_shop_stats(self, 'active_product_count', 'orders_this_month')
+        max_products = self.current_plan.max_products if self.current_plan else 0
+        max_orders = self.current_plan.max_orders_per_month if self.current_plan else 0
         
         return {
             'products': {
-                'current': self.products.filter(is_active=True).count(),
-                'max': self.current_plan.max_products if self.current_plan else 0,
-                'remaining': max(0, (self.current_plan.max_products if self.current_plan else 0) - 
-                               self.products.filter(is_active=True).count())
+                'current': stats['active_product_count'],
+                'max': max_products,
+                'remaining': max(0, max_products - stats['active_product_count'])
             },
             'orders': {
-                'current': self.orders.filter(created_at__gte=current_month_start).count(),
-                'max': self.current_plan.max_orders_per_month if self.current_plan else 0,
-                'remaining': max(0, (self.current_plan.max_orders_per_month if self.current_plan else 0) - 
-                               self.orders.filter(created_at__gte=current_month_start).count())
+                'current': stats['orders_this_month'],
+                'max': max_orders,
+                'remaining': max(0, max_orders - stats['orders_this_month'])
             }
         }
 
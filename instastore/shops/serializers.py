@@ -1,5 +1,6 @@
 # shops/serializers.py
 from rest_framework import serializers
+from instastore.refdata import get_plan
 from .models import Shop, Plan
 from django.contrib.auth.models import User
 
@@ -18,13 +19,27 @@ class PlanSerializer(serializers.ModelSerializer):
                  'max_products', 'max_orders_per_month', 'is_active']
         read_only_fields = ['id']
 
+    def to_representation(self, instance):
+        # فیلد تو در تو با source='current_plan_id': پلن از داده‌های مرجع در حافظه (بدون کوئری)
+        if not isinstance(instance, Plan):
+            instance = get_plan(instance)
+            if instance is None:
+                return None
+        return super().to_representation(instance)
+
 class ShopSerializer(serializers.ModelSerializer):
     """Serializer برای فروشگاه"""
     user = UserSerializer(read_only=True)
-    current_plan = PlanSerializer(read_only=True)
+    current_plan = PlanSerializer(source='current_plan_id', read_only=True)
     is_subscription_active = serializers.BooleanField(read_only=True)
     remaining_days = serializers.IntegerField(read_only=True)
     
+    # آمار فقط وقتی در خروجی می‌آید که queryset با Shop.objects.with_stats(...) annotate شده باشد
+    # (بدون کوئری جدا برای هر فروشگاه؛ در serializer تو در توی محصول حذف می‌شوند)
+    active_product_count = serializers.IntegerField(read_only=True)
+    orders_this_month = serializers.IntegerField(read_only=True)
+    customer_count = serializers.IntegerField(read_only=True)
+    
     user_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(),
         source='user',
@@ -42,11 +57,13 @@ class ShopSerializer(serializers.ModelSerializer):
             'shaba_number', 'enable_online_payment', 'zarinpal_merchant_id',
             'current_plan', 'plan_started_at', 'plan_expires_at',
             'is_subscription_active', 'remaining_days',
+            'active_product_count', 'orders_this_month', 'customer_count',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['slug', 'created_at', 'updated_at', 
                            'plan_started_at', 'plan_expires_at',
-                           'is_subscription_active', 'remaining_days']
+                           'is_subscription_active', 'remaining_days',
+                           'active_product_count', 'orders_this_month', 'customer_count']
     
     def validate_instagram_username(self, value):
         """اعتبارسنجی نام کاربری اینستاگرام"""
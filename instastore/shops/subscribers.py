@@ -0,0 +1,137 @@
+# shops/subscribers.py
+"""
+واکنش‌های فروشگاه به رویدادهای دامنه (instastore/events.py)
+
+ایمیل‌ها با delivery='async' در thread پس‌زمینه ارسال می‌شوند تا پاسخ درخواست منتظر
+سرور ایمیل نماند.
+"""
+
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import send_mail, send_mass_mail
+
+from instastore.events import subscriber, track_model
+from logs.models import SystemLog
+
+from .models import Shop
+from .subscription_state import invalidate_subscription_state
+
+logger = logging.getLogger('instastore')
+
+# فیلدهایی که در SubscriptionState هستند (سقف‌های پلن از instastore/refdata.py خوانده می‌شوند)
+STATE_SHOP_FIELDS = ('is_active', 'current_plan', 'plan_expires_at')
+
+track_model(User, 'user', fields=('is_active',))
+track_model(Shop, 'shop', fields=STATE_SHOP_FIELDS)
+
+
+def _site_url(path):
+    return f"https://{settings.INSTASTORE_CONFIG['SITE_DOMAIN']}{path}"
+
+
+# ------------------------------------------------------------
+# 1. غیرفعال شدن کاربر
+# ------------------------------------------------------------
+
+@subscriber('user.updated')
+def deactivate_shop_of_inactive_user(event):
+    user = event.instance
+    if not event.changed('is_active') or user.is_active:
+        return
+
+    shop = getattr(user, 'shop', None)
+    if shop is None or not shop.is_active:
+        return
+
+    shop.is_active = False
+    shop.save(update_fields=['is_active', 'updated_at'])
+    SystemLog.warning(
+        f"User deactivated: {user.username}, shop {shop.slug} also deactivated",
+        component='AUTH'
+    )
+
+
+# ------------------------------------------------------------
+# 2. انقضای اشتراک (رویدادهای گروهی shops/expiry.py)
+# ------------------------------------------------------------
+
+def _expiry_message(shop_name, name, days):
+    if days:
+        subject = f"فقط {days} روز تا انقضای اشتراک شما باقی مانده است"
+        body = f"اشتراک فروشگاه {shop_name} تا {days} روز دیگر منقضی می‌شود.\n"
+    else:
+        subject = "اشتراک فروشگاه شما منقضی شده است"
+        body = f"اشتراک فروشگاه {shop_name} منقضی شده است.\n"
+    return subject, (
+        f"سلام {name},\n\n{body}"
+        f"برای تمدید از پنل فروشنده اقدام کنید: {_site_url('/seller/dashboard/')}\n"
+    )
+
+
+@subscriber('shop.subscriptions_expiring', 'shop.subscriptions_expired', delivery='async')
+def send_expiry_emails(event):
+    """یک کوئری برای گیرندگان کل دسته و ارسال همه ایمیل‌ها با یک اتصال SMTP"""
+    days = event.data.get('days')
+    recipients = Shop.objects.filter(pk__in=event.data['shop_ids']).exclude(user__email='').values_list(
+        'shop_name', 'user__username', 'user__first_name', 'user__last_name', 'user__email'
+    )
+
+    messages = []
+    for shop_name, username, first_name, last_name, email in recipients:
+        name = f"{first_name} {last_name}".strip() or username
+        subject, body = _expiry_message(shop_name, name, days)
+        messages.append((subject, body, settings.DEFAULT_FROM_EMAIL, [email]))
+
+    if messages:
+        send_mass_mail(messages, fail_silently=True)
+
+
+# ------------------------------------------------------------
+# 3. فروشگاه جدید
+# ------------------------------------------------------------
+
+@subscriber('shop.created', delivery='async')
+def send_welcome_email(event):
+    shop = event.instance
+    user = shop.user
+    if not user.email:
+        return
+
+    free_days = f"شما {shop.current_plan.days} روز اشتراک رایگان دارید.\n" if shop.current_plan else ""
+    send_mail(
+        subject="فروشگاه شما آماده است!",
+        message=(
+            f"سلام {user.get_full_name() or user.username},\n\n"
+            f"فروشگاه شما با موفقیت ایجاد شد:\n\n"
+            f"نام فروشگاه: {shop.shop_name}\n"
+            f"آدرس: {_site_url(f'/shop/{shop.slug}/')}\n"
+            f"پنل مدیریت: {_site_url('/seller/dashboard/')}\n\n"
+            f"{free_days}"
+            f"برای شروع، محصولات خود را اضافه کنید.\n"
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[user.email],
+        fail_silently=True
+    )
+
+
+# ------------------------------------------------------------
+# 4. باطل کردن وضعیت کش‌شده اشتراک (shops/subscription_state.py)
+# ------------------------------------------------------------
+
+@subscriber('shop.updated')
+def invalidate_shop_subscription_state(event):
+    if event.changed(*STATE_SHOP_FIELDS):
+        invalidate_subscription_state([event.pk])
+
+
+@subscriber('shop.deleted')
+def invalidate_deleted_shop_subscription_state(event):
+    invalidate_subscription_state([event.pk])
+
+
+@subscriber('shop.subscriptions_changed')
+def invalidate_bulk_subscription_state(event):
+    invalidate_subscription_state(event.data['shop_ids'])
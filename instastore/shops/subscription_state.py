@@ -0,0 +1,194 @@
+# shops/subscription_state.py
+"""
+وضعیت فشرده اشتراک فروشگاه برای بررسی‌های پرتکرار (decoratorها، middleware، قالب‌ها)
+
+    state = get_subscription_state(shop)       # یا shop.subscription_state
+    state.is_subscription_active, state.remaining_days, state.max_products
+
+- بخش فروشگاه (فعال بودن، شناسه پلن، زمان انقضا به epoch) با یک کوئری ساخته می‌شود و
+  STATE_CACHE_TIMEOUT ثانیه در کش نگه داشته می‌شود؛ روی شیء shop هم نگه داشته می‌شود تا
+  در یک درخواست فقط یک بار از کش خوانده شود
+- نام، مدت و سقف‌های پلن در کش نیستند و هنگام خواندن از داده‌های مرجع در حافظه
+  (instastore/refdata.py) می‌آیند؛ پس تغییر پلن از هر پروسه‌ای حداکثر پس از
+  REFERENCE_DATA['CHECK_INTERVAL'] ثانیه اعمال می‌شود، بدون کوئری
+- فعال/منقضی بودن و روزهای باقی‌مانده هنگام خواندن از روی epoch انقضا محاسبه می‌شود؛
+  پس گذشت زمان (انقضا) کش را باطل نمی‌کند
+- با تغییر پلن، تاریخ انقضا یا وضعیت فروشگاه (رویدادهای instastore/events.py در
+  shops/subscribers.py) بعد از commit در همین پروسه پاک می‌شود. کش پیش‌فرض (LocMemCache)
+  برای هر پروسه جداست؛ تغییر در پروسه دیگر (shell، دستورها) حداکثر پس از
+  STATE_CACHE_TIMEOUT دیده می‌شود
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from instastore.refdata import get_plan
+
+# v2: پلن دیگر در مقدار کش نیست (ساختار pickle عوض شده است)
+STATE_CACHE_KEY = 'shops:subscription:v2:{shop_id}'
+# کهنگی حداکثر بعد از تغییر فروشگاه در پروسه دیگر
+STATE_CACHE_TIMEOUT = 60
+
+INVALIDATE_BATCH_SIZE = 1000
+
+# رنگ وضعیت مثل Shop.subscription_status_color
+STATUS_COLORS = ((30, 'success'), (7, 'warning'))
+
+
+class SubscriptionState:
+    """وضعیت اشتراک یک فروشگاه (فقط مقادیر ساده تا در کش جای کمی بگیرد)"""
+
+    __slots__ = ('shop_id', 'shop_active', 'plan_id', 'expires_at')
+
+    def __init__(self, shop_id, shop_active, plan_id=None, expires_at=None):
+        self.shop_id = shop_id
+        self.shop_active = shop_active
+        self.plan_id = plan_id
+        self.expires_at = expires_at
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"<SubscriptionState shop={self.shop_id} plan={self.plan_code} status={self.status}>"
+
+    # ------------------------------------------------------------
+    # پلن از داده‌های مرجع در حافظه (بدون کوئری)
+    # ------------------------------------------------------------
+
+    @property
+    def plan(self):
+        return get_plan(self.plan_id)
+
+    def _plan_value(self, field, default):
+        plan = self.plan
+        return getattr(plan, field) if plan is not None else default
+
+    @property
+    def plan_code(self):
+        return self._plan_value('code', None)
+
+    @property
+    def plan_name(self):
+        return self._plan_value('name', None)
+
+    @property
+    def plan_days(self):
+        return self._plan_value('days', 0)
+
+    @property
+    def max_products(self):
+        return self._plan_value('max_products', 0)
+
+    @property
+    def max_orders_per_month(self):
+        return self._plan_value('max_orders_per_month', 0)
+
+    @property
+    def has_plan(self):
+        return self.plan_id is not None
+
+    @property
+    def is_subscription_active(self):
+        if not self.shop_active or not self.has_plan or self.expires_at is None:
+            return False
+        return time.time() < self.expires_at
+
+    @property
+    def remaining_days(self):
+        if self.expires_at is None:
+            return 0
+        return max(int((self.expires_at - time.time()) // 86400), 0)
+
+    @property
+    def status(self):
+        """مثل Shop.subscription_status"""
+        if not self.has_plan:
+            return 'بدون پلن'
+        return 'فعال' if self.is_subscription_active else 'منقضی شده'
+
+    @property
+    def status_color(self):
+        if not self.has_plan:
+            return 'secondary'
+        if not self.is_subscription_active:
+            return 'dark'
+        remaining = self.remaining_days
+        for days, color in STATUS_COLORS:
+            if remaining > days:
+                return color
+        return 'danger'
+
+
+# ------------------------------------------------------------
+# 1. ساخت و خواندن
+# ------------------------------------------------------------
+
+def compute_subscription_state(shop_id):
+    """ساخت وضعیت از دیتابیس با یک کوئری (None اگر فروشگاه وجود نداشته باشد)"""
+    from .models import Shop
+
+    row = Shop.objects.filter(pk=shop_id).values(
+        'is_active', 'current_plan_id', 'plan_expires_at'
+    ).order_by().first()
+    if row is None:
+        return None
+
+    expires_at = row['plan_expires_at']
+    return SubscriptionState(
+        shop_id=shop_id,
+        shop_active=row['is_active'],
+        plan_id=row['current_plan_id'],
+        expires_at=expires_at.timestamp() if expires_at else None,
+    )
+
+
+def get_subscription_state(shop):
+    """
+    وضعیت اشتراک برای شیء Shop یا شناسه آن
+    شیء Shop: نتیجه روی خود شیء هم نگه داشته می‌شود (فراخوانی‌های بعدی همان درخواست)
+    """
+    shop_id = getattr(shop, 'pk', shop)
+    if shop_id is None:
+        return None
+
+    is_instance = hasattr(shop, 'pk')
+    if is_instance:
+        state = shop.__dict__.get('_subscription_state')
+        if state is not None:
+            return state
+
+    key = STATE_CACHE_KEY.format(shop_id=shop_id)
+    state = cache.get(key)
+    if state is None:
+        state = compute_subscription_state(shop_id)
+        if state is None:
+            return None
+        cache.set(key, state, STATE_CACHE_TIMEOUT)
+
+    if is_instance:
+        shop.__dict__['_subscription_state'] = state
+    return state
+
+
+# ------------------------------------------------------------
+# 2. باطل کردن
+# ------------------------------------------------------------
+
+def invalidate_subscription_state(shop_ids):
+    """پاک کردن وضعیت کش‌شده بعد از commit (تا درخواست همزمان داده قدیمی را دوباره کش نکند)"""
+    keys = [STATE_CACHE_KEY.format(shop_id=shop_id) for shop_id in shop_ids]
+    if not keys:
+        return
+
+    def delete():
+        for start in range(0, len(keys), INVALIDATE_BATCH_SIZE):
+            cache.delete_many(keys[start:start + INVALIDATE_BATCH_SIZE])
+
+    transaction.on_commit(delete)
@@ -0,0 +1,122 @@
+# shops/subscriptions.py
+"""
+عملیات گروهی اشتراک فروشگاه‌ها (تمدید، اختصاص پلن)
+
+به جای Shop.save() برای تک‌تک فروشگاه‌ها (کوئری‌های اضافه save و receiverها)، هر عملیات
+با یک UPDATE روی کل مجموعه انجام می‌شود:
+
+    UPDATE shop SET plan_expires_at = COALESCE(plan_expires_at, now) + interval ...
+
+و در پایان یک insert گروهی در ShopActivityLog و یک رویداد shop.subscriptions_changed
+(instastore/events.py، بعد از commit) برای کل مجموعه ثبت می‌شود.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from instastore.events import publish
+from logs.models import AdminLog, ShopActivityLog
+
+ACTIVITY_BATCH_SIZE = 1000
+
+
+def _record(shop_ids, action, details, user=None, request=None):
+    """ثبت فعالیت همه فروشگاه‌ها با یک bulk_create و ارسال یک رویداد بعد از commit"""
+    technical = {}
+    if request is not None:
+        technical = {
+            'ip_address': AdminLog.get_client_ip(request),
+            'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+        }
+
+    ShopActivityLog.objects.bulk_create(
+        [
+            ShopActivityLog(
+                shop_id=shop_id,
+                user=user,
+                category='PLAN',
+                action=action,
+                details=details,
+                metadata={'bulk': True, 'count': len(shop_ids)},
+                **technical
+            )
+            for shop_id in shop_ids
+        ],
+        batch_size=ACTIVITY_BATCH_SIZE
+    )
+
+    # یک رویداد برای کل عملیات گروهی (publish خودش تا commit صبر می‌کند)
+    publish(
+        'shop.subscriptions_changed',
+        action=action,
+        shop_ids=shop_ids,
+        plan=details.get('plan_code'),
+        days=details.get('days'),
+        user=user,
+    )
+
+
+def bulk_extend_subscriptions(queryset, days, user=None, request=None):
+    """
+    تمدید اشتراک فروشگاه‌های دارای پلن به تعداد روز مشخص (مثل Shop.extend_subscription)
+    خروجی: تعداد فروشگاه‌های تمدیدشده
+    """
+    now = timezone.now()
+    queryset = queryset.filter(current_plan__isnull=False)
+
+    with transaction.atomic():
+        shop_ids = list(queryset.values_list('pk', flat=True))
+        if not shop_ids:
+            return 0
+
+        queryset.model.objects.filter(pk__in=shop_ids).update(
+            plan_expires_at=Coalesce(
+                F('plan_expires_at'), Value(now, output_field=DateTimeField())
+            ) + timedelta(days=days),
+            updated_at=now,
+        )
+        _record(shop_ids, 'SUBSCRIPTION_EXTENDED', {'days': days}, user, request)
+
+    return len(shop_ids)
+
+
+def bulk_assign_plan(queryset, plan, start_from_now=True, user=None, request=None):
+    """
+    اختصاص یک پلن به همه فروشگاه‌ها (مثل Shop.renew_subscription)
+    start_from_now=False: ادامه از تاریخ انقضای فعلی اگر هنوز نگذشته باشد
+    """
+    now = timezone.now()
+    duration = timedelta(days=plan.days)
+
+    if start_from_now:
+        changes = {
+            'plan_started_at': now,
+            'plan_expires_at': now + duration,
+        }
+    else:
+        now_value = Value(now, output_field=DateTimeField())
+        changes = {
+            'plan_expires_at': Greatest(Coalesce(F('plan_expires_at'), now_value), now_value) + duration,
+        }
+
+    with transaction.atomic():
+        shop_ids = list(queryset.values_list('pk', flat=True))
+        if not shop_ids:
+            return 0
+
+        queryset.model.objects.filter(pk__in=shop_ids).update(
+            current_plan=plan,
+            updated_at=now,
+            **changes
+        )
+        _record(
+            shop_ids, 'PLAN_ASSIGNED',
+            {'plan_code': plan.code, 'plan_name': plan.name, 'days': plan.days},
+            user, request
+        )
+
+    return len(shop_ids)